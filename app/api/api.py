@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from api.v1.endpoints import image_segmentation
+from api.v1.endpoints import image_segmentation, jobs
 
 api_router = APIRouter()
 
@@ -10,3 +10,8 @@ api_router.include_router(
     # prefix="/image-segmentation",
     tags=["Rota para Segmentar imagem DICOM"],
 )
+
+api_router.include_router(
+    jobs.router,
+    tags=["Tarefas assíncronas de segmentação"],
+)
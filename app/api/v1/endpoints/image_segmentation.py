@@ -1,38 +1,99 @@
-from typing import Any, Dict
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
+import io
 import json
+import os
+import shutil
+import tempfile
 import traceback
-
-import pydicom
-from fastapi import APIRouter, File, HTTPException, Query, UploadFile, status, Form
-from fastapi.responses import JSONResponse
-from pydicom.filebase import DicomBytesIO
-
-from crud.segmentation import MCACrisp  # Classe do método de segmentação principal
-
-from crud.alternativas.imagem_para_base64 import imagem_para_base64
-from crud.alternativas.to_hu import converte_para_hu
-from crud.alternativas.hu_para_cinza import converter_hu_para_cinza
-from crud.alternativas.converte_str_json import (
-    converte_param_preprocess,
-    converter_parametros_para_tipos,
+import zipfile
+
+from fastapi import (
+    APIRouter,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
 )
-from crud.alternativas.remove_fundo import remove_fundo
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from crud.alternativas.watershed import aplicar_watershed
-from crud.alternativas.lim_media_mov import aplicar_limiarizacao_media_movel
-from crud.alternativas.lim_multipla import limiarizacao_multipla
-from crud.alternativas.lim_prop_locais import aplicar_limiarizacao_propriedades
-from crud.alternativas.sauvola import aplicar_sauvola
-from crud.alternativas.div_e_fus_regioes import aplicar_divisao_e_fusao
-from crud.alternativas.otsu import aplicar_otsu
-from crud.alternativas.aplicar_filtros import aplicar_filtros
-from crud.alternativas.crescimento_regioes_fora import crescimento_regioes_fora
-from crud.alternativas.lim_global_simples import aplicar_lim_global_simples
+from crud.formato_compacto import MIDIA_COMPACTA, processar_segmentacao_compacta
+from crud.processamento import (
+    ParametrosInvalidosError,
+    processar_segmentacao,
+    transmitir_segmentacao,
+)
+from crud.processamento_volume import METODOS_VOLUME, processar_volume
+from utils.cache_resultados import cache_resultados, chave_resultado
+from utils.globals import SEGMENTATION_BATCH_WAIT
+from utils.worker_pool import PoolSaturadoError, worker_pool
 
 
 router = APIRouter()
 
 
+async def salvar_upload(file: UploadFile) -> str:
+    """
+    Copia o arquivo enviado, em blocos, para um arquivo temporário e retorna
+    o seu caminho. O processo do pool mapeia o arquivo em memória em vez de
+    receber o conteúdo serializado; quem chama deve removê-lo.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".dcm", delete=False) as destino:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, destino)
+    return destino.name
+
+
+async def segmentar_com_cache(
+    dicom_data: Union[bytes, str],
+    method: str,
+    params_dict: Dict[str, Any],
+    compacto: bool = False,
+) -> Tuple[bytes, bool]:
+    """
+    Resultado serializado (JSON ou formato compacto) de `processar_segmentacao`,
+    consultando antes o cache de resultados. Mesma imagem, método e parâmetros
+    devolvem o resultado já calculado sem ocupar o pool.
+
+    args:
+        dicom_data: Union[bytes, str] - Conteúdo do arquivo DICOM ou o seu
+                                        caminho (ver `salvar_upload`).
+        method: str - Nome do método de segmentação.
+        params_dict: Dict[str, Any] - Parâmetros da requisição.
+        compacto: bool - Se True, serializa com `processar_segmentacao_compacta`.
+    return:
+        Tuple[bytes, bool] - Resultado serializado e se veio do cache.
+    raises:
+        PoolSaturadoError: Se não houver processo livre nem vaga na fila.
+        ParametrosInvalidosError: Se os parâmetros ou o método forem inválidos.
+    """
+    formato = "compacto" if compacto else "json"
+    chave = await asyncio.to_thread(
+        chave_resultado, dicom_data, method, params_dict, formato
+    )
+    conteudo = await asyncio.to_thread(cache_resultados.obter, chave)
+    if conteudo is not None:
+        return conteudo, True
+
+    # O processamento é CPU-bound: roda em um processo do pool para não
+    # bloquear o event loop (healthcheck e demais uploads)
+    if compacto:
+        # Serializado no próprio processo do pool
+        conteudo = await worker_pool.executar(
+            processar_segmentacao_compacta, dicom_data, method, params_dict
+        )
+    else:
+        resultado = await worker_pool.executar(
+            processar_segmentacao, dicom_data, method, params_dict
+        )
+        conteudo = JSONResponse(resultado).body
+    await asyncio.to_thread(cache_resultados.guardar, chave, conteudo)
+    return conteudo, False
+
+
 @router.post(
     "/image-segmentation",
     response_model=Dict[str, Any],
@@ -42,13 +103,36 @@ async def segment_dicom(
     file: UploadFile = File(...),
     method: str = Query(..., description="Método de segmentação"),
     params: str = Form(...),
+    include: Optional[str] = Query(
+        None,
+        description="Saídas a retornar, separadas por vírgula (padrão: todas)",
+    ),
+    tolerancia: Optional[float] = Query(
+        None,
+        description="Tolerância (px) da simplificação Douglas-Peucker dos contornos",
+    ),
+    accept: Optional[str] = Header(None),
 ):
+    """
+    Segmenta um arquivo DICOM. Responde em JSON ou, com `Accept` contendo
+    `MIDIA_COMPACTA`, no formato compacto de `codificar_compacto` (contornos
+    em buffers de pontos e imagem PNG em binário). `include` e `tolerancia` vão para os
+    "output_params" de `processar_segmentacao`.
+    """
     # Desserializando a string JSON para dicionário
-
     params_dict = json.loads(params)
-    preprocessing_params = params_dict.get("preprocessing_params", {})
-    segmentation_params = params_dict.get("segmentation_params", {})
-    postprocessing_params = params_dict.get("postprocessing_params", {})
+    output_params = params_dict.setdefault("output_params", {})
+    if include is not None:
+        # Ordenadas, para que a mesma seleção tenha a mesma chave no cache
+        output_params["include"] = sorted(
+            {s.strip() for s in include.split(",")} - {""}
+        )
+    if tolerancia is not None:
+        output_params["tolerancia"] = tolerancia
+    if not output_params:
+        # Sem seletores, a chave do cache é a mesma de antes
+        del params_dict["output_params"]
+    compacto = MIDIA_COMPACTA in (accept or "")
 
     # Verificar se o arquivo é DICOM
     if not file.filename.endswith(".dcm"):
@@ -57,331 +141,304 @@ async def segment_dicom(
             detail="O arquivo deve ser no formato DICOM (.dcm)",
         )
 
+    caminho = None
     try:
-        dicom_data = await file.read()
-        ds = pydicom.dcmread(DicomBytesIO(dicom_data))  # Ler o DICOM corretamente
-        pixel_array = ds.pixel_array  # Extraindo a matriz de pixels
-        imagem_hu = converte_para_hu(pixel_array, ds)
-        pixel_array = converter_hu_para_cinza(imagem_hu, hu_min=-1000, hu_max=2000)
-
-        if preprocessing_params:
-            missing_params = [
-                key for key, value in preprocessing_params.items() if value is None
-            ]
-
-            if missing_params:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                )
-
-            preprocessing_params = converte_param_preprocess(preprocessing_params)
-            pixel_array = aplicar_filtros(
-                pixel_array,
-                preprocessing_params["aplicar_desfoque_media"],
-                preprocessing_params["aplicar_desfoque_gaussiano"],
-                preprocessing_params["aplicar_desfoque_mediana"],
-                preprocessing_params["tamanho_kernel"],
-                preprocessing_params["sigma"],
+        caminho = await salvar_upload(file)
+        conteudo, do_cache = await segmentar_com_cache(
+            caminho, method, params_dict, compacto
+        )
+        return Response(
+            conteudo,
+            media_type=MIDIA_COMPACTA if compacto else "application/json",
+            headers={"X-Cache": "HIT" if do_cache else "MISS", "Vary": "Accept"},
+        )
+    except PoolSaturadoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+    except ParametrosInvalidosError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        stack_trace = traceback.format_exc()  # Captura a stack trace como string
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar o arquivo DICOM: {str(e)}\n\nStack trace:\n{stack_trace}",
+        )
+    finally:
+        if caminho is not None:
+            os.unlink(caminho)
+
+
+@router.get("/image-segmentation/cache", response_model=Dict[str, Any])
+async def segmentation_cache_stats():
+    """Acertos, falhas e ocupação do cache de resultados."""
+    return cache_resultados.estatisticas()
+
+
+def extrair_fatias(nome: str, conteudo: bytes) -> List[Tuple[str, bytes]]:
+    """
+    Fatias (nome, conteúdo) de um arquivo enviado ao endpoint em lote: o
+    próprio arquivo, se for um .dcm, ou os arquivos .dcm de um .zip.
+
+    args:
+        nome: str - Nome do arquivo enviado.
+        conteudo: bytes - Conteúdo do arquivo enviado.
+    return:
+        List[Tuple[str, bytes]] - Fatias na ordem em que aparecem.
+    raises:
+        ValueError: Se o arquivo não for .dcm nem um .zip válido.
+    """
+    if nome.endswith(".dcm"):
+        return [(nome, conteudo)]
+
+    if nome.endswith(".zip"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(conteudo)) as arquivo_zip:
+                return [
+                    (membro.filename, arquivo_zip.read(membro))
+                    for membro in arquivo_zip.infolist()
+                    if not membro.is_dir() and membro.filename.endswith(".dcm")
+                ]
+        except zipfile.BadZipFile:
+            raise ValueError(f"Arquivo zip inválido: {nome}")
+
+    raise ValueError(f"O arquivo deve ser DICOM (.dcm) ou um zip de DICOMs: {nome}")
+
+
+async def segmentar_fatia(
+    indice: int, nome: str, dicom_data: bytes, method: str, params_dict: Dict[str, Any]
+) -> bytes:
+    """
+    Segmenta uma fatia do lote e devolve a sua linha NDJSON: o resultado, no
+    mesmo formato de `/image-segmentation`, ou o erro com o status que a
+    requisição individual teria recebido. Com o pool saturado, aguarda uma
+    vaga por até `SEGMENTATION_BATCH_WAIT` segundos antes de responder 503.
+    """
+    cabecalho = {"indice": indice, "arquivo": nome}
+    loop = asyncio.get_running_loop()
+    prazo = loop.time() + SEGMENTATION_BATCH_WAIT
+    while True:
+        try:
+            conteudo, do_cache = await segmentar_com_cache(
+                dicom_data, method, params_dict
             )
-
-        if method == "segmentation":
-            missing_params = [
-                key for key, value in preprocessing_params.items() if value is None
-            ]
-
-            if missing_params:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
+            break
+        except PoolSaturadoError as e:
+            # Pool ocupado por outras requisições: aguarda uma vaga até o prazo
+            restante = prazo - loop.time()
+            if restante <= 0 or not await worker_pool.aguardar_vaga(restante):
+                cabecalho.update(
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE, erro=str(e)
                 )
-
-            mca_esquerdo = MCACrisp(
-                imagem_hu=imagem_hu,
-                y_min=180,
-                y_max=360,
-                x_min=256,
-                x_max=512,
-                quantidade_pixels=segmentation_params["quantidade_pixels"],
-                raio=segmentation_params["raio"],
-                w_cont=segmentation_params["w_cont"],
-                w_adapt=segmentation_params["w_adapt"],
-                d_max=segmentation_params["d_max"],
-                area_de_busca=segmentation_params["area_de_busca"],
-                alpha=segmentation_params["alpha"],
-                early_stop=segmentation_params["early_stop"],
-            )
-
-            # segmentando o primeiro pulmao
-            for curva in mca_esquerdo.process(
-                max_iterations=segmentation_params["max_iterations"]
-            ):
-                pass
-            contorno_0 = mca_esquerdo.curvas[-1]
-
-            # crisp para o pulmão direito
-            mca_direito = MCACrisp(
-                imagem_hu=imagem_hu,
-                y_min=180,
-                y_max=360,
-                x_min=0,
-                x_max=256,
-                quantidade_pixels=segmentation_params["quantidade_pixels"],
-                raio=segmentation_params["raio"],
-                w_cont=segmentation_params["w_cont"],
-                w_adapt=segmentation_params["w_adapt"],
-                d_max=segmentation_params["d_max"],
-                area_de_busca=segmentation_params["area_de_busca"],
-                alpha=segmentation_params["alpha"],
-                early_stop=segmentation_params["early_stop"],
+                return json.dumps(cabecalho).encode() + b"\n"
+        except ParametrosInvalidosError as e:
+            cabecalho.update(status=status.HTTP_400_BAD_REQUEST, erro=str(e))
+            return json.dumps(cabecalho).encode() + b"\n"
+        except Exception as e:
+            cabecalho.update(
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                erro=f"Erro ao processar o arquivo DICOM: {e}",
             )
+            return json.dumps(cabecalho).encode() + b"\n"
 
-            # pulmão direito
-            for curva in mca_direito.process(
-                max_iterations=segmentation_params["max_iterations"]
-            ):
-                pass
-            contorno_1 = mca_direito.curvas[-1]
+    # O JSON do resultado (possivelmente vindo do cache) é inserido sem ser
+    # decodificado novamente
+    cabecalho.update(status=status.HTTP_200_OK, cache="HIT" if do_cache else "MISS")
+    return json.dumps(cabecalho)[:-1].encode() + b', "resultado": ' + conteudo + b"}\n"
 
-            contornos_validos = {"contorno_0": contorno_0, "contorno_1": contorno_1}
-
-            for key in contornos_validos:
-                contornos_validos[key] = contornos_validos[key].tolist()
-            todos_os_contornos = {}
-
-        elif method == "watershed":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                    )
-
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
+@router.post(
+    "/image-segmentation/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def segment_dicom_batch(
+    files: List[UploadFile] = File(...),
+    method: str = Query(..., description="Método de segmentação"),
+    params: str = Form(...),
+):
+    """
+    Segmenta uma série inteira em uma requisição: aceita vários arquivos .dcm
+    e/ou arquivos .zip com as fatias. As fatias são distribuídas entre os
+    processos do pool e cada resultado é enviado como uma linha NDJSON assim
+    que fica pronto (fora de ordem; `indice` é a posição da fatia no envio).
+    """
+    params_dict = json.loads(params)
 
-                mascara_segmentada = aplicar_watershed(
-                    pixel_array,
-                    segmentation_params["limiar"],
-                    segmentation_params["aplicar_interpolacao"],
-                    segmentation_params["aplicar_morfologia"],
-                    segmentation_params["tamanho_kernel"],
-                    segmentation_params["iteracoes_morfologia"],
-                    segmentation_params["iteracoes_dilatacao"],
-                    segmentation_params["fator_dist_transform"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    mascara_segmentada, postprocessing_params["area_minima"]
+    fatias = deque()
+    try:
+        for file in files:
+            fatias.extend(
+                await asyncio.to_thread(
+                    extrair_fatias, file.filename, await file.read()
                 )
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        elif method == "lim_media_mov":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
+    if not fatias:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum arquivo DICOM (.dcm) encontrado no envio",
+        )
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
+    quantidade = len(fatias)
+
+    async def linhas():
+        # Uma fatia por processo do pool: as vagas da fila continuam livres
+        # para as demais requisições
+        pendentes = set()
+        indice = 0
+        try:
+            while fatias or pendentes:
+                while fatias and len(pendentes) < worker_pool.max_workers:
+                    nome, dicom_data = fatias.popleft()
+                    pendentes.add(
+                        asyncio.create_task(
+                            segmentar_fatia(
+                                indice, nome, dicom_data, method, params_dict
+                            )
+                        )
                     )
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
-
+                    indice += 1
 
-                mascara_segmentada = aplicar_limiarizacao_media_movel(
-                    pixel_array,
-                    segmentation_params["n"],
-                    segmentation_params["b"],
-                    segmentation_params["aplicar_interpolacao"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    mascara_segmentada, postprocessing_params["area_minima"]
+                concluidas, pendentes = await asyncio.wait(
+                    pendentes, return_when=asyncio.FIRST_COMPLETED
                 )
+                for tarefa in concluidas:
+                    yield tarefa.result()
+        finally:
+            # Cliente desconectado: não envia as fatias restantes ao pool
+            for tarefa in pendentes:
+                tarefa.cancel()
 
-        elif method == "lim_global_simples":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
+    return StreamingResponse(
+        linhas(),
+        media_type="application/x-ndjson",
+        headers={"X-Slice-Count": str(quantidade)},
+    )
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                    )
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
-                print(f"limiar={segmentation_params['limiar']}")
-                print(f"delta_limiar={segmentation_params['delta_limiar']}")
-                imagem_cinza_binario_invertida = aplicar_lim_global_simples(
-                    pixel_array,
-                    segmentation_params["limiar"],
-                    segmentation_params["delta_limiar"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    imagem_cinza_binario_invertida, postprocessing_params["area_minima"]
-                )
-
-        elif method == "lim_multipla":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                    )
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
-                mascara_segmentada = limiarizacao_multipla(
-                    pixel_array,
-                    segmentation_params["lim_hiperaeradas"],
-                    segmentation_params["lim_normalmente_aeradas"],
-                    segmentation_params["lim_pouco_aeradas"],
-                    segmentation_params["lim_nao_aeradas"],
-                    segmentation_params["lim_osso"],
-                    segmentation_params["ativacao_hiperaeradas"],
-                    segmentation_params["ativacao_normalmente_aeradas"],
-                    segmentation_params["ativacao_pouco_aeradas"],
-                    segmentation_params["ativacao_nao_aeradas"],
-                    segmentation_params["ativacao_osso"],
-                    segmentation_params["ativacao_nao_classificado"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    mascara_segmentada, postprocessing_params["area_minima"]
-                )
+@router.post(
+    "/image-segmentation/volume",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+)
+async def segment_dicom_volume(
+    files: List[UploadFile] = File(...),
+    method: str = Query(..., description="Método de segmentação volumétrica"),
+    params: str = Form(...),
+):
+    """
+    Segmenta uma série inteira como um volume 3D (fatias ordenadas pela
+    posição): aceita vários arquivos .dcm e/ou arquivos .zip com as fatias e
+    retorna os contornos válidos de cada fatia e o volume pulmonar total.
+    Disponível para "segmentation" (cada fatia parte do contorno da vizinha),
+    "crescimento_regioes_fora" e "lim_multipla".
+    """
+    params_dict = json.loads(params)
 
-        elif method == "lim_prop_locais":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
+    if method not in METODOS_VOLUME:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Método sem versão volumétrica: {method}. "
+            f"Use {' ou '.join(METODOS_VOLUME)}.",
+        )
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                    )
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
-                mascara_segmentada = aplicar_limiarizacao_propriedades(
-                    pixel_array,
-                    segmentation_params["tamanho_janela"],
-                    segmentation_params["a"],
-                    segmentation_params["b"],
-                    segmentation_params["usar_media_global"],
-                    segmentation_params["aplicar_interpolacao"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    mascara_segmentada, postprocessing_params["area_minima"]
+    fatias = []
+    try:
+        for file in files:
+            fatias.extend(
+                await asyncio.to_thread(
+                    extrair_fatias, file.filename, await file.read()
                 )
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-        elif method == "sauvola":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
+    if not fatias:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum arquivo DICOM (.dcm) encontrado no envio",
+        )
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                    )
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
-                mascara_segmentada = aplicar_sauvola(
-                    pixel_array,
-                    segmentation_params["tamanho_janela"],
-                    segmentation_params["k"],
-                    segmentation_params["aplicar_interpolacao"],
-                    segmentation_params["aplicar_morfologia"],
-                    segmentation_params["tamanho_kernel"],
-                    segmentation_params["iteracoes_morfologia"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    mascara_segmentada, postprocessing_params["area_minima"]
-                )
+    try:
+        # O volume inteiro é processado em um único processo do pool
+        resultado = await worker_pool.executar(
+            processar_volume, fatias, method, params_dict
+        )
+        return JSONResponse(resultado)
+    except PoolSaturadoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+    except ParametrosInvalidosError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar a série DICOM: {str(e)}",
+        )
 
-        elif method == "divisao_e_fusao":
-            if segmentation_params:
-                missing_params = [
-                    key for key, value in segmentation_params.items() if value is None
-                ]
 
-                if missing_params:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Os seguintes parâmetros estão ausentes ou nulos: {', '.join(missing_params)}",
-                    )
-                segmentation_params = converter_parametros_para_tipos(
-                    segmentation_params
-                )
-                mascara_segmentada = aplicar_divisao_e_fusao(
-                    pixel_array,
-                    segmentation_params["limite_var"],
-                    segmentation_params["limite_media"],
-                    segmentation_params["referencia_media"],
-                )
-                todos_os_contornos, contornos_validos = remove_fundo(
-                    mascara_segmentada, postprocessing_params["area_minima"]
-                )
+def evento_sse(evento: str, dados: Dict[str, Any]) -> str:
+    """Formata uma mensagem no padrão Server-Sent Events."""
+    return f"event: {evento}\ndata: {json.dumps(dados)}\n\n"
 
-        elif method == "crescimento_regioes_fora":
-            imagem_segmentada_8bits_invertida = crescimento_regioes_fora(pixel_array)
-            todos_os_contornos, contornos_validos = remove_fundo(
-                imagem_segmentada_8bits_invertida
-            )
 
-        elif method == "otsu":
-            mascara_segmentada = aplicar_otsu(pixel_array)
-            todos_os_contornos, contornos_validos = remove_fundo(mascara_segmentada)
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Método de segmentação inválido. Use 'watershed' ou 'lim_media_mov' ou 'lim_multipla' ou 'lim_prop_locais', 'sauvola', 'otsu' ou 'divisao_e_fusao'.",
-            )
+@router.post(
+    "/image-segmentation/stream",
+    status_code=status.HTTP_200_OK,
+)
+async def segment_dicom_stream(
+    file: UploadFile = File(...),
+    params: str = Form(...),
+    intervalo: int = Query(5, ge=1, description="Envia um contorno a cada N iterações"),
+):
+    """
+    Método principal (MCACrisp) em fluxo Server-Sent Events: envia a imagem
+    pré-processada assim que fica pronta, os contornos intermediários de cada
+    pulmão a cada `intervalo` iterações e, por fim, o resultado completo. Se
+    o cliente desconectar, a evolução é interrompida no processo do pool.
+    """
+    params_dict = json.loads(params)
 
-        if (
-            segmentation_params
-            or method == "otsu"
-            or method == "crescimento_regioes_fora"
-            or method == "segmentation"
-        ):
-            pixel_array = imagem_para_base64(pixel_array)
-            #print(pixel_array)
-            #print("Todos os contornos:", todos_os_contornos)
-            #print("Contornos válidos:", contornos_validos)
-            return JSONResponse(
-                {
-                    "imagem_pre_processada": pixel_array,
-                    "todos_os_contornos": todos_os_contornos,
-                    "contornos_validos": contornos_validos,
-                }
-            )
+    if not file.filename.endswith(".dcm"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O arquivo deve ser no formato DICOM (.dcm)",
+        )
 
-        return JSONResponse(
-            {
-                "imagem_pre_processada": {},
-                "todos_os_contornos": {},
-                "contornos_validos": {},
-            }
+    dicom_data = await file.read()
+    try:
+        mensagens = worker_pool.transmitir(
+            transmitir_segmentacao, dicom_data, params_dict, intervalo
         )
-    except Exception as e:
-        stack_trace = traceback.format_exc()  # Captura a stack trace como string
+    except PoolSaturadoError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro ao processar o arquivo DICOM: {str(e)}\n\nStack trace:\n{stack_trace}",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
         )
+
+    async def eventos():
+        try:
+            async for mensagem in mensagens:
+                yield evento_sse(mensagem.pop("evento"), mensagem)
+        except Exception as e:
+            # O status 200 já foi enviado: o erro vai como um evento
+            yield evento_sse(
+                "erro", {"detail": f"Erro ao processar o arquivo DICOM: {e}"}
+            )
+        finally:
+            # Garante o cancelamento mesmo quando a conexão cai no meio do envio
+            await mensagens.aclose()
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,156 @@
+from typing import Any, AsyncIterator, Dict
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile, status, Form
+from fastapi.responses import JSONResponse
+
+from api.v1.endpoints.image_segmentation import salvar_upload
+from crud.processamento import ParametrosInvalidosError, executar_tarefa
+from utils.cache_resultados import cache_resultados, chave_resultado
+from utils.tarefas import LimiteTarefasError, Tarefa, armazenamento_tarefas
+from utils.worker_pool import PoolSaturadoError, worker_pool
+
+
+router = APIRouter()
+
+
+async def resultado_do_cache(conteudo: bytes) -> AsyncIterator[Dict[str, Any]]:
+    """Mensagens de uma tarefa cujo resultado já estava no cache."""
+    yield {"evento": "resultado", "resultado": json.loads(conteudo)}
+
+
+def guardar_resultado(chave: str, resultado: Dict[str, Any]) -> None:
+    cache_resultados.guardar(chave, JSONResponse(resultado).body)
+
+
+def finalizar_tarefa(tarefa: Tarefa, caminho: str, chave: str) -> None:
+    """
+    Remove o arquivo enviado e, se a tarefa foi concluída, guarda o resultado
+    no cache (em uma thread, fora do event loop).
+    """
+    os.unlink(caminho)
+    if tarefa.status == "concluida":
+        asyncio.get_running_loop().run_in_executor(
+            None, guardar_resultado, chave, tarefa.resultado
+        )
+
+
+def obter_tarefa(job_id: str) -> Tarefa:
+    tarefa = armazenamento_tarefas.obter(job_id)
+    if tarefa is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Tarefa não encontrada ou expirada",
+        )
+    return tarefa
+
+
+@router.post(
+    "/jobs",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_job(
+    file: UploadFile = File(...),
+    method: str = Query(..., description="Método de segmentação"),
+    params: str = Form(...),
+):
+    """
+    Agenda a segmentação (mesmas entradas de /image-segmentation) e responde
+    imediatamente com o identificador da tarefa, que é consultado em
+    /jobs/{job_id} e /jobs/{job_id}/result.
+    """
+    params_dict = json.loads(params)
+
+    if not file.filename.endswith(".dcm"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O arquivo deve ser no formato DICOM (.dcm)",
+        )
+
+    caminho = await salvar_upload(file)
+    try:
+        # Mesma chave de /image-segmentation: uma tarefa repetida é concluída
+        # com o resultado do cache, sem ocupar o pool
+        chave = await asyncio.to_thread(chave_resultado, caminho, method, params_dict)
+        conteudo = await asyncio.to_thread(cache_resultados.obter, chave)
+        if conteudo is not None:
+            os.unlink(caminho)
+            tarefa = armazenamento_tarefas.criar(
+                method, lambda: resultado_do_cache(conteudo)
+            )
+        else:
+            tarefa = armazenamento_tarefas.criar(
+                method,
+                lambda: worker_pool.transmitir(
+                    executar_tarefa, caminho, method, params_dict
+                ),
+                ao_finalizar=lambda tarefa: finalizar_tarefa(tarefa, caminho, chave),
+            )
+    except (PoolSaturadoError, LimiteTarefasError) as e:
+        os.unlink(caminho)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+
+    return JSONResponse(
+        tarefa.como_dict(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/api/jobs/{tarefa.id}"},
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+async def get_job(job_id: str):
+    """Status da tarefa e progresso (iteração e perímetro de cada contorno)."""
+    return obter_tarefa(job_id).como_dict()
+
+
+@router.delete("/jobs/{job_id}", response_model=Dict[str, Any])
+async def cancel_job(job_id: str):
+    """
+    Cancela a tarefa, se ainda não tiver terminado. Uma tarefa que aguarda um
+    processo livre não chega a ser executada; em execução, apenas o método
+    MCA é interrompido (na iteração em andamento) e libera o processo. Os
+    demais métodos ocupam o processo até o fim e o resultado é descartado.
+    """
+    tarefa = obter_tarefa(job_id)
+    await armazenamento_tarefas.cancelar(tarefa)
+    return tarefa.como_dict()
+
+
+@router.get("/jobs/{job_id}/result", response_model=Dict[str, Any])
+async def get_job_result(job_id: str):
+    """
+    Resultado da tarefa, no mesmo formato de /image-segmentation. Enquanto a
+    tarefa não termina, responde 202 com o status atual.
+    """
+    tarefa = obter_tarefa(job_id)
+
+    if not tarefa.finalizada:
+        return JSONResponse(
+            tarefa.como_dict(),
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"Retry-After": "1"},
+        )
+
+    if tarefa.status == "cancelada":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Tarefa cancelada"
+        )
+
+    if tarefa.erro is not None:
+        if isinstance(tarefa.erro, ParametrosInvalidosError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(tarefa.erro)
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar o arquivo DICOM: {str(tarefa.erro)}",
+        )
+
+    return JSONResponse(tarefa.resultado)
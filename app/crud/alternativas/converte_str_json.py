@@ -32,6 +32,7 @@ def converter_parametros_para_tipos(
         "tamanho_janela",
         "n",
         "delta_limiar",
+        "overlap",
     ]
     for param in int_params:
         if param in segmentation_params:
@@ -43,19 +44,22 @@ def converter_parametros_para_tipos(
         if param in segmentation_params:
             segmentation_params[param] = float(segmentation_params[param])
 
-    # Converte para tupla (separando por vírgula)
+    # Converte para tupla (separando por vírgula, ex.: "2,3"; listas JSON,
+    # ex.: [2, 3], e tuplas já convertidas também são aceitas)
     tuple_params = [
         "lim_hiperaeradas",
         "lim_normalmente_aeradas",
         "lim_pouco_aeradas",
         "lim_nao_aeradas",
         "lim_osso",
+        "grid_size",
     ]
     for param in tuple_params:
         if param in segmentation_params:
-            segmentation_params[param] = tuple(
-                map(int, segmentation_params[param].split(","))
-            )
+            valores = segmentation_params[param]
+            if isinstance(valores, str):
+                valores = valores.split(",")
+            segmentation_params[param] = tuple(map(int, valores))
 
     # Se necessário, você pode adicionar outros parâmetros aqui, como listas ou booleans.
 
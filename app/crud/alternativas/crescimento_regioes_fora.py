@@ -7,8 +7,14 @@ def crescimento_regioes_fora(imagem_original):
     hu_min=-1000
     hu_max=2000
     largura_hu = hu_max - hu_min
-    imagem_original = imagem_original.astype(np.float32)
-    imagem_original = (imagem_original * largura_hu) / 255.0 + hu_min
+
+    # Como a imagem tem apenas 256 níveis de cinza, a volta para HU, o
+    # janelamento e a normalização são tabelas indexadas pelo nível
+    tabela_hu = (np.arange(256, dtype=np.float32) * largura_hu) / 255.0 + hu_min
+    tabela_janelada = np.clip(tabela_hu, -1000, -200)
+    tabela_normalizada = np.clip(
+        ((tabela_janelada + 1000) / 800) * 255.0, 0, 255
+    ).astype(np.uint8)
 
     """
     Aplica o algoritmo de crescimento de regiões com a semente fora do pulmão.
@@ -33,17 +39,48 @@ def crescimento_regioes_fora(imagem_original):
         região foi atingido.  
         """
 
+    # Adicionar colunas extras (nível 0, -1000 HU) nas laterais da imagem
+    imagem = np.pad(imagem_original.astype(np.uint8, copy=False), ((0, 0), (10, 10)))
+
+    # Janelamento de Intensidade HU (-1000 a -200)
+    imagem_janelada = tabela_janelada[imagem]
+
+    # Normalização para 8 bits (0 a 255)
+    imagem_normalizada = tabela_normalizada[imagem]
+
+    return crescer_regioes(imagem_janelada, imagem_normalizada)
+
+
+def crescimento_regioes_fora_hu(imagem_hu):
+    """
+    Crescimento de regiões com a semente fora do pulmão diretamente sobre a
+    imagem em HU, sem a volta dos 256 níveis de cinza (~11,8 HU cada) para HU.
+
+    Parâmetros:
+        imagem_hu (np.ndarray): Imagem em Hounsfield Units (HU).
+    Retorna:
+        np.ndarray: Imagem segmentada invertida, como em `crescimento_regioes_fora`.
+    """
     # Adicionar colunas extras (-1000 HU) nas laterais da imagem
-    colunas_extras = np.full((imagem_original.shape[0], 10), -1000, dtype=np.int16)
-    imagem = np.hstack((colunas_extras, imagem_original, colunas_extras))
+    imagem = cv2.copyMakeBorder(
+        imagem_hu.astype(np.float32), 0, 0, 10, 10, cv2.BORDER_CONSTANT, value=-1000
+    )
 
     # Janelamento de Intensidade HU (-1000 a -200)
-    imagem_janelada = np.clip(imagem.astype(np.float32), -1000, -200)
+    imagem_janelada = np.clip(imagem, -1000, -200)
 
     # Normalização para 8 bits (0 a 255)
     imagem_normalizada = ((imagem_janelada + 1000) / 800) * 255.0
     imagem_normalizada = np.clip(imagem_normalizada, 0, 255).astype(np.uint8)
 
+    return crescer_regioes(imagem_janelada, imagem_normalizada)
+
+
+def crescer_regioes(imagem_janelada, imagem_normalizada):
+    """
+    Crescimento de regiões a partir das imagens janelada (-1000 a -200 HU) e
+    normalizada para 8 bits, ambas com as 10 colunas extras nas laterais.
+    """
     # Criar máscara para identificar o corpo (regiões HU < -968)
     mascara_fundo = (imagem_janelada < -968).astype(np.uint8)
     coordenadas_fundo = np.column_stack(np.where(mascara_fundo == 1))
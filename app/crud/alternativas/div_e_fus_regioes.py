@@ -1,20 +1,207 @@
 import cv2
+import numba
 import numpy as np
 from crud.alternativas.remove_fundo import remove_fundo
 
 
-def criterio_homogeneidade(region: np.ndarray, limite_var: float) -> bool:
+@numba.njit
+def criterio_homogeneidade(n, soma, soma_quadrados, limite_var) -> bool:
     """Verifica se uma região é homogênea com base na variância."""
-    return np.var(region) < limite_var
+    return (n * soma_quadrados - soma * soma) / (n * n) < limite_var
 
 
-def criterio_media(region: np.ndarray, referencia: float, limite_media: float) -> bool:
+@numba.njit
+def criterio_media(n, soma, referencia, limite_media) -> bool:
     """Verifica se a média da região está próxima da referência."""
-    return abs(np.mean(region) - referencia) < limite_media
+    return abs(soma / n - referencia) < limite_media
+
+
+@numba.njit
+def soma_retangulo(integral, x, y, largura, altura):
+    """Soma dos valores de um retângulo a partir da imagem integral."""
+    return (
+        integral[y + altura, x + largura]
+        - integral[y, x + largura]
+        - integral[y + altura, x]
+        + integral[y, x]
+    )
+
+
+def imagem_integral(valores: np.ndarray) -> np.ndarray:
+    """Imagem integral com uma linha e uma coluna de zeros no início."""
+    integral = np.zeros((valores.shape[0] + 1, valores.shape[1] + 1), valores.dtype)
+    integral[1:, 1:] = valores.cumsum(axis=0).cumsum(axis=1)
+    return integral
+
+
+@numba.njit
+def dividir_regioes(
+    integral,
+    integral_quadrados,
+    limite_var,
+    referencia_media,
+    limite_media,
+    divisao_quadrada=False,
+):
+    """
+    Fase de divisão: percorre a árvore de quadrantes com uma pilha explícita,
+    dividindo cada região não homogênea em até quatro (as metades da largura
+    e da altura) até chegar a pixels isolados, de modo que todos os pixels
+    da imagem, inclusive em imagens retangulares, pertencem a uma folha. A
+    média e a variância de cada região vêm das imagens integrais de I e I²,
+    em tempo constante.
+
+    Com `divisao_quadrada`, reproduz a recursão original: parte do quadrado
+    com o menor lado da imagem e divide em quadrados com metade do lado, o
+    que deixa de fora o restante de imagens não quadradas e a última linha e
+    coluna de regiões com lado ímpar.
+
+    Returns:
+        tuple: Folhas da árvore (k, 4) como (x, y, largura, altura) e se cada
+               uma satisfaz os dois critérios.
+    """
+    altura, largura = integral.shape[0] - 1, integral.shape[1] - 1
+    regioes = np.empty((altura * largura, 4), dtype=np.int64)
+    homogeneas = np.empty(altura * largura, dtype=np.bool_)
+    quantidade = 0
+
+    pilha = np.empty((256, 4), dtype=np.int64)
+    if divisao_quadrada:
+        lado = min(altura, largura)
+        pilha[0] = (0, 0, lado, lado)
+    else:
+        pilha[0] = (0, 0, largura, altura)
+    topo = 1
+    while topo > 0:
+        topo -= 1
+        x, y, w, h = pilha[topo, 0], pilha[topo, 1], pilha[topo, 2], pilha[topo, 3]
+
+        n = w * h
+        soma = soma_retangulo(integral, x, y, w, h)
+        soma_quadrados = soma_retangulo(integral_quadrados, x, y, w, h)
+        homogenea = criterio_homogeneidade(
+            n, soma, soma_quadrados, limite_var
+        ) and criterio_media(n, soma, referencia_media, limite_media)
+
+        if homogenea or n == 1:
+            regioes[quantidade] = (x, y, w, h)
+            homogeneas[quantidade] = homogenea
+            quantidade += 1
+            continue
+
+        # Empilhados na ordem inversa para visitar primeiro o quadrante
+        # superior esquerdo, como na recursão
+        # Na divisão quadrada, a última linha e coluna de lados ímpares ficam
+        # de fora
+        mx, my = w // 2, h // 2
+        resto_x, resto_y = (mx, my) if divisao_quadrada else (w - mx, h - my)
+        for dx, dy, dw, dh in (
+            (mx, my, resto_x, resto_y),
+            (0, my, mx, resto_y),
+            (mx, 0, resto_x, my),
+            (0, 0, mx, my),
+        ):
+            if dw > 0 and dh > 0:
+                pilha[topo] = (x + dx, y + dy, dw, dh)
+                topo += 1
+
+    return regioes[:quantidade], homogeneas[:quantidade]
+
+
+@numba.njit
+def raiz(pai, i):
+    """Representante do conjunto de `i`, comprimindo o caminho."""
+    while pai[i] != i:
+        pai[i] = pai[pai[i]]
+        i = pai[i]
+    return i
+
+
+@numba.njit
+def fundir_regioes(
+    regioes,
+    integral,
+    integral_quadrados,
+    limite_var,
+    referencia_media,
+    limite_media,
+):
+    """
+    Fase de fusão: junta folhas vizinhas (4-vizinhança) sempre que a união
+    ainda satisfaz os dois critérios, acumulando a quantidade de pixels, a
+    soma e a soma dos quadrados de cada região fundida.
+
+    Returns:
+        np.ndarray: Se a região final de cada folha satisfaz os critérios.
+    """
+    altura, largura = integral.shape[0] - 1, integral.shape[1] - 1
+    k = regioes.shape[0]
+
+    # Pixels fora de todas as folhas (-1) não participam da fusão
+    rotulos = np.full((altura, largura), -1, dtype=np.int64)
+    n = np.empty(k, dtype=integral.dtype)
+    soma = np.empty(k, dtype=integral.dtype)
+    soma_quadrados = np.empty(k, dtype=integral.dtype)
+    for i in range(k):
+        x, y, w, h = regioes[i, 0], regioes[i, 1], regioes[i, 2], regioes[i, 3]
+        rotulos[y : y + h, x : x + w] = i
+        n[i] = w * h
+        soma[i] = soma_retangulo(integral, x, y, w, h)
+        soma_quadrados[i] = soma_retangulo(integral_quadrados, x, y, w, h)
+
+    pai = np.arange(k)
+    for y in range(altura):
+        for x in range(largura):
+            for yv, xv in ((y, x + 1), (y + 1, x)):
+                if yv >= altura or xv >= largura:
+                    continue
+                if rotulos[y, x] < 0 or rotulos[yv, xv] < 0:
+                    continue
+                a = raiz(pai, rotulos[y, x])
+                b = raiz(pai, rotulos[yv, xv])
+                if a == b:
+                    continue
+
+                n_uniao = n[a] + n[b]
+                soma_uniao = soma[a] + soma[b]
+                quadrados_uniao = soma_quadrados[a] + soma_quadrados[b]
+                if criterio_homogeneidade(
+                    n_uniao, soma_uniao, quadrados_uniao, limite_var
+                ) and criterio_media(
+                    n_uniao, soma_uniao, referencia_media, limite_media
+                ):
+                    pai[b] = a
+                    n[a] = n_uniao
+                    soma[a] = soma_uniao
+                    soma_quadrados[a] = quadrados_uniao
+
+    homogeneas = np.empty(k, dtype=np.bool_)
+    for i in range(k):
+        r = raiz(pai, i)
+        homogeneas[i] = criterio_homogeneidade(
+            n[r], soma[r], soma_quadrados[r], limite_var
+        ) and criterio_media(n[r], soma[r], referencia_media, limite_media)
+    return homogeneas
+
+
+@numba.njit
+def pintar_regioes(regioes, homogeneas, altura, largura):
+    """Máscara com 255 nas regiões homogêneas."""
+    segmentos = np.zeros((altura, largura), dtype=np.uint8)
+    for i in range(regioes.shape[0]):
+        if homogeneas[i]:
+            x, y, w, h = regioes[i, 0], regioes[i, 1], regioes[i, 2], regioes[i, 3]
+            segmentos[y : y + h, x : x + w] = 255
+    return segmentos
 
 
 def aplicar_divisao_e_fusao(
-    imagem: np.ndarray, limite_var=40, limite_media=40, referencia_media= 5
+    imagem: np.ndarray,
+    limite_var=40,
+    limite_media=40,
+    referencia_media=5,
+    aplicar_fusao=False,
+    divisao_quadrada=False,
 ) -> np.ndarray:
     """
     Aplica o algoritmo de Divisão e Fusão de Regiões para segmentação de pulmões.
@@ -24,6 +211,11 @@ def aplicar_divisao_e_fusao(
         limite_var (int): Limite de variância.
         limite_media (int): Limite de média.
         referencia_media (int): Referência de média para cálculo da diferença entre médias.
+        aplicar_fusao (bool): Se True, funde as regiões vizinhas após a divisão
+                              (por padrão, apenas a divisão é aplicada).
+        divisao_quadrada (bool): Se True, divide como a versão recursiva
+                                 original, só no quadrado do menor lado (ver
+                                 `dividir_regioes`).
 
     Retorna:
         tuple:
@@ -41,29 +233,25 @@ def aplicar_divisao_e_fusao(
 
         Caso ambos os critérios sejam satisfeitos, a região não é dividida; se ao menos um não satisfazer, ela é novamente
         dividida e os critérios são avaliados para cada nova região criada.
+
+        Na fusão, regiões vizinhas são unidas enquanto a união também satisfaz os dois
+        critérios, e as regiões finais que os satisfazem formam a máscara.
     """
     altura, largura = imagem.shape
-    tamanho_min = 1  # Tamanho mínimo da região
-    segmentos = np.zeros_like(imagem, dtype=np.uint8)
-
-    def dividir(x, y, tamanho):
-        """Divide recursivamente a região se não for homogênea."""
-        if tamanho < tamanho_min:
-            return
-        subregiao = imagem[y : y + tamanho, x : x + tamanho]
-        if criterio_homogeneidade(subregiao, limite_var) and criterio_media(
-            subregiao, referencia_media, limite_media
-        ):
-            segmentos[y : y + tamanho, x : x + tamanho] = 255
-        else:
-            metade = tamanho // 2
-            dividir(x, y, metade)
-            dividir(x + metade, y, metade)
-            dividir(x, y + metade, metade)
-            dividir(x + metade, y + metade, metade)
 
-    # Aplicar divisão recursiva
-    dividir(0, 0, min(altura, largura))
+    # Imagens integrais de I e I² (inteiras e exatas para imagens inteiras)
+    tipo = np.int64 if np.issubdtype(imagem.dtype, np.integer) else np.float64
+    valores = imagem.astype(tipo)
+    integral = imagem_integral(valores)
+    integral_quadrados = imagem_integral(valores * valores)
+    criterios = (limite_var, referencia_media, limite_media)
+
+    regioes, homogeneas = dividir_regioes(
+        integral, integral_quadrados, *criterios, divisao_quadrada
+    )
+    if aplicar_fusao:
+        homogeneas = fundir_regioes(regioes, integral, integral_quadrados, *criterios)
+    segmentos = pintar_regioes(regioes, homogeneas, altura, largura)
 
     # Operações morfológicas vetorizadas
     kernel = np.ones((5, 5), np.uint8)
@@ -74,4 +262,4 @@ def aplicar_divisao_e_fusao(
         segmentos, cv2.MORPH_OPEN, kernel, iterations=2
     )  # Remove ruídos pequenos
 
-    return segmentos
\ No newline at end of file
+    return segmentos
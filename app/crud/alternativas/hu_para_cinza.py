@@ -15,4 +15,30 @@ def converter_hu_para_cinza(imagem_hu, hu_min=-1000, hu_max=2000) -> np.ndarray:
     imagem_hu = imagem_hu.astype(np.float32)
     imagem_escala_cinza = np.clip((255 * (imagem_hu - hu_min)) / largura_hu, 0, 255)
 
-    return imagem_escala_cinza.astype(np.uint8)
\ No newline at end of file
+    return imagem_escala_cinza.astype(np.uint8)
+
+
+def quantizar_hu(
+    imagem_hu: np.ndarray, largura_bin: float = 1, hu_min=-1000, hu_max=2000
+) -> tuple:
+    """
+    Quantiza a imagem em HU em bins de `largura_bin` HU na janela
+    [hu_min, hu_max], sem passar pelos 256 níveis de cinza: com bins de 1 HU
+    e a imagem em int16, cada HU inteiro é um nível.
+
+    args:
+        imagem_hu: np.ndarray - Imagem em Hounsfield Units (HU).
+        largura_bin: float - Largura de cada bin, em HU.
+        hu_min: int - Início da janela (bin 0).
+        hu_max: int - Fim da janela (último bin).
+    return:
+        tuple - Índice do bin de cada pixel (uint16) e quantidade de bins.
+    """
+    indices = np.clip(imagem_hu, hu_min, hu_max)
+    flutuante = indices.dtype.kind == "f"
+    indices = np.subtract(indices, hu_min, dtype=np.float64 if flutuante else np.int32)
+    if largura_bin != 1 or flutuante:
+        indices = np.floor_divide(indices, largura_bin)
+
+    quantidade_bins = int((hu_max - hu_min) // largura_bin) + 1
+    return indices.astype(np.uint16), quantidade_bins
@@ -1,49 +1,79 @@
 import numpy as np
 import cv2
 
+from crud.alternativas.hu_para_cinza import quantizar_hu
 
-def aplicar_lim_global_simples(
-    imagem_cinza: np.ndarray, limiar=50, delta_limiar=5
-) -> tuple:
+
+def ajustar_limiar(histograma: np.ndarray, limiar, delta_limiar) -> tuple:
     """
-    Traça o contorno do pulmão da imagem utilizando Limiarização global simples.
+    Ajusta o limiar iterativamente (método de Ridler-Calvard) a partir de um
+    histograma: o novo limiar é a média entre as médias dos níveis <= limiar
+    e > limiar, até variar no máximo `delta_limiar`.
 
     Parâmetros:
-        imagem_cinza (np.ndarray): Pixels da imagem de entrada em escala de cinza.
-        limiar (int): Valor a ser aplicado como limiar inicial na imagem
-        delta_limiar (int): Valor usado como critério de parada no ajuste do limiar
+        histograma (np.ndarray): Quantidade de pixels de cada nível.
+        limiar (float): Limiar inicial, em níveis.
+        delta_limiar (float): Critério de parada no ajuste do limiar.
     Retorna:
         tuple:
-            - np.ndarray: Imagem com os novos contornos preenchidos em vermelho.
-            - dict: Dicionário onde cada chave é uma string (e.g., "contorno_0")
-                    e o valor é o contorno válido.
+            - float: Limiar final, após a convergência.
+            - int: Quantidade de iterações do ajuste do limiar.
     """
-    # novas imagens são criadas
-    imagem_cinza_binario = np.zeros_like(imagem_cinza)
-    imagem_cinza_binario = imagem_cinza_binario.astype(np.uint8)
+    # Contagens e somas acumuladas, precedidas de um zero: os pixels <= t são
+    # os níveis 0..floor(t), ou seja, os primeiros floor(t) + 1 níveis
+    contagem = np.concatenate(([0], np.cumsum(histograma)))
+    soma = np.concatenate(([0], np.cumsum(histograma * np.arange(histograma.size))))
+    total, soma_total = contagem[-1], soma[-1]
 
     # Valores de limiares inicializados para o ajuste do limiar
     mod_limiar_dif = float("inf")
     limiar_n_anterior = 0
     limiar_n = limiar
+    iteracoes = 0
 
     # Ajuste do limiar
     while mod_limiar_dif > delta_limiar:
-        # Máscaras para separar os pixels
-        grupo_maior = imagem_cinza[imagem_cinza > limiar_n]
-        grupo_menor = imagem_cinza[imagem_cinza <= limiar_n]
+        # Quantidade e soma dos pixels de cada grupo, em O(níveis)
+        niveis_menores = min(max(int(np.floor(limiar_n)) + 1, 0), histograma.size)
+        qtd_menor, soma_menor = contagem[niveis_menores], soma[niveis_menores]
+        qtd_maior, soma_maior = total - qtd_menor, soma_total - soma_menor
 
         # Cálculo das médias, evitando divisões por zero
-        media_maior = np.mean(grupo_maior) if grupo_maior.size > 0 else 0
-        media_menor_igual = np.mean(grupo_menor) if grupo_menor.size > 0 else 0
+        media_maior = soma_maior / qtd_maior if qtd_maior > 0 else 0
+        media_menor_igual = soma_menor / qtd_menor if qtd_menor > 0 else 0
 
         # Novo limiar é calculado
         limiar_n_anterior = limiar_n
         limiar_n = (media_maior + media_menor_igual) / 2
+        iteracoes += 1
 
         # diferença entre os limiares é recalculada
         mod_limiar_dif = abs(limiar_n_anterior - limiar_n)
 
+    return float(limiar_n), iteracoes
+
+
+def aplicar_lim_global_simples(
+    imagem_cinza: np.ndarray, limiar=50, delta_limiar=5
+) -> tuple:
+    """
+    Traça o contorno do pulmão da imagem utilizando Limiarização global simples.
+    O limiar é ajustado iterativamente (método de Ridler-Calvard) a partir do
+    histograma de 256 níveis da imagem, e não dos seus pixels.
+
+    Parâmetros:
+        imagem_cinza (np.ndarray): Pixels da imagem em escala de cinza (uint8).
+        limiar (int): Valor a ser aplicado como limiar inicial na imagem
+        delta_limiar (int): Valor usado como critério de parada no ajuste do limiar
+    Retorna:
+        tuple:
+            - np.ndarray: Imagem binária invertida (pixels abaixo do limiar em 255).
+            - float: Limiar final, após a convergência.
+            - int: Quantidade de iterações do ajuste do limiar.
+    """
+    histograma = np.bincount(imagem_cinza.ravel(), minlength=256)
+    limiar_n, iteracoes = ajustar_limiar(histograma, limiar, delta_limiar)
+
     # aplicada limiar
     _, imagem_cinza_binario = cv2.threshold(
         imagem_cinza, limiar_n, 255, cv2.THRESH_BINARY
@@ -52,4 +82,39 @@ def aplicar_lim_global_simples(
     # inverte a imagem binária
     imagem_cinza_binario_invertida = (255 - imagem_cinza_binario).astype(np.uint8)
 
-    return imagem_cinza_binario_invertida
+    return imagem_cinza_binario_invertida, limiar_n, iteracoes
+
+
+def aplicar_lim_global_simples_hu(
+    imagem_hu: np.ndarray,
+    limiar=-400,
+    delta_limiar=5,
+    largura_bin=1,
+    hu_min=-1000,
+    hu_max=2000,
+) -> tuple:
+    """
+    Limiarização global simples diretamente sobre a imagem em HU: o mesmo
+    ajuste de `ajustar_limiar`, sobre o histograma de bins de `largura_bin`
+    HU (ver `quantizar_hu`) em vez dos 256 níveis de cinza (~11,8 HU cada).
+
+    Parâmetros:
+        imagem_hu (np.ndarray): Imagem em Hounsfield Units (HU).
+        limiar (float): Limiar inicial, em HU.
+        delta_limiar (float): Critério de parada no ajuste do limiar, em HU.
+        largura_bin (float): Largura de cada bin do histograma, em HU.
+        hu_min, hu_max (int): Janela em HU do histograma.
+    Retorna:
+        tuple:
+            - np.ndarray: Imagem binária invertida (pixels até o limiar em 255).
+            - float: Limiar final, em HU.
+            - int: Quantidade de iterações do ajuste do limiar.
+    """
+    indices, quantidade_bins = quantizar_hu(imagem_hu, largura_bin, hu_min, hu_max)
+    histograma = np.bincount(indices.ravel(), minlength=quantidade_bins)
+    limiar_n, iteracoes = ajustar_limiar(
+        histograma, (limiar - hu_min) / largura_bin, delta_limiar / largura_bin
+    )
+
+    mascara = np.where(indices <= limiar_n, 255, 0).astype(np.uint8)
+    return mascara, hu_min + limiar_n * largura_bin, iteracoes
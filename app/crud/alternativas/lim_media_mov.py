@@ -2,8 +2,34 @@ import cv2
 import numpy as np
 from crud.alternativas.remove_fundo import remove_fundo
 
+def media_movel(linhas: np.ndarray, n: int) -> np.ndarray:
+    """
+    Média móvel dos últimos `n` pontos ao longo de cada linha, pela diferença
+    de somas acumuladas. Nos primeiros pontos usa a média dos `x + 1` pontos
+    disponíveis, exceto no primeiro, que vale `linha[0] / n`.
+
+    args:
+        linhas: np.ndarray - Linhas (float32) em que a média é calculada.
+        n: int - Número de pontos para a média móvel.
+
+    return:
+        np.ndarray: Média móvel (float32) de cada ponto.
+    """
+    # Somas em float64: exatas para imagens de 8 bits, como as do laço original
+    acumulada = np.cumsum(linhas, axis=1, dtype=np.float64)
+    media = np.empty_like(linhas)
+
+    inicio = min(n, linhas.shape[1])
+    media[:, :inicio] = acumulada[:, :inicio] / np.arange(1, inicio + 1)
+    media[:, inicio:] = (acumulada[:, inicio:] - acumulada[:, :-inicio]) / n
+    media[:, 0] = linhas[:, 0] / n
+
+    return media
+
+
 def aplicar_limiarizacao_media_movel(imagem, n=171, b=0.8,
-                                     aplicar_interpolacao=True) -> tuple:
+                                     aplicar_interpolacao=True,
+                                     zigzag=False) -> tuple:
     """
     Recebe uma imagem em escala de cinza, aplica limiarização usando
     média móvel e remove o fundo da imagem. É um caso especial do método
@@ -15,6 +41,9 @@ def aplicar_limiarizacao_media_movel(imagem, n=171, b=0.8,
         n: int - Número de pontos para a média móvel.
         b: float - Fator de ajuste do limiar.
         aplicar_interpolacao: bool - Se True, aplica interpolação.
+        zigzag: bool - Se True, a média percorre a imagem em zigue-zague,
+                       continuando de uma linha para a seguinte; se False,
+                       cada linha é independente.
 
     return:
         tuple:
@@ -23,27 +52,18 @@ def aplicar_limiarizacao_media_movel(imagem, n=171, b=0.8,
                   e o valor é o contorno válido.
     """
 
-    altura, largura = imagem.shape
-    limiarizada = np.zeros_like(imagem, dtype=np.uint8)
-
-    for y in range(altura):
-        linha = imagem[y, :].astype(np.float32)
-        media_movel = np.zeros_like(linha)
-
-        media_movel[0] = linha[0] / n
-        soma = linha[0]
-
-        for x in range(1, largura):
-            if x < n:
-                soma += linha[x]
-                media_movel[x] = soma / (x + 1)
-            else:
-                soma += linha[x] - linha[x - n]
-                media_movel[x] = soma / n
-
-        # Aplicar o limiar adaptativo
-        limiar = b * media_movel
-        limiarizada[y, :] = np.where(linha > limiar, 255, 0)
+    if zigzag:
+        # Varredura em zigue-zague: linhas pares da esquerda para a direita e
+        # ímpares da direita para a esquerda, em uma única sequência
+        sequencia = imagem.astype(np.float32)
+        sequencia[1::2] = sequencia[1::2, ::-1]
+        limiar = b * media_movel(sequencia.reshape(1, -1), n).reshape(imagem.shape)
+        limiarizada = np.where(sequencia > limiar, 255, 0).astype(np.uint8)
+        limiarizada[1::2] = limiarizada[1::2, ::-1]
+    else:
+        linhas = imagem.astype(np.float32)
+        limiar = b * media_movel(linhas, n)
+        limiarizada = np.where(linhas > limiar, 255, 0).astype(np.uint8)
 
     if aplicar_interpolacao:
         limiarizada = cv2.resize(limiarizada, None, fx=1.2, fy=1.2,
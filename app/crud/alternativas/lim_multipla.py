@@ -44,87 +44,188 @@ def classificar_pixel(
         return 5  # u5 - áreas não classificadas
 
 
-def limiarizacao_multipla(
-    imagem_cinza: np.ndarray,
+def tabela_classes(
     lim_hiperaeradas: tuple = (0, 8),
     lim_normalmente_aeradas: tuple = (8, 42),
     lim_pouco_aeradas: tuple = (42, 76),
     lim_nao_aeradas: tuple = (76, 93),
     lim_osso: tuple = (136, 255),
-    ativacao_hiperaeradas: bool = True,
-    ativacao_normalmente_aeradas: bool = True,
-    ativacao_pouco_aeradas: bool = True,
-    ativacao_nao_aeradas: bool = False,
-    ativacao_osso: bool = False,
-    ativacao_nao_classificado: bool = False,
+    niveis: np.ndarray = None,
 ) -> np.ndarray:
     """
-    Aplica limiarização múltipla para segmentar as áreas de interesse na imagem.
-
-    Parâmetros:
-        imagem_cinza (np.ndarray): Pixels da imagem de entrada em escala de cinza.
-        lim_hiperaeradas (tuple): Intervalo para hiperaeradas (default: (0, 8)).
-        lim_normalmente_aeradas (tuple): Intervalo para normalmente aeradas (default: (8, 42)).
-        lim_pouco_aeradas (tuple): Intervalo para pouco aeradas (default: (42, 76)).
-        lim_nao_aeradas (tuple): Intervalo para não aeradas (default: (76, 93)).
-        lim_osso (tuple): Intervalo para osso (default: (136, 255)).
-        ativacao_*: Variável booleana que coloca no pixel 255 caso true e 0 caso false.
-
+    Tabela de consulta (LUT) com a classe (0 a 5) de `classificar_pixel` para
+    cada um dos 256 níveis de cinza, ou para cada valor de `niveis`.
 
     Retorna:
-        np.ndarray: Imagem com classificação dos pixels com base nos intervalos de HU.
-
+        np.ndarray: Tabela uint8 com uma entrada por nível.
     """
+    if niveis is None:
+        niveis = np.arange(256)
 
-    # Criar uma imagem para armazenar as classes
-    imagem_classes = np.zeros(imagem_cinza.shape, dtype=np.uint8)
-
-    # Percorrer todos os pixels e aplicar a classificação
-    for i in range(imagem_cinza.shape[0]):
-        for j in range(imagem_cinza.shape[1]):
-            pixel_value = int(imagem_cinza[i, j])  # Valor do pixel
-            imagem_classes[i, j] = classificar_pixel(
-                pixel_value,
+    return np.array(
+        [
+            classificar_pixel(
+                nivel,
                 lim_hiperaeradas,
                 lim_normalmente_aeradas,
                 lim_pouco_aeradas,
                 lim_nao_aeradas,
                 lim_osso,
             )
+            for nivel in niveis.tolist()
+        ],
+        dtype=np.uint8,
+    )
 
-    # Gerar a máscara binária com base nas áreas de interesse (u0 a u4)
-    mascara_pulmao = np.zeros(imagem_cinza.shape, dtype=np.uint8)
+
+def tabela_mascara(
+    lim_hiperaeradas: tuple = (0, 8),
+    lim_normalmente_aeradas: tuple = (8, 42),
+    lim_pouco_aeradas: tuple = (42, 76),
+    lim_nao_aeradas: tuple = (76, 93),
+    lim_osso: tuple = (136, 255),
+    ativacao_hiperaeradas: bool = True,
+    ativacao_normalmente_aeradas: bool = True,
+    ativacao_pouco_aeradas: bool = True,
+    ativacao_nao_aeradas: bool = False,
+    ativacao_osso: bool = False,
+    ativacao_nao_classificado: bool = False,
+    niveis: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Tabela de consulta (LUT) com o valor da máscara (0 ou 255) para cada um
+    dos 256 níveis de cinza, ou para cada valor de `niveis`: 255 nos
+    intervalos ativados.
+
+    Retorna:
+        np.ndarray: Tabela uint8 com uma entrada por nível.
+    """
+    if niveis is None:
+        niveis = np.arange(256)
+    tabela = np.zeros(len(niveis), dtype=np.uint8)
 
     # Aplicar os limiares com base nos parâmetros fornecidos
     if ativacao_hiperaeradas:
-        mascara_pulmao[
-            (imagem_cinza >= lim_hiperaeradas[0]) & (imagem_cinza < lim_hiperaeradas[1])
-        ] = 255
+        tabela[(niveis >= lim_hiperaeradas[0]) & (niveis < lim_hiperaeradas[1])] = 255
 
     if ativacao_normalmente_aeradas:
-        mascara_pulmao[
-            (imagem_cinza >= lim_normalmente_aeradas[0])
-            & (imagem_cinza < lim_normalmente_aeradas[1])
+        tabela[
+            (niveis >= lim_normalmente_aeradas[0])
+            & (niveis < lim_normalmente_aeradas[1])
         ] = 255
 
     if ativacao_pouco_aeradas:
-        mascara_pulmao[
-            (imagem_cinza >= lim_pouco_aeradas[0])
-            & (imagem_cinza < lim_pouco_aeradas[1])
-        ] = 255
+        tabela[(niveis >= lim_pouco_aeradas[0]) & (niveis < lim_pouco_aeradas[1])] = 255
 
     if ativacao_nao_aeradas:
-        mascara_pulmao[
-            (imagem_cinza >= lim_nao_aeradas[0]) & (imagem_cinza < lim_nao_aeradas[1])
-        ] = 255
+        tabela[(niveis >= lim_nao_aeradas[0]) & (niveis < lim_nao_aeradas[1])] = 255
 
     if ativacao_osso:
-        mascara_pulmao[
-            (imagem_cinza >= lim_osso[0]) & (imagem_cinza <= lim_osso[1])
-        ] = 255
+        tabela[(niveis >= lim_osso[0]) & (niveis <= lim_osso[1])] = 255
 
-    # Pixels não classificados recebem ativação personalizada
+    # Níveis não classificados recebem ativação personalizada
     if ativacao_nao_classificado:
-        mascara_pulmao[mascara_pulmao == 0] = 255
+        tabela[tabela == 0] = 255
+
+    return tabela
+
+
+def limiarizacao_multipla(
+    imagem_cinza: np.ndarray,
+    lim_hiperaeradas: tuple = (0, 8),
+    lim_normalmente_aeradas: tuple = (8, 42),
+    lim_pouco_aeradas: tuple = (42, 76),
+    lim_nao_aeradas: tuple = (76, 93),
+    lim_osso: tuple = (136, 255),
+    ativacao_hiperaeradas: bool = True,
+    ativacao_normalmente_aeradas: bool = True,
+    ativacao_pouco_aeradas: bool = True,
+    ativacao_nao_aeradas: bool = False,
+    ativacao_osso: bool = False,
+    ativacao_nao_classificado: bool = False,
+    calcular_classes: bool = True,
+) -> tuple:
+    """
+    Aplica limiarização múltipla para segmentar as áreas de interesse na imagem.
+
+    A classe e a máscara dependem apenas do nível de cinza de cada pixel, então
+    são calculadas uma vez para os 256 níveis (`tabela_classes` e
+    `tabela_mascara`) e aplicadas à imagem por indexação.
 
-    return mascara_pulmao
\ No newline at end of file
+    Parâmetros:
+        imagem_cinza (np.ndarray): Pixels da imagem de entrada em escala de
+                                   cinza (0 a 255).
+        lim_hiperaeradas (tuple): Intervalo para hiperaeradas (default: (0, 8)).
+        lim_normalmente_aeradas (tuple): Intervalo para normalmente aeradas (default: (8, 42)).
+        lim_pouco_aeradas (tuple): Intervalo para pouco aeradas (default: (42, 76)).
+        lim_nao_aeradas (tuple): Intervalo para não aeradas (default: (76, 93)).
+        lim_osso (tuple): Intervalo para osso (default: (136, 255)).
+        ativacao_*: Variável booleana que coloca no pixel 255 caso true e 0 caso false.
+        calcular_classes (bool): Se False, o mapa de classes não é calculado.
+
+    Retorna:
+        tuple:
+            - np.ndarray: Máscara com 255 nos pixels das classes ativadas.
+            - np.ndarray: Classe de cada pixel (0 a 5, ver `classificar_pixel`),
+              ou None se `calcular_classes` for False.
+    """
+    limites = (
+        lim_hiperaeradas,
+        lim_normalmente_aeradas,
+        lim_pouco_aeradas,
+        lim_nao_aeradas,
+        lim_osso,
+    )
+    ativacoes = (
+        ativacao_hiperaeradas,
+        ativacao_normalmente_aeradas,
+        ativacao_pouco_aeradas,
+        ativacao_nao_aeradas,
+        ativacao_osso,
+        ativacao_nao_classificado,
+    )
+
+    # Níveis de cinza como índices das tabelas (o int() de `classificar_pixel`)
+    niveis = np.asarray(imagem_cinza).astype(np.uint8, copy=False)
+
+    mascara_pulmao = tabela_mascara(*limites, *ativacoes)[niveis]
+    imagem_classes = tabela_classes(*limites)[niveis] if calcular_classes else None
+    return mascara_pulmao, imagem_classes
+
+
+def limiarizacao_multipla_hu(
+    imagem_hu: np.ndarray,
+    *limites_e_ativacoes,
+    largura_bin: float = 1,
+    hu_min: int = -1000,
+    hu_max: int = 2000,
+    calcular_classes: bool = True,
+) -> tuple:
+    """
+    Versão de `limiarizacao_multipla` sobre a imagem em HU, sem a passagem
+    pelos 256 níveis de cinza (~11,8 HU cada): os limites das classes são
+    dados em HU (ex.: (-1000, -900) para as hiperaeradas) e as tabelas são
+    calculadas para cada bin de `largura_bin` HU da janela [hu_min, hu_max]
+    (ver `quantizar_hu`), classificado pelo seu início.
+
+    Parâmetros:
+        imagem_hu (np.ndarray): Imagem em Hounsfield Units (HU).
+        *limites_e_ativacoes: Limites (em HU) e ativações, na mesma ordem de
+                              `limiarizacao_multipla`.
+        largura_bin (float): Largura de cada bin, em HU.
+        hu_min (int): Início da janela.
+        hu_max (int): Fim da janela.
+        calcular_classes (bool): Se False, o mapa de classes não é calculado.
+
+    Retorna:
+        tuple: Máscara e mapa de classes, como em `limiarizacao_multipla`.
+    """
+    limites, ativacoes = limites_e_ativacoes[:5], limites_e_ativacoes[5:]
+    indices, quantidade_bins = hu.quantizar_hu(imagem_hu, largura_bin, hu_min, hu_max)
+    niveis = hu_min + np.arange(quantidade_bins) * largura_bin
+
+    mascara_pulmao = tabela_mascara(*limites, *ativacoes, niveis=niveis)[indices]
+    imagem_classes = (
+        tabela_classes(*limites, niveis=niveis)[indices] if calcular_classes else None
+    )
+    return mascara_pulmao, imagem_classes
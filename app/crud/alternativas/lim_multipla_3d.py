@@ -0,0 +1,22 @@
+import numpy as np
+
+from crud.alternativas.lim_multipla import tabela_mascara
+
+
+def limiarizacao_multipla_3d(
+    volume_cinza: np.ndarray, *limites_e_ativacoes
+) -> np.ndarray:
+    """
+    Versão volumétrica de `limiarizacao_multipla`. A máscara depende apenas do
+    nível de cinza de cada voxel, então a tabela de `tabela_mascara` é
+    aplicada ao volume inteiro por indexação.
+
+    Parâmetros:
+        volume_cinza (np.ndarray): Volume (z, y, x) em escala de cinza (uint8).
+        *limites_e_ativacoes: Limites e ativações, na mesma ordem de
+                              `limiarizacao_multipla`.
+
+    Retorna:
+        np.ndarray: Máscara (z, y, x) com 255 nas classes ativadas.
+    """
+    return tabela_mascara(*limites_e_ativacoes)[volume_cinza]
@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
 from crud.alternativas.remove_fundo import remove_fundo
+from crud.alternativas.hu_para_cinza import quantizar_hu
+from crud.alternativas.particiona_otsu import limiares_otsu
 
 
 def aplicar_otsu(imagem: np.ndarray) -> tuple:
@@ -27,4 +29,31 @@ def aplicar_otsu(imagem: np.ndarray) -> tuple:
         imagem, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
     )
 
-    return mascara_pulmao
\ No newline at end of file
+    return mascara_pulmao
+
+
+def aplicar_otsu_hu(
+    imagem_hu: np.ndarray, largura_bin=1, hu_min=-1000, hu_max=2000
+) -> tuple:
+    """
+    Otsu diretamente sobre a imagem em HU: o limiar é escolhido no histograma
+    de bins de `largura_bin` HU (ver `quantizar_hu`) em vez dos 256 níveis de
+    cinza (~11,8 HU cada).
+
+    Parâmetros:
+        imagem_hu (np.ndarray): Imagem em Hounsfield Units (HU).
+        largura_bin (float): Largura de cada bin do histograma, em HU.
+        hu_min, hu_max (int): Janela em HU do histograma.
+
+    Retorna:
+        tuple:
+            - np.ndarray: Máscara com 255 nos pixels até o limiar (como em
+                          `aplicar_otsu`).
+            - float: Limiar, em HU (início do último bin da máscara).
+    """
+    indices, quantidade_bins = quantizar_hu(imagem_hu, largura_bin, hu_min, hu_max)
+    histograma = np.bincount(indices.ravel(), minlength=quantidade_bins)
+    limiar = int(limiares_otsu(histograma[np.newaxis])[0])
+
+    mascara_pulmao = np.where(indices <= limiar, 255, 0).astype(np.uint8)
+    return mascara_pulmao, float(hu_min + limiar * largura_bin)
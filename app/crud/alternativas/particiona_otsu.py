@@ -1,50 +1,182 @@
+from functools import lru_cache
+
 import cv2
 import numpy as np
-from otsu import aplicar_otsu
+
+
+def limites_blocos(forma: tuple, grid_size: tuple, overlap: int) -> tuple:
+    """
+    Limites dos blocos de uma grade de mesmo tamanho (a menos de um pixel),
+    cada um estendido por `overlap` pixels em todas as direções.
+
+    Parâmetros:
+        forma (tuple): Dimensões (altura, largura) da imagem.
+        grid_size (tuple): Quantidade de blocos (linhas, colunas).
+        overlap (int): Sobreposição entre blocos vizinhos, em pixels.
+
+    Retorna:
+        tuple: Início e fim das linhas de blocos (y) e das colunas (x).
+    """
+    altura, largura = forma
+    bordas_y = np.linspace(0, altura, grid_size[0] + 1).round().astype(int)
+    bordas_x = np.linspace(0, largura, grid_size[1] + 1).round().astype(int)
+    y_inicio = np.maximum(0, bordas_y[:-1] - overlap)
+    y_fim = np.minimum(altura, bordas_y[1:] + overlap)
+    x_inicio = np.maximum(0, bordas_x[:-1] - overlap)
+    x_fim = np.minimum(largura, bordas_x[1:] + overlap)
+    return y_inicio, y_fim, x_inicio, x_fim
+
 
 def dividir_imagem(imagem: np.ndarray, grid_size: tuple, overlap: int) -> list:
-    #PDivide a imagem em subimagens
-    altura, largura = imagem.shape
-    sub_imagens = []
+    """
+    Divide a imagem nos blocos de `limites_blocos`.
 
-    # Calcula o tamanho de cada sub-região
-    passo_y = (altura + overlap * (grid_size[0] - 1)) // grid_size[0]
-    passo_x = (largura + overlap * (grid_size[1] - 1)) // grid_size[1]
+    Parâmetros:
+        imagem (np.ndarray): Imagem em escala de cinza.
+        grid_size (tuple): Quantidade de blocos (linhas, colunas).
+        overlap (int): Sobreposição entre blocos vizinhos, em pixels.
+
+    Retorna:
+        list: Limites (y_inicio, y_fim, x_inicio, x_fim) e sub-imagem de cada
+              bloco, linha a linha.
+    """
+    y_inicio, y_fim, x_inicio, x_fim = limites_blocos(imagem.shape, grid_size, overlap)
+    sub_imagens = []
 
     for i in range(grid_size[0]):
         for j in range(grid_size[1]):
-            # Define os limites da sub-região
-            y_inicio = max(0, i * passo_y - overlap)
-            y_fim = min(altura, (i + 1) * passo_y + overlap)
-            x_inicio = max(0, j * passo_x - overlap)
-            x_fim = min(largura, (j + 1) * passo_x + overlap)
-
-            # Extrai a sub-região
-            sub_imagem = imagem[y_inicio:y_fim, x_inicio:x_fim]
-            sub_imagens.append(((y_inicio, y_fim, x_inicio, x_fim), sub_imagem))
+            limites = (y_inicio[i], y_fim[i], x_inicio[j], x_fim[j])
+            sub_imagem = imagem[y_inicio[i] : y_fim[i], x_inicio[j] : x_fim[j]]
+            sub_imagens.append((limites, sub_imagem))
 
     return sub_imagens
 
-def combinar_sub_imagens(imagem: np.ndarray, sub_imagens: list) -> np.ndarray:
-    #Usa as subimagens para montar uma imagem só de saída
-    imagem_final = np.zeros_like(imagem)
 
-    for (y_inicio, y_fim, x_inicio, x_fim), sub_imagem in sub_imagens:
-        imagem_final[y_inicio:y_fim, x_inicio:x_fim] = sub_imagem
+@lru_cache(maxsize=8)
+def celulas_blocos(forma: tuple, grid_size: tuple, overlap: int) -> tuple:
+    """
+    Corta a imagem em todos os inícios e fins dos blocos de `limites_blocos`:
+    as células resultantes não se sobrepõem, e cada bloco é um retângulo de
+    células. Depende só das dimensões da imagem, então é calculado uma vez
+    por forma de imagem.
+
+    Parâmetros:
+        forma (tuple): Dimensões (altura, largura) da imagem.
+        grid_size (tuple): Quantidade de blocos (linhas, colunas).
+        overlap (int): Sobreposição entre blocos vizinhos, em pixels.
+
+    Retorna:
+        tuple: Deslocamento (célula * 256) de cada pixel, dimensões da grade
+               de células e, para cada bloco, o intervalo de células que ele
+               cobre em y (início, fim) e em x (início, fim).
+    """
+    y_inicio, y_fim, x_inicio, x_fim = limites_blocos(forma, grid_size, overlap)
+    cortes_y = np.union1d(y_inicio, y_fim)
+    cortes_x = np.union1d(x_inicio, x_fim)
+    celulas = (len(cortes_y) - 1, len(cortes_x) - 1)
+
+    # Célula de cada linha e de cada coluna da imagem
+    celula_y = np.searchsorted(cortes_y, np.arange(forma[0]), side="right") - 1
+    celula_x = np.searchsorted(cortes_x, np.arange(forma[1]), side="right") - 1
+    deslocamentos = (celula_y[:, None] * celulas[1] + celula_x) * 256
+    deslocamentos.flags.writeable = False
+
+    intervalos = (
+        np.searchsorted(cortes_y, y_inicio)[:, None],
+        np.searchsorted(cortes_y, y_fim)[:, None],
+        np.searchsorted(cortes_x, x_inicio)[None, :],
+        np.searchsorted(cortes_x, x_fim)[None, :],
+    )
+    return deslocamentos, celulas, intervalos
 
-    return imagem_final
 
-def segmentar_imagem(imagem: np.ndarray, grid_size: tuple = (2, 3), overlap: int = 20) -> np.ndarray:
-    # Chama a função de divisão
-    sub_imagens = dividir_imagem(imagem, grid_size, overlap)
+def histogramas_blocos(
+    imagem: np.ndarray, grid_size: tuple, overlap: int
+) -> np.ndarray:
+    """
+    Histogramas de todos os blocos de `limites_blocos` em uma única passada
+    pela imagem: um `np.bincount(celula * 256 + pixel)` conta as células de
+    `celulas_blocos`, e o histograma de cada bloco é a soma das células que
+    ele cobre, obtida da soma acumulada 2D das células. Os pixels das
+    sobreposições são lidos uma única vez.
+
+    Parâmetros:
+        imagem (np.ndarray): Imagem em escala de cinza (uint8).
+        grid_size (tuple): Quantidade de blocos (linhas, colunas).
+        overlap (int): Sobreposição entre blocos vizinhos, em pixels.
+
+    Retorna:
+        np.ndarray: Histogramas (linhas * colunas, 256), linha a linha, na
+                    ordem de `dividir_imagem`.
+    """
+    deslocamentos, celulas, (a, b, c, d) = celulas_blocos(
+        imagem.shape, tuple(grid_size), overlap
+    )
+    contagens = np.bincount(
+        (deslocamentos + imagem).ravel(), minlength=celulas[0] * celulas[1] * 256
+    ).reshape(*celulas, 256)
+
+    # Soma acumulada com uma linha e uma coluna de zeros no início
+    acumulada = np.zeros((celulas[0] + 1, celulas[1] + 1, 256), dtype=np.int64)
+    acumulada[1:, 1:] = contagens.cumsum(axis=0).cumsum(axis=1)
+    histogramas = acumulada[b, d] - acumulada[a, d] - acumulada[b, c] + acumulada[a, c]
+
+    return histogramas.reshape(-1, 256)
+
+
+def limiares_otsu(histogramas: np.ndarray) -> np.ndarray:
+    """
+    Limiar de Otsu de vários histogramas de uma vez: para cada um, o nível t
+    que maximiza a variância entre as classes (níveis <= t e > t).
+
+    Parâmetros:
+        histogramas (np.ndarray): Histogramas (k, 256), um por linha.
+
+    Retorna:
+        np.ndarray: Limiar de cada histograma.
+    """
+    probabilidades = histogramas / histogramas.sum(axis=1, keepdims=True)
+    omega = np.cumsum(probabilidades, axis=1)
+    mu = np.cumsum(probabilidades * np.arange(histogramas.shape[1]), axis=1)
+    mu_total = mu[:, -1:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variancia_entre = (mu_total * omega - mu) ** 2 / (omega * (1 - omega))
+
+    # Níveis sem pixels de um dos lados (0/0) não separam classes
+    return np.argmax(np.nan_to_num(variancia_entre, nan=-1.0), axis=1)
+
+
+def segmentar_imagem(
+    imagem: np.ndarray, grid_size: tuple = (2, 3), overlap: int = 20
+) -> np.ndarray:
+    """
+    Otsu adaptativo por blocos: calcula um limiar de Otsu para cada bloco da
+    grade, a partir do histograma do bloco (com a sobreposição), e interpola
+    os limiares bilinearmente entre os centros dos blocos, como no CLAHE.
+    Cada pixel é comparado ao limiar interpolado na sua posição, então não há
+    emendas entre os blocos.
+
+    Parâmetros:
+        imagem (np.ndarray): Pixels da imagem em escala de cinza (uint8).
+        grid_size (tuple): Quantidade de blocos (linhas, colunas).
+        overlap (int): Pixels de cada bloco vizinho incluídos no histograma.
+
+    Retorna:
+        np.ndarray: Máscara com 255 nos pixels abaixo do limiar local (como
+                    em `aplicar_otsu`).
+    """
+    altura, largura = imagem.shape
+    grid_size = (min(grid_size[0], altura), min(grid_size[1], largura))
 
-    # Processa cada sub-região com o método de Otsu
-    sub_imagens_processadas = []
-    for limites, sub_imagem in sub_imagens:
-        sub_imagem_processada = aplicar_otsu(sub_imagem)
-        sub_imagens_processadas.append((limites, sub_imagem_processada))
+    # Histogramas de todos os blocos e limiares calculados juntos
+    histogramas = histogramas_blocos(imagem, grid_size, overlap)
+    limiares = limiares_otsu(histogramas).reshape(grid_size).astype(np.float32)
 
-    # Combina as sub-regiões processadas
-    imagem_segmentada = combinar_sub_imagens(imagem, sub_imagens_processadas)
+    # O redimensionamento bilinear leva cada limiar ao centro do seu bloco e
+    # interpola entre os centros (replicando a borda fora deles)
+    limiar_local = cv2.resize(
+        limiares, (largura, altura), interpolation=cv2.INTER_LINEAR
+    )
 
-    return imagem_segmentada
\ No newline at end of file
+    return np.where(imagem > limiar_local, 0, 255).astype(np.uint8)
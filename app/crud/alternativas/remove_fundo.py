@@ -3,7 +3,10 @@ import numpy as np
 
 
 def remove_fundo(
-    mascara: np.ndarray, area_minima: int = 3000, area_maxima: int = 50000
+    mascara: np.ndarray,
+    area_minima: int = 3000,
+    area_maxima: int = 50000,
+    incluir_todos: bool = True,
 ) -> tuple:
     """
     Mantém apenas contornos cujas áreas estão dentro do intervalo especificado e que não tocam a borda da imagem.
@@ -13,6 +16,7 @@ def remove_fundo(
         mascara (np.ndarray): Máscara binária com os contornos.
         area_minima (int): Área mínima permitida para os contornos (default: 3000).
         area_maxima (int): Área máxima permitida para os contornos (default: 50000).
+        incluir_todos (bool): Se False, não monta o dicionário com todos os contornos.
 
     Retorna:
         tuple:
@@ -61,10 +65,14 @@ def remove_fundo(
             # Salva o contorno no dicionário
             contornos_validos_dict[f"contorno_{i}"] = contorno.squeeze().tolist()
 
-    todos_contornos_dict = {
-        f"contorno_{i}": contorno.squeeze().tolist()
-        for i, contorno in enumerate(contornos)
-    }
+    todos_contornos_dict = (
+        {
+            f"contorno_{i}": contorno.squeeze().tolist()
+            for i, contorno in enumerate(contornos)
+        }
+        if incluir_todos
+        else {}
+    )
     return (
         todos_contornos_dict,
         contornos_validos_dict,
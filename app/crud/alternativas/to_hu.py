@@ -1,6 +1,13 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numba
 import numpy as np
 import pydicom
 
+from crud.alternativas.hu_para_cinza import converter_hu_para_cinza
+
+
 def converte_para_hu(pixel_array: np.ndarray, ds: pydicom.dataset.FileDataset) -> np.ndarray:
     """
     Converte uma matriz de imagem DICOM para Hounsfield Units (HU).
@@ -18,3 +25,107 @@ def converte_para_hu(pixel_array: np.ndarray, ds: pydicom.dataset.FileDataset) -
 
     hu_image = pixel_array * rescale_slope + rescale_intercept
     return hu_image
+
+
+def intervalo_armazenado(tipo: np.dtype, bits: int) -> Tuple[int, int]:
+    """Menor e maior valor de `bits` bits armazenados em um inteiro `tipo`."""
+    if tipo.kind == "i":
+        return -(2 ** (bits - 1)), 2 ** (bits - 1) - 1
+    return 0, 2**bits - 1
+
+
+@numba.njit(nogil=True)
+def aplicar_tabelas(
+    indices: np.ndarray, tabela_hu: np.ndarray, tabela_cinza: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Consulta às duas tabelas em uma única passagem pelos pixels."""
+    imagem_hu = np.empty(indices.size, dtype=tabela_hu.dtype)
+    imagem_cinza = np.empty(indices.size, dtype=tabela_cinza.dtype)
+    for i in range(indices.size):
+        valor = indices[i]
+        imagem_hu[i] = tabela_hu[valor]
+        imagem_cinza[i] = tabela_cinza[valor]
+    return imagem_hu, imagem_cinza
+
+
+@lru_cache(maxsize=16)
+def tabelas_conversao(
+    tipo: str, bits: int, slope: float, intercept: float, hu_min: int, hu_max: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tabelas de conversão dos valores de um inteiro `tipo` (8 ou 16 bits) para
+    HU e para níveis de cinza, indexadas pelos bits do valor (ex.: int16 lido
+    como uint16).
+
+    A tabela em HU é int16 quando todos os valores de `bits` bits armazenados
+    (ver `intervalo_armazenado`) convertem para inteiros nesse intervalo (ex.:
+    12 bits, slope 1 e intercept -1024), e float64, como em
+    `converte_para_hu`, caso contrário.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] - Tabelas em HU e em níveis de cinza.
+    """
+    dtype = np.dtype(tipo)
+    valores = np.arange(2 ** (8 * dtype.itemsize)).astype(f"u{dtype.itemsize}")
+    valores = valores.view(dtype)
+    tabela_hu = valores * slope + intercept
+    tabela_cinza = converter_hu_para_cinza(tabela_hu, hu_min, hu_max)
+
+    menor, maior = intervalo_armazenado(dtype, bits)
+    validos = tabela_hu[(valores >= menor) & (valores <= maior)]
+    info = np.iinfo(np.int16)
+    if (
+        np.array_equal(validos, np.rint(validos))
+        and validos.min() >= info.min
+        and validos.max() <= info.max
+    ):
+        # Valores fora dos bits armazenados não ocorrem na imagem
+        tabela_hu = np.clip(tabela_hu, info.min, info.max).astype(np.int16)
+    return tabela_hu, tabela_cinza
+
+
+def converte_para_hu_e_cinza(
+    pixel_array: np.ndarray,
+    ds: pydicom.dataset.FileDataset,
+    hu_min: int = -1000,
+    hu_max: int = 2000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    `converte_para_hu` e `converter_hu_para_cinza` em uma única passagem: em
+    pixels inteiros de até 16 bits, as duas imagens saem de uma consulta às
+    tabelas de `tabelas_conversao` (calculadas uma vez por tipo, BitsStored,
+    slope e intercept), sem imagens intermediárias em float.
+
+    Args:
+        pixel_array: np.ndarray - Matriz da imagem já extraída do DICOM.
+        ds: pydicom.dataset.FileDataset - Objeto DICOM contendo os metadados.
+        hu_min: int - HU mapeado para o nível 0.
+        hu_max: int - HU mapeado para o nível 255.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] - Imagem em HU (int16 quando exata) e
+                                        imagem em níveis de cinza (uint8).
+    """
+    tipo = pixel_array.dtype
+    if tipo.kind not in "iu" or tipo.itemsize > 2 or not tipo.isnative:
+        imagem_hu = converte_para_hu(pixel_array, ds)
+        return imagem_hu, converter_hu_para_cinza(imagem_hu, hu_min, hu_max)
+
+    bits = min(int(getattr(ds, "BitsStored", 0) or 0), 8 * tipo.itemsize)
+    menor, maior = intervalo_armazenado(tipo, bits)
+    if bits <= 0 or pixel_array.min() < menor or pixel_array.max() > maior:
+        # Bits além de BitsStored preenchidos: tabela de todo o tipo
+        bits = 8 * tipo.itemsize
+
+    tabela_hu, tabela_cinza = tabelas_conversao(
+        tipo.str,
+        bits,
+        float(getattr(ds, "RescaleSlope", 1)),
+        float(getattr(ds, "RescaleIntercept", 0)),
+        hu_min,
+        hu_max,
+    )
+    indices = pixel_array.view(f"u{tipo.itemsize}").ravel()
+    imagem_hu, imagem_cinza = aplicar_tabelas(indices, tabela_hu, tabela_cinza)
+    forma = pixel_array.shape
+    return imagem_hu.reshape(forma), imagem_cinza.reshape(forma)
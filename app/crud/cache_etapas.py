@@ -0,0 +1,140 @@
+import sys
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+from utils.globals import PIPELINE_CACHE_MB
+
+
+def tamanho_estimado(valor: Any) -> int:
+    """
+    Estimativa dos bytes ocupados por um valor guardado no cache: arrays,
+    bytes, tuplas e objetos cujos atributos são arrays (ex.: ContextoImagem).
+
+    args:
+        valor: Any - Valor a ser medido.
+    return:
+        int - Quantidade aproximada de bytes.
+    """
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if isinstance(valor, (tuple, list)):
+        return sum(tamanho_estimado(item) for item in valor)
+    if hasattr(valor, "__dict__"):
+        return sum(tamanho_estimado(item) for item in vars(valor).values())
+    return sys.getsizeof(valor)
+
+
+def somente_leitura(valor: Any) -> Any:
+    """
+    Marca como somente leitura os arrays de um valor guardado no cache (o
+    próprio valor ou os itens de uma tupla/lista), para que uma escrita
+    acidental de um método lance erro em vez de alterar o resultado das
+    próximas requisições.
+
+    args:
+        valor: Any - Valor a ser guardado.
+    return:
+        Any - O mesmo valor.
+    """
+    if isinstance(valor, np.ndarray):
+        valor.setflags(write=False)
+    elif isinstance(valor, (tuple, list)):
+        for item in valor:
+            somente_leitura(item)
+    return valor
+
+
+class CacheEtapas:
+    """
+    Memoização das etapas do pipeline de pré-processamento (leitura do DICOM,
+    conversão para HU, níveis de cinza, filtros, ...) em um único LRU
+    limitado em bytes: todas as etapas disputam o mesmo orçamento e as
+    entradas usadas há mais tempo são descartadas primeiro, qualquer que seja
+    a etapa. Cada processo do pool tem a sua instância.
+
+    Os valores guardados são compartilhados entre requisições e não devem ser
+    modificados por quem os recebe; os arrays são marcados como somente
+    leitura (ver `somente_leitura`).
+
+    args:
+        max_bytes: int - Memória máxima ocupada pelas entradas.
+    """
+
+    def __init__(self, max_bytes: int = int(PIPELINE_CACHE_MB * 2**20)):
+        self.max_bytes = max_bytes
+        self._entradas: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.acertos: Counter = Counter()
+        self.falhas: Counter = Counter()
+        self.descartes = 0
+
+    def obter_ou_calcular(
+        self, etapa: str, chave: Tuple[Hashable, ...], calcular: Callable[[], Any]
+    ) -> Any:
+        """
+        Retorna o valor da `etapa` para a `chave`, calculando-o com
+        `calcular()` e guardando-o caso ainda não esteja no cache.
+
+        args:
+            etapa: str - Nome da etapa do pipeline.
+            chave: Tuple - Entradas que determinam o resultado da etapa.
+            calcular: Callable - Calcula o valor em caso de falha.
+        return:
+            Any - Valor da etapa.
+        """
+        chave = (etapa, *chave)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.acertos[etapa] += 1
+                return entrada[0]
+            self.falhas[etapa] += 1
+
+        valor = somente_leitura(calcular())
+        tamanho = tamanho_estimado(valor)
+        with self._lock:
+            self._guardar(chave, valor, tamanho)
+        return valor
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "acertos": dict(self.acertos),
+                "falhas": dict(self.falhas),
+                "descartes": self.descartes,
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def _guardar(self, chave: Tuple, valor: Any, tamanho: int) -> None:
+        # Valores maiores que o próprio orçamento não são guardados
+        if tamanho > self.max_bytes:
+            return
+
+        anterior = self._entradas.pop(chave, None)
+        if anterior is not None:
+            self._bytes -= anterior[1]
+
+        self._entradas[chave] = (valor, tamanho)
+        self._bytes += tamanho
+        while self._bytes > self.max_bytes:
+            _, (_, descartado) = self._entradas.popitem(last=False)
+            self._bytes -= descartado
+            self.descartes += 1
+
+
+cache_etapas = CacheEtapas()
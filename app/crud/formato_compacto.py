@@ -0,0 +1,97 @@
+import base64
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from crud.processamento import processar_segmentacao
+
+# Tipo de mídia do formato compacto, negociado pelo cabeçalho Accept
+MIDIA_COMPACTA = "application/vnd.segmentacao.compacta"
+
+# Assinatura no início da resposta
+ASSINATURA = b"SEG1"
+
+GRUPOS_CONTORNOS = ("contornos_validos", "todos_os_contornos")
+
+
+def codificar_contornos(contornos: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    Contornos de um grupo em um único buffer: os deslocamentos (uint32, em
+    pontos) do início de cada contorno, seguidos de um fim, e todos os pontos
+    (x, y) concatenados, em int16 quando as coordenadas são inteiras (pixels)
+    e em float32 caso contrário (ex.: pontos interpolados do MCACrisp).
+
+    args:
+        contornos: Dict[str, Any] - Contornos ({"contorno_0": [[x, y], ...]}).
+    return:
+        Tuple[bytes, str] - Deslocamentos (k + 1) e pontos (n, 2), em
+                            little-endian, e o tipo dos pontos.
+    """
+    # Um contorno de um único ponto vem de `squeeze` como [x, y]
+    pontos = [np.asarray(c).reshape(-1, 2) for c in contornos.values()]
+    deslocamentos = np.zeros(len(pontos) + 1, dtype="<u4")
+    deslocamentos[1:] = np.cumsum([len(p) for p in pontos])
+
+    todos = np.concatenate(pontos) if pontos else np.empty((0, 2), dtype=np.int16)
+    tipo = "int16" if np.array_equal(todos, np.rint(todos)) else "float32"
+    dtype = "<i2" if tipo == "int16" else "<f4"
+    return deslocamentos.tobytes() + todos.astype(dtype).tobytes(), tipo
+
+
+def codificar_compacto(resultado: Dict[str, Any]) -> bytes:
+    """
+    Serializa o resultado de `processar_segmentacao` no formato compacto:
+
+        "SEG1" | uint32 tamanho do cabeçalho | cabeçalho JSON |
+        contornos_validos | todos_os_contornos | PNG da imagem |
+        PNG do mapa de classes
+
+    O cabeçalho (completado com espaços até um múltiplo de 4 bytes, para que
+    os buffers possam ser lidos como arrays tipados) traz, para cada grupo de
+    contornos presente, as chaves na ordem do buffer e o tipo dos pontos,
+    além do tamanho do PNG (0 sem a imagem) e do "diagnostico" e do tamanho
+    do PNG do "mapa_classes", quando houver. Os contornos seguem
+    `codificar_contornos` e as imagens vão em binário, sem base64.
+
+    args:
+        resultado: Dict[str, Any] - Resultado de `processar_segmentacao`.
+    return:
+        bytes - Resultado no formato compacto.
+    """
+    imagem = resultado.get("imagem_pre_processada")
+    png = base64.b64decode(imagem) if imagem else b""
+
+    # Grupos fora de "include" não aparecem no cabeçalho nem no corpo
+    cabecalho = {}
+    buffers = []
+    for grupo in GRUPOS_CONTORNOS:
+        if grupo not in resultado:
+            continue
+        buffer, tipo = codificar_contornos(resultado[grupo])
+        cabecalho[grupo] = {"chaves": list(resultado[grupo]), "tipo": tipo}
+        buffers.append(buffer)
+    cabecalho["imagem_png_bytes"] = len(png)
+    if "diagnostico" in resultado:
+        cabecalho["diagnostico"] = resultado["diagnostico"]
+    mapa = b""
+    if "mapa_classes" in resultado:
+        mapa = base64.b64decode(resultado["mapa_classes"])
+        cabecalho["mapa_classes_png_bytes"] = len(mapa)
+
+    json_cabecalho = json.dumps(cabecalho, separators=(",", ":")).encode()
+    json_cabecalho += b" " * (-(len(ASSINATURA) + 4 + len(json_cabecalho)) % 4)
+
+    partes = [ASSINATURA, struct.pack("<I", len(json_cabecalho)), json_cabecalho]
+    return b"".join(partes + buffers + [png, mapa])
+
+
+def processar_segmentacao_compacta(
+    dicom_data: bytes, method: str, params_dict: Dict[str, Any]
+) -> bytes:
+    """
+    `processar_segmentacao` já serializado no formato compacto, no próprio
+    processo do pool: a API recebe e repassa apenas os bytes.
+    """
+    return codificar_compacto(processar_segmentacao(dicom_data, method, params_dict))
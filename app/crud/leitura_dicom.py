@@ -0,0 +1,147 @@
+import functools
+import mmap
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pydicom
+from pydicom.filebase import DicomBytesIO
+from pydicom.uid import ExplicitVRLittleEndian, ImplicitVRLittleEndian
+
+# Atributos usados pelo pipeline: formato dos pixels, conversão para HU e
+# posição da fatia (métodos volumétricos). Os demais não são lidos.
+TAGS_NECESSARIAS = (
+    "Rows",
+    "Columns",
+    "BitsAllocated",
+    "BitsStored",
+    "PixelRepresentation",
+    "SamplesPerPixel",
+    "PhotometricInterpretation",
+    "RescaleSlope",
+    "RescaleIntercept",
+    "Modality",
+    "ImagePositionPatient",
+    "InstanceNumber",
+    "PixelSpacing",
+    "SliceThickness",
+)
+
+# Tag do elemento PixelData (7FE0,0010), em little-endian
+TAG_PIXEL_DATA = b"\xe0\x7f\x10\x00"
+
+# Representações de valor com 2 bytes reservados e comprimento de 4 bytes
+VRS_COMPRIMENTO_LONGO = {b"OB", b"OD", b"OF", b"OL", b"OV", b"OW", b"UN"}
+
+
+def localizar_pixels(dados, inicio: int, explicito: bool) -> Optional[Tuple[int, int]]:
+    """
+    Deslocamento e tamanho, em bytes, do valor do PixelData cujo elemento
+    começa em `inicio`, ou None se não houver pixels nativos ali (ex.: dados
+    encapsulados, de comprimento indefinido).
+    """
+    if bytes(dados[inicio : inicio + 4]) != TAG_PIXEL_DATA:
+        return None
+
+    if explicito:
+        if bytes(dados[inicio + 4 : inicio + 6]) not in VRS_COMPRIMENTO_LONGO:
+            return None
+        inicio_valor = inicio + 12
+    else:
+        inicio_valor = inicio + 8
+    (comprimento,) = struct.unpack("<I", dados[inicio_valor - 4 : inicio_valor])
+    if comprimento == 0xFFFFFFFF:
+        return None
+    return inicio_valor, comprimento
+
+
+def ler_cabecalho(dados) -> Tuple[pydicom.Dataset, Optional[Tuple[int, int]]]:
+    """
+    Lê apenas os atributos de `TAGS_NECESSARIAS`, parando antes dos pixels.
+
+    args:
+        dados: Conteúdo do arquivo DICOM (bytes ou mmap).
+    return:
+        Tuple - Atributos lidos e o deslocamento e tamanho do valor do
+                PixelData em `dados` (None se os pixels não forem nativos).
+    """
+    fp = dados if isinstance(dados, mmap.mmap) else DicomBytesIO(dados)
+    fp.seek(0)
+    ds = pydicom.dcmread(fp, stop_before_pixels=True, specific_tags=TAGS_NECESSARIAS)
+
+    sintaxe = ds.file_meta.get("TransferSyntaxUID")
+    if sintaxe not in (ExplicitVRLittleEndian, ImplicitVRLittleEndian):
+        return ds, None
+    return ds, localizar_pixels(dados, fp.tell(), sintaxe == ExplicitVRLittleEndian)
+
+
+def ler_dicom(dados) -> Tuple[pydicom.Dataset, np.ndarray]:
+    """
+    Lê apenas os atributos de `TAGS_NECESSARIAS` e os pixels de um DICOM.
+
+    Em DICOMs não comprimidos (little-endian, um canal, sem bits com sinal
+    além de BitsStored) os pixels são uma visão somente leitura sobre os
+    próprios `dados`, sem cópia nem decodificação. Nos demais casos o arquivo
+    é lido por inteiro e decodificado pelo pydicom.
+
+    args:
+        dados: Conteúdo do arquivo DICOM (bytes ou mmap).
+    return:
+        Tuple[pydicom.Dataset, np.ndarray] - Atributos lidos e pixels
+                                             (linhas, colunas).
+    """
+    ds, pixels = ler_cabecalho(dados)
+    quantidade = ds.get("Rows", 0) * ds.get("Columns", 0)
+    nativo = (
+        pixels is not None
+        and ds.get("SamplesPerPixel", 1) == 1
+        and ds.get("BitsAllocated") in (8, 16, 32)
+        and pixels[1] >= quantidade * ds.BitsAllocated // 8
+        # Com sinal e bits não usados, o pydicom estende o sinal dos pixels
+        and not (ds.get("PixelRepresentation") and ds.BitsStored != ds.BitsAllocated)
+    )
+
+    if nativo:
+        tipo = f"<{'i' if ds.PixelRepresentation else 'u'}{ds.BitsAllocated // 8}"
+        visao = np.frombuffer(dados, dtype=tipo, count=quantidade, offset=pixels[0])
+        return ds, visao.reshape(ds.Rows, ds.Columns)
+
+    fp = dados if isinstance(dados, mmap.mmap) else DicomBytesIO(dados)
+    fp.seek(0)
+    completo = pydicom.dcmread(fp)
+    return completo, completo.pixel_array
+
+
+@contextmanager
+def mapear_arquivo(caminho: Union[str, Path]) -> Iterator[mmap.mmap]:
+    """Mapeia um arquivo em memória, somente leitura."""
+    with open(caminho, "rb") as arquivo:
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapa
+        finally:
+            try:
+                mapa.close()
+            except BufferError:
+                # Ainda há visões sobre o mapa (ex.: em um traceback): ele é
+                # liberado junto com elas
+                pass
+
+
+def aceita_arquivo(funcao):
+    """
+    Permite chamar `funcao(dicom_data, ...)` com o caminho de um arquivo em
+    vez do conteúdo: o arquivo é mapeado em memória durante a chamada, e o
+    conteúdo não é copiado entre os processos.
+    """
+
+    @functools.wraps(funcao)
+    def envolvida(dicom_data, *args, **kwargs):
+        if not isinstance(dicom_data, (str, Path)):
+            return funcao(dicom_data, *args, **kwargs)
+        with mapear_arquivo(dicom_data) as dados:
+            return funcao(dados, *args, **kwargs)
+
+    return envolvida
@@ -0,0 +1,833 @@
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Union
+
+import cv2
+import numpy as np
+
+# Classe do método de segmentação principal
+from crud.segmentation import MCACrisp, MCACrispPiramide, threading_layer_seguro
+from crud.segmentacao.contexto import ContextoImagem
+from crud.cache_etapas import cache_etapas
+from crud.leitura_dicom import aceita_arquivo, ler_dicom
+
+from crud.alternativas.imagem_para_base64 import imagem_para_base64
+from crud.alternativas.to_hu import converte_para_hu_e_cinza
+from crud.alternativas.converte_str_json import (
+    converte_param_preprocess,
+    converter_parametros_para_tipos,
+)
+from crud.alternativas.remove_fundo import remove_fundo
+
+from crud.alternativas.watershed import aplicar_watershed
+from crud.alternativas.lim_media_mov import aplicar_limiarizacao_media_movel
+from crud.alternativas.lim_multipla import (
+    limiarizacao_multipla,
+    limiarizacao_multipla_hu,
+)
+from crud.alternativas.lim_prop_locais import aplicar_limiarizacao_propriedades
+from crud.alternativas.sauvola import aplicar_sauvola
+from crud.alternativas.div_e_fus_regioes import aplicar_divisao_e_fusao
+from crud.alternativas.otsu import aplicar_otsu, aplicar_otsu_hu
+from crud.alternativas.particiona_otsu import (
+    segmentar_imagem as aplicar_otsu_por_blocos,
+)
+from crud.alternativas.aplicar_filtros import aplicar_filtros
+from crud.alternativas.crescimento_regioes_fora import (
+    crescimento_regioes_fora,
+    crescimento_regioes_fora_hu,
+)
+from crud.alternativas.lim_global_simples import (
+    aplicar_lim_global_simples,
+    aplicar_lim_global_simples_hu,
+)
+
+
+# Região (y_min, y_max, x_min, x_max) onde é buscado o centro inicial de cada
+# pulmão no método principal
+REGIOES_PULMOES = {
+    "contorno_0": (180, 360, 256, 512),  # pulmão esquerdo
+    "contorno_1": (180, 360, 0, 256),  # pulmão direito
+}
+
+
+# Saídas de `processar_segmentacao` retornadas quando "include" não é enviado
+SAIDAS_PADRAO = (
+    "imagem_pre_processada",
+    "todos_os_contornos",
+    "contornos_validos",
+    "diagnostico",
+)
+
+# Saídas que podem ser pedidas em "include": as padrão e as que só são
+# calculadas quando pedidas (o mapa de classes do lim_multipla)
+SAIDAS = SAIDAS_PADRAO + ("mapa_classes",)
+
+# Janela (HU) dos níveis de cinza usados como entrada pelos métodos
+JANELA_HU = (-1000, 2000)
+
+# Métodos de segmentação de `processar_segmentacao`
+METODOS = (
+    "segmentation",
+    "watershed",
+    "lim_media_mov",
+    "lim_global_simples",
+    "lim_multipla",
+    "lim_prop_locais",
+    "sauvola",
+    "divisao_e_fusao",
+    "crescimento_regioes_fora",
+    "otsu",
+    "particiona_otsu",
+)
+
+# Métodos que aceitam "dominio": "hu", operando sobre a imagem em HU em vez
+# dos 256 níveis de cinza da janela (~11,8 HU cada)
+METODOS_DOMINIO_HU = (
+    "otsu",
+    "lim_global_simples",
+    "lim_multipla",
+    "crescimento_regioes_fora",
+)
+
+
+class ParametrosInvalidosError(ValueError):
+    """Erro de validação dos parâmetros enviados pelo cliente."""
+
+
+class TarefaCanceladaError(Exception):
+    """A tarefa assíncrona foi cancelada antes de terminar."""
+
+
+def verificar_parametros_ausentes(params: Dict[str, Any]) -> None:
+    """
+    Verifica se algum parâmetro foi enviado com valor nulo.
+
+    args:
+        params: Dict[str, Any] - Parâmetros recebidos na requisição.
+    raises:
+        ParametrosInvalidosError: Se algum parâmetro estiver ausente ou nulo.
+    """
+    missing_params = [key for key, value in params.items() if value is None]
+
+    if missing_params:
+        raise ParametrosInvalidosError(
+            "Os seguintes parâmetros estão ausentes ou nulos: "
+            f"{', '.join(missing_params)}"
+        )
+
+
+def parametros_dominio(method: str, segmentation_params: Dict[str, Any]) -> tuple:
+    """
+    Domínio de entrada do método ("cinza", padrão, ou "hu") e, no domínio HU,
+    a largura dos bins do histograma ("largura_bin", em HU, padrão 1) e a
+    janela do histograma ("janela_hu", "min,max", padrão `JANELA_HU`).
+
+    args:
+        method: str - Nome do método de segmentação.
+        segmentation_params: Dict[str, Any] - Parâmetros do método.
+    return:
+        tuple - Domínio, largura dos bins e janela (hu_min, hu_max).
+    raises:
+        ParametrosInvalidosError: Se o domínio não existir ou não for aceito
+                                  pelo método, ou se os bins forem inválidos.
+    """
+    dominio = segmentation_params.get("dominio", "cinza")
+    if dominio not in ("cinza", "hu"):
+        raise ParametrosInvalidosError(
+            f"Domínio inválido: {dominio}. Use 'cinza' ou 'hu'."
+        )
+    if dominio == "hu" and method not in METODOS_DOMINIO_HU:
+        raise ParametrosInvalidosError(
+            f"O método {method} não aceita o domínio 'hu'. "
+            f"Use um de: {', '.join(METODOS_DOMINIO_HU)}."
+        )
+
+    try:
+        largura_bin = float(segmentation_params.get("largura_bin", 1))
+        janela_hu = segmentation_params.get("janela_hu", JANELA_HU)
+        if isinstance(janela_hu, str):
+            janela_hu = janela_hu.split(",")
+        janela_hu = tuple(map(int, janela_hu))
+    except (TypeError, ValueError) as e:
+        raise ParametrosInvalidosError(
+            "largura_bin deve ser um número e janela_hu dois inteiros "
+            f"(ex.: '-1000,2000' ou [-1000, 2000]): {e}"
+        ) from e
+    if (
+        len(janela_hu) != 2
+        or janela_hu[0] >= janela_hu[1]
+        or not np.isfinite(largura_bin)
+        or largura_bin <= 0
+        or (janela_hu[1] - janela_hu[0]) / largura_bin >= 2**16
+    ):
+        raise ParametrosInvalidosError(
+            "janela_hu deve ter o início menor que o fim (ex.: '-1000,2000') e "
+            "largura_bin deve ser positiva, com no máximo 65536 bins na janela."
+        )
+    return dominio, largura_bin, tuple(janela_hu)
+
+
+def criar_mca(
+    contexto: ContextoImagem,
+    regiao: tuple,
+    segmentation_params: Dict[str, Any],
+    curva_inicial: Optional[np.ndarray] = None,
+):
+    """
+    Cria o MCACrisp (ou o MCACrispPiramide, com "piramide" verdadeiro) que
+    segmenta um pulmão.
+
+    Com `curva_inicial` (ex.: o contorno final da fatia vizinha de uma série),
+    o contorno parte dela em vez do círculo inicial, já próximo da borda: a
+    janela de busca passa a ser "area_de_busca_serie" (padrão 5) e o early
+    stop é liberado após "iteracoes_minimas_serie" iterações (padrão 5).
+
+    args:
+        contexto: ContextoImagem - Pré-processamento compartilhado da imagem.
+        regiao: tuple - Limites (y_min, y_max, x_min, x_max) da busca pelo
+                        centro inicial do contorno.
+        segmentation_params: Dict[str, Any] - Parâmetros do MCACrisp.
+        curva_inicial: np.ndarray - Contorno inicial (opcional).
+    return:
+        MCACrisp | MCACrispPiramide - Contorno pronto para evoluir.
+    """
+    y_min, y_max, x_min, x_max = regiao
+    parametros = dict(
+        quantidade_pixels=segmentation_params["quantidade_pixels"],
+        raio=segmentation_params["raio"],
+        w_cont=segmentation_params["w_cont"],
+        w_adapt=segmentation_params["w_adapt"],
+        d_max=segmentation_params["d_max"],
+        area_de_busca=segmentation_params["area_de_busca"],
+        alpha=segmentation_params["alpha"],
+        early_stop=segmentation_params["early_stop"],
+        contexto=contexto,
+        historico="nenhum",  # Apenas a curva atual é usada
+    )
+
+    if curva_inicial is not None:
+        parametros["area_de_busca"] = segmentation_params.get("area_de_busca_serie", 5)
+        parametros["iteracoes_minimas"] = segmentation_params.get(
+            "iteracoes_minimas_serie", 5
+        )
+        return MCACrisp(
+            contexto.imagem_hu,
+            y_min,
+            y_max,
+            x_min,
+            x_max,
+            curva_inicial=curva_inicial,
+            **parametros,
+        )
+
+    # Modo em pirâmide: evolui em resolução reduzida e refina na original
+    if segmentation_params.get("piramide"):
+        return MCACrispPiramide(
+            contexto.imagem_hu,
+            y_min,
+            y_max,
+            x_min,
+            x_max,
+            fatores=segmentation_params.get("fatores_piramide", (4, 2)),
+            **parametros,
+        )
+    return MCACrisp(contexto.imagem_hu, y_min, y_max, x_min, x_max, **parametros)
+
+
+def segmentar_pulmao(
+    contexto: ContextoImagem,
+    regiao: tuple,
+    segmentation_params: Dict[str, Any],
+    ao_progredir: Optional[Callable] = None,
+    curva_inicial: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Segmenta um pulmão com o MCACrisp e retorna o contorno final.
+
+    args:
+        contexto: ContextoImagem - Pré-processamento compartilhado da imagem.
+        regiao: tuple - Limites (y_min, y_max, x_min, x_max) da busca pelo
+                        centro inicial do contorno.
+        segmentation_params: Dict[str, Any] - Parâmetros do MCACrisp.
+        ao_progredir: Callable - Chamada como `ao_progredir(mca, concluido)` a
+                                 cada iteração e ao final (opcional).
+        curva_inicial: np.ndarray - Contorno inicial (opcional, ver `criar_mca`).
+    return:
+        np.ndarray - Pontos do contorno final.
+    """
+    mca = criar_mca(contexto, regiao, segmentation_params, curva_inicial)
+    for curva in mca.process(max_iterations=segmentation_params["max_iterations"]):
+        if ao_progredir is not None:
+            ao_progredir(mca, False)
+
+    if ao_progredir is not None:
+        ao_progredir(mca, True)
+    return mca.curva
+
+
+def codificar_delta(curva: np.ndarray) -> Dict[str, Any]:
+    """
+    Codifica um contorno intermediário de forma compacta: o primeiro ponto
+    (arredondado para o pixel) e a diferença de cada ponto para o anterior,
+    que são inteiros pequenos. A soma acumulada dos deltas a partir do início
+    reconstrói o contorno.
+
+    args:
+        curva: np.ndarray - Pontos do contorno (n, 2).
+    return:
+        Dict[str, Any] - {"inicio": [x, y], "deltas": [[dx, dy], ...]}.
+    """
+    pontos = np.rint(curva).astype(np.int32)
+    return {"inicio": pontos[0].tolist(), "deltas": np.diff(pontos, axis=0).tolist()}
+
+
+def simplificar_contornos(
+    contornos: Dict[str, Any], tolerancia: float
+) -> Dict[str, Any]:
+    """
+    Simplifica cada contorno pelo algoritmo de Douglas-Peucker
+    (`cv2.approxPolyDP`), mantendo os pontos necessários para que o contorno
+    simplificado fique a no máximo `tolerancia` pixels do original.
+
+    args:
+        contornos: Dict[str, Any] - Contornos ({"contorno_0": [[x, y], ...]}).
+        tolerancia: float - Distância máxima ao contorno original, em pixels.
+    return:
+        Dict[str, Any] - Contornos simplificados, com as mesmas chaves.
+    """
+    simplificados = {}
+    for chave, contorno in contornos.items():
+        pontos = np.asarray(contorno).reshape(-1, 1, 2)
+        # approxPolyDP aceita int32 (pixels) ou float32 (ex.: pontos do MCA)
+        tipo = np.int32 if np.issubdtype(pontos.dtype, np.integer) else np.float32
+        aproximado = cv2.approxPolyDP(pontos.astype(tipo), tolerancia, True)
+        simplificados[chave] = aproximado.reshape(-1, 2).tolist()
+    return simplificados
+
+
+def ler_imagem_hu_e_cinza(dicom_data: bytes, hu_min: int, hu_max: int) -> tuple:
+    """
+    Lê os atributos necessários e os pixels do DICOM e converte, em uma única
+    passagem, para HU e para níveis de cinza na janela [hu_min, hu_max].
+    """
+    ds, pixels = ler_dicom(dicom_data)
+    return converte_para_hu_e_cinza(pixels, ds, hu_min, hu_max)
+
+
+def preparar_imagem(dicom_data: bytes, preprocessing_params: Dict[str, Any]):
+    """
+    Lê o DICOM, converte para HU e para níveis de cinza e aplica os filtros de
+    pré-processamento solicitados. Cada etapa é memoizada em `cache_etapas`
+    pelas suas entradas, de modo que requisições com a mesma imagem (ex.:
+    variando apenas os parâmetros do método) reaproveitam as etapas já feitas.
+
+    args:
+        dicom_data: bytes - Conteúdo do arquivo DICOM.
+        preprocessing_params: Dict[str, Any] - Parâmetros de pré-processamento.
+    return:
+        tuple - Imagem em HU e imagem em níveis de cinza pré-processada.
+    """
+    # Os pixels lidos são uma visão sobre `dicom_data`: só as imagens
+    # convertidas, já independentes dele, ficam no cache
+    chave = (hashlib.sha256(dicom_data).digest(), -1000, 2000)
+    imagem_hu, pixel_array = cache_etapas.obter_ou_calcular(
+        "hu_e_cinza", chave, partial(ler_imagem_hu_e_cinza, dicom_data, -1000, 2000)
+    )
+
+    if preprocessing_params:
+        verificar_parametros_ausentes(preprocessing_params)
+
+        preprocessing_params = converte_param_preprocess(preprocessing_params)
+        filtros = (
+            preprocessing_params["aplicar_desfoque_media"],
+            preprocessing_params["aplicar_desfoque_gaussiano"],
+            preprocessing_params["aplicar_desfoque_mediana"],
+            preprocessing_params["tamanho_kernel"],
+            preprocessing_params["sigma"],
+        )
+        pixel_array = cache_etapas.obter_ou_calcular(
+            "filtros", chave + filtros, partial(aplicar_filtros, pixel_array, *filtros)
+        )
+
+    return imagem_hu, pixel_array
+
+
+def obter_contexto(dicom_data: bytes, imagem_hu: np.ndarray) -> ContextoImagem:
+    """
+    ContextoImagem da fatia, memoizado em `cache_etapas` pelo conteúdo do
+    DICOM (não depende dos parâmetros de pré-processamento nem do MCACrisp).
+
+    args:
+        dicom_data: bytes - Conteúdo do arquivo DICOM.
+        imagem_hu: np.ndarray - Imagem em HU retornada por `preparar_imagem`.
+    return:
+        ContextoImagem - Pré-processamento compartilhado da imagem.
+    """
+    chave = (hashlib.sha256(dicom_data).digest(),)
+    return cache_etapas.obter_ou_calcular(
+        "contexto", chave, partial(ContextoImagem, imagem_hu)
+    )
+
+
+def transmitir_segmentacao(
+    fila, cancelar, dicom_data: bytes, params_dict: Dict[str, Any], intervalo: int
+) -> None:
+    """
+    Versão em fluxo do método principal ("segmentation"), executada em um
+    processo do pool. Coloca na `fila` uma mensagem "inicio" com a imagem
+    pré-processada, uma mensagem "progresso" a cada `intervalo` iterações de
+    cada pulmão (contorno codificado por `codificar_delta`) e uma mensagem
+    "resultado" com os contornos finais completos. `None` sinaliza o fim.
+    A evolução é interrompida assim que `cancelar` é sinalizado.
+
+    args:
+        fila: Queue - Fila compartilhada com o processo da API.
+        cancelar: Event - Evento sinalizado quando o cliente desconecta.
+        dicom_data: bytes - Conteúdo do arquivo DICOM.
+        params_dict: Dict[str, Any] - Parâmetros de pré-processamento e do MCACrisp.
+        intervalo: int - Envia um contorno a cada `intervalo` iterações.
+    """
+    try:
+        segmentation_params = params_dict.get("segmentation_params", {})
+        verificar_parametros_ausentes(segmentation_params)
+
+        imagem_hu, pixel_array = preparar_imagem(
+            dicom_data, params_dict.get("preprocessing_params", {})
+        )
+        fila.put(
+            {
+                "evento": "inicio",
+                "imagem_pre_processada": imagem_para_base64(pixel_array),
+            }
+        )
+
+        contexto = obter_contexto(dicom_data, imagem_hu)
+        mcas = {
+            chave: criar_mca(contexto, regiao, segmentation_params)
+            for chave, regiao in REGIOES_PULMOES.items()
+        }
+        evolucoes = {
+            chave: mca.process(max_iterations=segmentation_params["max_iterations"])
+            for chave, mca in mcas.items()
+        }
+
+        # Os pulmões avançam alternadamente, uma iteração por vez
+        while evolucoes:
+            for chave in list(evolucoes):
+                if cancelar.is_set():
+                    return
+
+                try:
+                    curva = next(evolucoes[chave])
+                except StopIteration:
+                    del evolucoes[chave]
+                    continue
+
+                iteracao = mcas[chave].iteracoes
+                if iteracao % intervalo == 0:
+                    fila.put(
+                        {
+                            "evento": "progresso",
+                            "contorno": chave,
+                            "iteracao": iteracao,
+                            **codificar_delta(curva),
+                        }
+                    )
+
+        fila.put(
+            {
+                "evento": "resultado",
+                "todos_os_contornos": {},
+                "contornos_validos": {
+                    chave: mca.curva.tolist() for chave, mca in mcas.items()
+                },
+            }
+        )
+    finally:
+        fila.put(None)
+
+
+def executar_tarefa(
+    fila,
+    cancelar,
+    dicom_data: Union[bytes, str],
+    method: str,
+    params_dict: Dict[str, Any],
+    intervalo_progresso: float = 0.25,
+) -> None:
+    """
+    Executa `processar_segmentacao` como uma tarefa assíncrona da API,
+    colocando na `fila` a mensagem "inicio" quando um processo assume a
+    tarefa, mensagens "progresso" do método principal (iteração e perímetro
+    atual de cada pulmão, no máximo uma a cada `intervalo_progresso` segundos
+    por pulmão), a mensagem "resultado" e, por fim, `None`. Se `cancelar` já
+    estiver sinalizado quando um processo assume a tarefa, ela nem começa; em
+    execução, apenas o método principal é interrompido, com
+    `TarefaCanceladaError`, no primeiro envio de progresso após o
+    cancelamento. Os demais métodos vão até o fim e o resultado é descartado.
+
+    args:
+        fila: Queue - Fila compartilhada com o processo da API.
+        cancelar: Event - Evento sinalizado quando a tarefa é cancelada.
+        dicom_data: Union[bytes, str] - Conteúdo do arquivo DICOM ou o seu
+                                        caminho.
+        method: str - Nome do método de segmentação.
+        params_dict: Dict[str, Any] - Parâmetros da requisição.
+        intervalo_progresso: float - Intervalo mínimo entre mensagens de
+                                     progresso de um mesmo pulmão.
+    """
+    ultimo_envio = {}
+
+    def ao_progredir(chave, mca, concluido):
+        agora = time.monotonic()
+        if concluido or agora - ultimo_envio.get(chave, 0) >= intervalo_progresso:
+            # Consultado junto com o envio: cada consulta vai ao gerenciador
+            if cancelar.is_set():
+                raise TarefaCanceladaError("Tarefa cancelada")
+            ultimo_envio[chave] = agora
+            fila.put(
+                {
+                    "evento": "progresso",
+                    "contorno": chave,
+                    "iteracao": mca.iteracoes,
+                    "perimetro": float(mca.perimetro),
+                }
+            )
+
+    try:
+        # Cancelada enquanto aguardava um processo livre
+        if cancelar.is_set():
+            raise TarefaCanceladaError("Tarefa cancelada")
+
+        fila.put({"evento": "inicio"})
+        resultado = processar_segmentacao(
+            dicom_data, method, params_dict, ao_progredir=ao_progredir
+        )
+        fila.put({"evento": "resultado", "resultado": resultado})
+    finally:
+        fila.put(None)
+
+
+@aceita_arquivo
+def processar_segmentacao(
+    dicom_data: bytes,
+    method: str,
+    params_dict: Dict[str, Any],
+    ao_progredir: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Executa todo o pipeline de segmentação (leitura do DICOM, conversão para HU,
+    pré-processamento, método de segmentação e pós-processamento) de forma
+    síncrona. É a unidade de trabalho despachada para o pool de processos, por
+    isso recebe e retorna apenas objetos serializáveis.
+
+    args:
+        dicom_data: bytes - Conteúdo do arquivo DICOM (ou o caminho do
+                            arquivo, mapeado em memória por `aceita_arquivo`).
+        method: str - Nome do método de segmentação.
+        params_dict: Dict[str, Any] - Parâmetros de pré-processamento,
+                                      segmentação (com o "dominio" opcional
+                                      de `parametros_dominio`) e
+                                      pós-processamento, e
+                                      "output_params" opcional: "include"
+                                      (saídas de `SAIDAS` a retornar,
+                                      `SAIDAS_PADRAO` por padrão) e
+                                      "tolerancia" (Douglas-
+                                      Peucker, em pixels; 0 não simplifica).
+        ao_progredir: Callable - Chamada como `ao_progredir(chave, mca,
+                                 concluido)` a cada iteração do método
+                                 principal (opcional).
+    return:
+        Dict[str, Any] - Imagem pré-processada em base64, os contornos
+                         encontrados e, em alguns métodos, o "diagnostico"
+                         (ex.: limiar final e iterações do lim_global_simples)
+                         e, se pedido, o "mapa_classes" do lim_multipla (PNG
+                         em base64 com a classe, de 0 a 5, de cada pixel).
+    raises:
+        ParametrosInvalidosError: Se os parâmetros ou o método forem inválidos.
+    """
+    preprocessing_params = params_dict.get("preprocessing_params", {})
+    segmentation_params = params_dict.get("segmentation_params", {})
+    postprocessing_params = params_dict.get("postprocessing_params", {})
+    output_params = params_dict.get("output_params", {})
+
+    # Saídas pedidas: as demais não são calculadas nem serializadas
+    incluir = set(output_params.get("include", SAIDAS_PADRAO))
+    if incluir - set(SAIDAS):
+        raise ParametrosInvalidosError(
+            f"Saídas inválidas em include: {sorted(incluir - set(SAIDAS))}. "
+            f"Use {', '.join(SAIDAS)}."
+        )
+    tolerancia = float(output_params.get("tolerancia", 0))
+    remove_fundo_saidas = partial(
+        remove_fundo, incluir_todos="todos_os_contornos" in incluir
+    )
+
+    imagem_hu, pixel_array = preparar_imagem(dicom_data, preprocessing_params)
+    dominio, largura_bin, janela_hu = parametros_dominio(method, segmentation_params)
+    # Informações extras do método (ex.: limiar final), quando houver
+    diagnostico = {}
+    mapa_classes = None
+
+    if method == "segmentation":
+        verificar_parametros_ausentes(preprocessing_params)
+
+        # Probabilidades e energia externa são calculadas uma vez para a fatia
+        contexto = obter_contexto(dicom_data, imagem_hu)
+
+        # Os dois contornos são independentes: cada pulmão evolui em uma thread
+        # (os kernels do Numba liberam o GIL) quando a camada de threads permite
+        max_threads = len(REGIOES_PULMOES) if threading_layer_seguro() else 1
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            futuros = {
+                chave: executor.submit(
+                    segmentar_pulmao,
+                    contexto,
+                    regiao,
+                    segmentation_params,
+                    partial(ao_progredir, chave) if ao_progredir else None,
+                )
+                for chave, regiao in REGIOES_PULMOES.items()
+            }
+
+        contornos_validos = {
+            chave: futuro.result().tolist() for chave, futuro in futuros.items()
+        }
+        todos_os_contornos = {}
+
+    elif method == "watershed":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            mascara_segmentada = aplicar_watershed(
+                pixel_array,
+                segmentation_params["limiar"],
+                segmentation_params["aplicar_interpolacao"],
+                segmentation_params["aplicar_morfologia"],
+                segmentation_params["tamanho_kernel"],
+                segmentation_params["iteracoes_morfologia"],
+                segmentation_params["iteracoes_dilatacao"],
+                segmentation_params["fator_dist_transform"],
+            )
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                mascara_segmentada, postprocessing_params["area_minima"]
+            )
+
+    elif method == "lim_media_mov":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            mascara_segmentada = aplicar_limiarizacao_media_movel(
+                pixel_array,
+                segmentation_params["n"],
+                segmentation_params["b"],
+                segmentation_params["aplicar_interpolacao"],
+                segmentation_params.get("zigzag", False),
+            )
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                mascara_segmentada, postprocessing_params["area_minima"]
+            )
+
+    elif method == "lim_global_simples":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            if dominio == "hu":
+                imagem_cinza_binario_invertida, limiar, iteracoes = (
+                    aplicar_lim_global_simples_hu(
+                        imagem_hu,
+                        segmentation_params["limiar"],
+                        segmentation_params["delta_limiar"],
+                        largura_bin,
+                        *janela_hu,
+                    )
+                )
+            else:
+                imagem_cinza_binario_invertida, limiar, iteracoes = (
+                    aplicar_lim_global_simples(
+                        pixel_array,
+                        segmentation_params["limiar"],
+                        segmentation_params["delta_limiar"],
+                    )
+                )
+            diagnostico = {"limiar": limiar, "iteracoes": iteracoes}
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                imagem_cinza_binario_invertida, postprocessing_params["area_minima"]
+            )
+
+    elif method == "lim_multipla":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            limites_e_ativacoes = (
+                segmentation_params["lim_hiperaeradas"],
+                segmentation_params["lim_normalmente_aeradas"],
+                segmentation_params["lim_pouco_aeradas"],
+                segmentation_params["lim_nao_aeradas"],
+                segmentation_params["lim_osso"],
+                segmentation_params["ativacao_hiperaeradas"],
+                segmentation_params["ativacao_normalmente_aeradas"],
+                segmentation_params["ativacao_pouco_aeradas"],
+                segmentation_params["ativacao_nao_aeradas"],
+                segmentation_params["ativacao_osso"],
+                segmentation_params["ativacao_nao_classificado"],
+            )
+            calcular_classes = "mapa_classes" in incluir
+            if dominio == "hu":
+                # Limites das classes em HU
+                mascara_segmentada, mapa_classes = limiarizacao_multipla_hu(
+                    imagem_hu,
+                    *limites_e_ativacoes,
+                    largura_bin=largura_bin,
+                    hu_min=janela_hu[0],
+                    hu_max=janela_hu[1],
+                    calcular_classes=calcular_classes,
+                )
+            else:
+                mascara_segmentada, mapa_classes = limiarizacao_multipla(
+                    pixel_array,
+                    *limites_e_ativacoes,
+                    calcular_classes=calcular_classes,
+                )
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                mascara_segmentada, postprocessing_params["area_minima"]
+            )
+
+    elif method == "lim_prop_locais":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            mascara_segmentada = aplicar_limiarizacao_propriedades(
+                pixel_array,
+                segmentation_params["tamanho_janela"],
+                segmentation_params["a"],
+                segmentation_params["b"],
+                segmentation_params["usar_media_global"],
+                segmentation_params["aplicar_interpolacao"],
+            )
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                mascara_segmentada, postprocessing_params["area_minima"]
+            )
+
+    elif method == "sauvola":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            mascara_segmentada = aplicar_sauvola(
+                pixel_array,
+                segmentation_params["tamanho_janela"],
+                segmentation_params["k"],
+                segmentation_params["aplicar_interpolacao"],
+                segmentation_params["aplicar_morfologia"],
+                segmentation_params["tamanho_kernel"],
+                segmentation_params["iteracoes_morfologia"],
+            )
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                mascara_segmentada, postprocessing_params["area_minima"]
+            )
+
+    elif method == "divisao_e_fusao":
+        if segmentation_params:
+            verificar_parametros_ausentes(segmentation_params)
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+            mascara_segmentada = aplicar_divisao_e_fusao(
+                pixel_array,
+                segmentation_params["limite_var"],
+                segmentation_params["limite_media"],
+                segmentation_params["referencia_media"],
+                # A fusão muda os contornos de antes: só quando pedida
+                segmentation_params.get("aplicar_fusao", False),
+                # Divisão da versão recursiva original, só quando pedida
+                segmentation_params.get("divisao_quadrada", False),
+            )
+            todos_os_contornos, contornos_validos = remove_fundo_saidas(
+                mascara_segmentada, postprocessing_params["area_minima"]
+            )
+
+    elif method == "crescimento_regioes_fora":
+        if dominio == "hu":
+            imagem_segmentada_8bits_invertida = crescimento_regioes_fora_hu(imagem_hu)
+        else:
+            imagem_segmentada_8bits_invertida = crescimento_regioes_fora(pixel_array)
+        todos_os_contornos, contornos_validos = remove_fundo_saidas(
+            imagem_segmentada_8bits_invertida
+        )
+
+    elif method == "otsu":
+        if dominio == "hu":
+            mascara_segmentada, limiar = aplicar_otsu_hu(
+                imagem_hu, largura_bin, *janela_hu
+            )
+            diagnostico = {"limiar": limiar}
+        else:
+            mascara_segmentada = aplicar_otsu(pixel_array)
+        todos_os_contornos, contornos_validos = remove_fundo_saidas(mascara_segmentada)
+
+    elif method == "particiona_otsu":
+        # Grade e sobreposição são opcionais, como os parâmetros do Otsu global
+        try:
+            segmentation_params = converter_parametros_para_tipos(segmentation_params)
+        except (TypeError, ValueError) as e:
+            raise ParametrosInvalidosError(
+                f"grid_size (ex.: '2,3' ou [2, 3]) e overlap devem ser inteiros: {e}"
+            ) from e
+        grid_size = segmentation_params.get("grid_size", (2, 3))
+        if len(grid_size) != 2 or min(grid_size) < 1:
+            raise ParametrosInvalidosError(
+                "grid_size deve ter duas quantidades de blocos positivas "
+                "(ex.: '2,3' ou [2, 3])."
+            )
+        overlap = segmentation_params.get("overlap", 20)
+        if overlap < 0:
+            raise ParametrosInvalidosError(
+                "overlap deve ser uma quantidade de pixels não negativa."
+            )
+
+        mascara_segmentada = aplicar_otsu_por_blocos(pixel_array, grid_size, overlap)
+        todos_os_contornos, contornos_validos = remove_fundo_saidas(mascara_segmentada)
+    else:
+        raise ParametrosInvalidosError(
+            f"Método de segmentação inválido. Use um de: {', '.join(METODOS)}."
+        )
+
+    if (
+        segmentation_params
+        or method == "otsu"
+        or method == "particiona_otsu"
+        or method == "crescimento_regioes_fora"
+        or method == "segmentation"
+    ):
+        resultado = {}
+        if "imagem_pre_processada" in incluir:
+            resultado["imagem_pre_processada"] = imagem_para_base64(pixel_array)
+        for chave, contornos in (
+            ("todos_os_contornos", todos_os_contornos),
+            ("contornos_validos", contornos_validos),
+        ):
+            if chave in incluir:
+                resultado[chave] = (
+                    simplificar_contornos(contornos, tolerancia)
+                    if tolerancia > 0
+                    else contornos
+                )
+        if diagnostico and "diagnostico" in incluir:
+            resultado["diagnostico"] = diagnostico
+        if mapa_classes is not None:
+            resultado["mapa_classes"] = imagem_para_base64(mapa_classes)
+        return resultado
+
+    return {
+        chave: {}
+        for chave in SAIDAS_PADRAO
+        if chave in incluir and chave != "diagnostico"
+    }
@@ -0,0 +1,265 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pydicom
+
+from crud.processamento import (
+    REGIOES_PULMOES,
+    ParametrosInvalidosError,
+    segmentar_pulmao,
+    verificar_parametros_ausentes,
+)
+from crud.leitura_dicom import ler_dicom
+from crud.segmentation import threading_layer_seguro
+from crud.segmentacao.contexto import ContextoImagem
+from crud.alternativas.to_hu import converte_para_hu_e_cinza
+from crud.alternativas.converte_str_json import (
+    converte_param_preprocess,
+    converter_parametros_para_tipos,
+)
+from crud.alternativas.aplicar_filtros import aplicar_filtros
+from crud.alternativas.remove_fundo import remove_fundo
+from crud.alternativas.crescimento_regioes_fora_3d import crescimento_regioes_fora_3d
+from crud.alternativas.lim_multipla_3d import limiarizacao_multipla_3d
+
+
+# Métodos com versão volumétrica
+METODOS_VOLUME = ("segmentation", "crescimento_regioes_fora", "lim_multipla")
+
+
+def posicao_fatia(ds: pydicom.Dataset, indice: int) -> float:
+    """Posição da fatia ao longo do eixo z (ou a ordem de envio, sem metadados)."""
+    if "ImagePositionPatient" in ds:
+        return float(ds.ImagePositionPatient[2])
+    if "InstanceNumber" in ds:
+        return float(ds.InstanceNumber)
+    return float(indice)
+
+
+def carregar_volume(fatias: List[Tuple[str, bytes]]) -> Dict[str, Any]:
+    """
+    Lê as fatias de uma série e monta um único volume em HU, ordenado pela
+    posição das fatias (ImagePositionPatient).
+
+    args:
+        fatias: List[Tuple[str, bytes]] - Nome e conteúdo de cada DICOM.
+    return:
+        Dict[str, Any] - "volume_hu" (z, y, x) em int16, "volume_cinza" em
+                         níveis de cinza (janela de -1000 a 2000 HU),
+                         "arquivos" e "posicoes" na ordem do volume e
+                         "espacamento" (dz, dy, dx) em mm.
+    raises:
+        ParametrosInvalidosError: Se as fatias tiverem dimensões diferentes.
+    """
+    lidas = [ler_dicom(dados) for _, dados in fatias]
+    datasets = [ds for ds, _ in lidas]
+    posicoes = [posicao_fatia(ds, i) for i, ds in enumerate(datasets)]
+    ordem = np.argsort(posicoes, kind="stable")
+
+    dimensoes = {(ds.Rows, ds.Columns) for ds in datasets}
+    if len(dimensoes) > 1:
+        raise ParametrosInvalidosError(
+            f"As fatias da série têm dimensões diferentes: {sorted(dimensoes)}"
+        )
+
+    volume_hu = np.empty((len(datasets), *dimensoes.pop()), dtype=np.int16)
+    volume_cinza = np.empty(volume_hu.shape, dtype=np.uint8)
+    for z, i in enumerate(ordem):
+        imagem_hu, volume_cinza[z] = converte_para_hu_e_cinza(
+            lidas[i][1], datasets[i], hu_min=-1000, hu_max=2000
+        )
+        if imagem_hu.dtype == np.int16:
+            volume_hu[z] = imagem_hu
+        else:
+            volume_hu[z] = np.clip(np.rint(imagem_hu), -32768, 32767)
+
+    posicoes_ordenadas = [posicoes[i] for i in ordem]
+    referencia = datasets[ordem[0]]
+    dy, dx = (float(v) for v in referencia.get("PixelSpacing", (1.0, 1.0)))
+    if len(posicoes_ordenadas) > 1:
+        dz = float(np.median(np.abs(np.diff(posicoes_ordenadas))))
+    else:
+        dz = float(referencia.get("SliceThickness", 1.0))
+
+    return {
+        "volume_hu": volume_hu,
+        "volume_cinza": volume_cinza,
+        "arquivos": [fatias[i][0] for i in ordem],
+        "posicoes": posicoes_ordenadas,
+        "espacamento": (dz, dy, dx),
+    }
+
+
+def segmentar_serie_mca(
+    volume_hu: np.ndarray,
+    segmentation_params: Dict[str, Any],
+    fatia_inicial: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, int]]]:
+    """
+    Método principal (MCACrisp) em uma série: a fatia inicial (por padrão a do
+    meio, onde os pulmões aparecem) parte do círculo de `crisp_inicial`, e
+    cada fatia seguinte, em direção às duas extremidades da série, parte do
+    contorno final da fatia vizinha (ver `criar_mca`). Como fatias adjacentes
+    têm bordas quase iguais, cada uma converge em poucas iterações.
+
+    args:
+        volume_hu: np.ndarray - Volume (z, y, x) em HU.
+        segmentation_params: Dict[str, Any] - Parâmetros do MCACrisp.
+        fatia_inicial: int - Índice da fatia segmentada sem contorno inicial.
+    return:
+        Tuple - Contornos de cada fatia ({"contorno_0": [...], ...}) e as
+                iterações usadas por pulmão em cada fatia.
+    """
+    nz = volume_hu.shape[0]
+    inicio = nz // 2 if fatia_inicial is None else fatia_inicial
+    contornos: List[Dict[str, Any]] = [{} for _ in range(nz)]
+    iteracoes: List[Dict[str, int]] = [{} for _ in range(nz)]
+
+    def registrar(z, chave, mca, concluido):
+        if concluido:
+            iteracoes[z][chave] = mca.iteracoes
+
+    # Os dois contornos são independentes: cada pulmão evolui em uma thread
+    # quando a camada de threads do Numba permite
+    max_threads = len(REGIOES_PULMOES) if threading_layer_seguro() else 1
+    with ThreadPoolExecutor(max_workers=max_threads) as executor:
+        for fatias in (range(inicio, nz), range(inicio - 1, -1, -1)):
+            # Ao descer a partir do início, parte de novo da fatia inicial
+            anteriores = {
+                chave: np.array(curva) for chave, curva in contornos[inicio].items()
+            }
+
+            for z in fatias:
+                contexto = ContextoImagem(volume_hu[z])
+
+                futuros = {
+                    chave: executor.submit(
+                        segmentar_pulmao,
+                        contexto,
+                        regiao,
+                        segmentation_params,
+                        partial(registrar, z, chave),
+                        anteriores.get(chave),
+                    )
+                    for chave, regiao in REGIOES_PULMOES.items()
+                }
+                anteriores = {chave: f.result() for chave, f in futuros.items()}
+                contornos[z] = {
+                    chave: curva.tolist() for chave, curva in anteriores.items()
+                }
+
+    return contornos, iteracoes
+
+
+def processar_volume(
+    fatias: List[Tuple[str, bytes]], method: str, params_dict: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Segmenta uma série inteira como um volume: carrega as fatias em um único
+    volume em HU, aplica a versão 3D do método e extrai os contornos de cada
+    fatia, além do volume pulmonar total (soma das áreas dos contornos
+    válidos vezes o espaçamento entre fatias). Assim como
+    `processar_segmentacao`, é executado em um processo do pool.
+
+    args:
+        fatias: List[Tuple[str, bytes]] - Nome e conteúdo de cada DICOM.
+        method: str - Nome do método ("segmentation",
+                      "crescimento_regioes_fora" ou "lim_multipla").
+        params_dict: Dict[str, Any] - Parâmetros de pré-processamento,
+                                      segmentação e pós-processamento.
+    return:
+        Dict[str, Any] - Contornos válidos de cada fatia, volume pulmonar em
+                         mL e espaçamento dos voxels em mm.
+    raises:
+        ParametrosInvalidosError: Se os parâmetros ou o método forem inválidos.
+    """
+    if method not in METODOS_VOLUME:
+        raise ParametrosInvalidosError(
+            "Método volumétrico inválido. Use 'segmentation', "
+            "'crescimento_regioes_fora' ou 'lim_multipla'."
+        )
+
+    preprocessing_params = params_dict.get("preprocessing_params", {})
+    segmentation_params = params_dict.get("segmentation_params", {})
+    postprocessing_params = params_dict.get("postprocessing_params", {})
+
+    serie = carregar_volume(fatias)
+    volume_hu = serie["volume_hu"]
+
+    iteracoes = None
+    if method == "segmentation":
+        verificar_parametros_ausentes(segmentation_params)
+        contornos, iteracoes = segmentar_serie_mca(volume_hu, segmentation_params)
+
+    elif method == "crescimento_regioes_fora":
+        volume_segmentado = crescimento_regioes_fora_3d(volume_hu)
+        area_minima = postprocessing_params.get("area_minima", 3000)
+
+    elif method == "lim_multipla":
+        verificar_parametros_ausentes(segmentation_params)
+        segmentation_params = converter_parametros_para_tipos(segmentation_params)
+
+        # Mesma conversão e filtros do método 2D, fatia a fatia
+        if preprocessing_params:
+            verificar_parametros_ausentes(preprocessing_params)
+            preprocessing_params = converte_param_preprocess(preprocessing_params)
+
+        volume_cinza = serie["volume_cinza"]
+        if preprocessing_params:
+            for z in range(volume_cinza.shape[0]):
+                volume_cinza[z] = aplicar_filtros(
+                    volume_cinza[z],
+                    preprocessing_params["aplicar_desfoque_media"],
+                    preprocessing_params["aplicar_desfoque_gaussiano"],
+                    preprocessing_params["aplicar_desfoque_mediana"],
+                    preprocessing_params["tamanho_kernel"],
+                    preprocessing_params["sigma"],
+                )
+
+        volume_segmentado = limiarizacao_multipla_3d(
+            volume_cinza,
+            segmentation_params["lim_hiperaeradas"],
+            segmentation_params["lim_normalmente_aeradas"],
+            segmentation_params["lim_pouco_aeradas"],
+            segmentation_params["lim_nao_aeradas"],
+            segmentation_params["lim_osso"],
+            segmentation_params["ativacao_hiperaeradas"],
+            segmentation_params["ativacao_normalmente_aeradas"],
+            segmentation_params["ativacao_pouco_aeradas"],
+            segmentation_params["ativacao_nao_aeradas"],
+            segmentation_params["ativacao_osso"],
+            segmentation_params["ativacao_nao_classificado"],
+        )
+        area_minima = postprocessing_params.get("area_minima", 3000)
+
+    if method != "segmentation":
+        contornos = [
+            remove_fundo(volume_segmentado[z], area_minima)[1]
+            for z in range(volume_hu.shape[0])
+        ]
+
+    dz, dy, dx = serie["espacamento"]
+    area_total = 0.0
+    resultado_fatias = []
+    for z, (arquivo, posicao) in enumerate(zip(serie["arquivos"], serie["posicoes"])):
+        area_total += sum(
+            cv2.contourArea(np.array(contorno, dtype=np.float32))
+            for contorno in contornos[z].values()
+        )
+        fatia = {
+            "arquivo": arquivo,
+            "posicao_z": posicao,
+            "contornos_validos": contornos[z],
+        }
+        if iteracoes is not None:
+            fatia["iteracoes"] = iteracoes[z]
+        resultado_fatias.append(fatia)
+
+    return {
+        "fatias": resultado_fatias,
+        "volume_pulmonar_ml": area_total * dy * dx * dz / 1000,
+        "espacamento_mm": [dz, dy, dx],
+    }
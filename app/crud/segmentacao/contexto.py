@@ -0,0 +1,56 @@
+import cv2
+import numpy as np
+
+from crud.segmentacao.classificacao import (
+    calcula_ocorrencias_classes,
+    probabilidade_classes,
+)
+from crud.segmentacao.energia import energia_externa
+
+
+class ContextoImagem:
+    """
+    Pré-processamento de uma fatia que não depende do contorno: probabilidades
+    das classes, energia externa crisp e máscara de tecido pulmonar. É calculado
+    uma única vez por imagem e compartilhado por quantas instâncias do MCACrisp
+    forem necessárias (ex.: pulmão esquerdo e direito).
+
+    Args:
+        imagem_hu (np.ndarray): Imagem em Hounsfield Units (HU).
+    """
+
+    def __init__(self, imagem_hu: np.ndarray):
+        # Os kernels do MCACrisp trabalham com a imagem em float64 (a leitura
+        # do DICOM produz HU em int16 quando a conversão é exata). A cópia
+        # também é gravável: a imagem recebida pode vir do cache de etapas, e
+        # arrays somente leitura compilariam outra versão dos kernels
+        imagem_hu = np.array(imagem_hu, dtype=np.float64)
+        self.imagem_hu = imagem_hu
+
+        # O tensor de ocorrências (5, h, w) só é necessário para as
+        # probabilidades, então não é mantido em memória
+        self.probabilidades = probabilidade_classes(
+            calcula_ocorrencias_classes(imagem_hu)
+        )
+        self.energia_crisp = energia_externa(imagem_hu, self.probabilidades)
+
+        # Pixels entre -1000 UH e -500 UH (mesmo critério de `no_pulmao`)
+        self.mascara_pulmao = (imagem_hu >= -1000) & (imagem_hu <= -500)
+
+    def reduzir(self, fator: int) -> "ContextoImagem":
+        """
+        Contexto da mesma fatia com a resolução reduzida por `fator`, usado
+        pelos níveis grossos do MCACrisp em pirâmide. A imagem é reduzida pela
+        média de cada bloco fator x fator e as probabilidades e a energia são
+        recalculadas nessa escala.
+
+        Args:
+            fator (int): Fator de redução em cada eixo.
+        Returns:
+            ContextoImagem: Contexto na resolução reduzida.
+        """
+        h, w = self.imagem_hu.shape
+        imagem_reduzida = cv2.resize(
+            self.imagem_hu, (w // fator, h // fator), interpolation=cv2.INTER_AREA
+        )
+        return ContextoImagem(imagem_reduzida)
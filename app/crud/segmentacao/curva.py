@@ -117,17 +117,58 @@ def remover_pontos(curva: np.ndarray, alpha: float = 20) -> np.ndarray:
 
     assert curva.shape[-1] == 2, "A curva deve ser um array de shape [n,2]"
 
-    curva = curva[np.insert(np.any(np.diff(curva, axis=0), axis=1), 0, True)]
+    # Mesmo kernel usado a cada iteração do MCACrisp (`passo_mca`)
+    buffer = np.array(curva, dtype=np.float64)
+    n = remover_pontos_buffer(buffer, len(buffer), alpha, np.empty_like(buffer))
+    return buffer[:n].astype(np.int16)
 
-    curva_filtrada = [curva[0]]
 
-    for i in range(1, len(curva) - 1):
-        angulo = calcular_angulo(curva[i - 1], curva[i], curva[i + 1])
-        if angulo > alpha:
-            curva_filtrada.append(curva[i])
+@numba.njit
+def remover_pontos_buffer(curva, n, alpha, auxiliar):
+    """
+    Versão compilada de `remover_pontos` que opera sobre buffers pré-alocados:
+    filtra os `n` primeiros pontos de `curva` e escreve o resultado no início
+    do próprio `curva`. As coordenadas são truncadas como no cast para int16
+    feito por `remover_pontos`.
+
+    Args:
+        curva (np.ndarray): Buffer float64 de formato (capacidade, 2).
+        n (int): Quantidade de pontos válidos em `curva`.
+        alpha (float): Ângulo mínimo para manter um ponto da curva.
+        auxiliar (np.ndarray): Buffer de trabalho com a mesma capacidade.
+    Returns:
+        int: Quantidade de pontos da curva filtrada.
+    """
+    # Remove pontos repetidos consecutivos
+    auxiliar[0] = curva[0]
+    m = 1
+    for i in range(1, n):
+        if curva[i, 0] != curva[i - 1, 0] or curva[i, 1] != curva[i - 1, 1]:
+            auxiliar[m] = curva[i]
+            m += 1
+
+    curva[0, 0] = np.trunc(auxiliar[0, 0])
+    curva[0, 1] = np.trunc(auxiliar[0, 1])
+    k = 1
+    for i in range(1, m - 1):
+        v1x = auxiliar[i - 1, 0] - auxiliar[i, 0]
+        v1y = auxiliar[i - 1, 1] - auxiliar[i, 1]
+        v2x = auxiliar[i + 1, 0] - auxiliar[i, 0]
+        v2y = auxiliar[i + 1, 1] - auxiliar[i, 1]
+
+        # Mesmo cálculo de `calcular_angulo`
+        cos_theta = (v1x * v2x + v1y * v2y) / (
+            np.sqrt(v1x * v1x + v1y * v1y) * np.sqrt(v2x * v2x + v2y * v2y)
+        )
+        cos_theta = min(max(cos_theta, -1.0), 1.0)
+        if np.degrees(np.arccos(cos_theta)) > alpha:
+            curva[k, 0] = np.trunc(auxiliar[i, 0])
+            curva[k, 1] = np.trunc(auxiliar[i, 1])
+            k += 1
 
-    curva_filtrada.append(curva[-1])
-    return np.array(curva_filtrada, dtype=np.int16)
+    curva[k, 0] = np.trunc(auxiliar[m - 1, 0])
+    curva[k, 1] = np.trunc(auxiliar[m - 1, 1])
+    return k + 1
 
 
 def no_pulmao(ponto, imagem):
@@ -173,8 +214,54 @@ def na_curva(ponto, curva):
         x1, y1 = curva[i]
         x2, y2 = curva[(i + 1) % n]
 
-        # Verificar se o raio cruza a linha
-        if ((y1 > y) != (y2 > y)) and (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1):
+        if cruza_aresta(x, y, x1, y1, x2, y2):
+            dentro = not dentro
+
+    return dentro
+
+
+@numba.njit
+def cruza_aresta(x, y, x1, y1, x2, y2):
+    """
+    Verifica se o raio horizontal que parte de (x, y) cruza a aresta
+    (x1, y1) -> (x2, y2). É o teste usado a cada aresta pelo ray casting.
+
+    Returns:
+        bool: True se o raio cruza a aresta
+    """
+    return ((y1 > y) != (y2 > y)) and (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)
+
+
+@numba.njit
+def na_curva_exceto(ponto, curva, indice):
+    """
+    Ray casting do ponto contra todas as arestas da curva, exceto as duas que
+    tocam o ponto `indice` ((indice - 1, indice) e (indice, indice + 1)).
+    Combinando o resultado com `cruza_aresta` para as duas arestas restantes,
+    obtém-se `na_curva` para qualquer posição candidata do ponto `indice` sem
+    percorrer a curva novamente.
+
+    Args:
+        ponto (np.array): Coordenadas (x, y) do ponto
+        curva (np.ndarray): Pontos da curva de formato (n, 2)
+        indice (int): Índice do ponto cujas arestas são ignoradas
+
+    Returns:
+        bool: Paridade dos cruzamentos com as demais arestas
+    """
+    x, y = ponto
+    n = curva.shape[0]
+    anterior = (indice - 1) % n
+    dentro = False
+
+    for i in range(n):
+        if i == anterior or i == indice:
+            continue
+
+        x1, y1 = curva[i]
+        x2, y2 = curva[(i + 1) % n]
+
+        if cruza_aresta(x, y, x1, y1, x2, y2):
             dentro = not dentro
 
     return dentro
@@ -192,99 +279,108 @@ def adicionar_pontos(curva, imagem, d_max):
     Returns:
         np.ndarray: Curva com os pontos adicionados
     """
-    # Inicializa nova curva com pontos existentes
-    nova_curva = curva.copy()
-
-    # Quantidade de pontos originais na curva
+    # Mesmo kernel usado a cada iteração do MCACrisp (`passo_mca`), com a
+    # máscara de pulmão no critério de `no_pulmao`
     n = len(curva)
+    buffer = np.empty((2 * n, 2))
+    buffer[:n] = curva
+    mascara_pulmao = (imagem >= -1000) & (imagem <= -500)
+    n, adicionados = adicionar_pontos_buffer(
+        buffer, n, mascara_pulmao, d_max, np.empty_like(buffer)
+    )
 
-    # Inicializa lista de pontos a serem adicionados
-    pontos_a_adicionar = []
+    if not adicionados:
+        return curva.copy()
+    return buffer[:n]
 
-    # Verifica cada par consecutivo de pontos
-    for i in range(n):
-        # Ponto atual e próximo (o último ponto conecta com o primeiro)
-        v1 = curva[i]
-        v2 = curva[(i + 1) % n]
-
-        # Calcula a distância euclidiana entre os pontos
-        distancia = np.sqrt(np.sum((v2 - v1) ** 2))
-
-        # Se a distância for maior que a máxima, adiciona um ponto entre eles
-        if distancia > d_max:
-            # Calcula o ponto médio entre v1 e v2
-            ponto_medio = (v1 + v2) / 2
-
-            # Verifica se o ponto médio está no pulmão
-            if no_pulmao(ponto_medio, imagem):
-                # Se estiver no pulmão, adiciona diretamente
-                pontos_a_adicionar.append(ponto_medio)
-            else:
-                # Se não estiver no pulmão, precisamos deslocar o ponto para
-                # dentro do pulmão
-
-                # Calcula o ângulo da semi-reta formada por v1 e v2
-                angulo = atan2(v2[1] - v1[1], v2[0] - v1[0])
-
-                # Calcula as direções perpendiculares
-                angulo1 = angulo + pi / 2
-                angulo2 = angulo - pi / 2
-
-                # Pontos nas duas direções perpendiculares (pequena distância
-                # para verificação)
-                p1 = np.array(
-                    [
-                        ponto_medio[0] + 5 * cos(angulo1),
-                        ponto_medio[1] + 5 * sin(angulo1),
-                    ]
-                )
-                p2 = np.array(
-                    [
-                        ponto_medio[0] + 5 * cos(angulo2),
-                        ponto_medio[1] + 5 * sin(angulo2),
-                    ]
-                )
-
-                # Determina qual direção está dentro da curva
-                angulo_correto = angulo1 if na_curva(p1, curva) else angulo2
-
-                # Procura pelo primeiro ponto na direção correta que está
-                # dentro do pulmão
-                encontrou_ponto = False
-                for dist in range(1, 51):  # Testa distâncias de 1 a 50
-                    ponto_teste = np.array(
-                        [
-                            ponto_medio[0] + dist * cos(angulo_correto),
-                            ponto_medio[1] + dist * sin(angulo_correto),
-                        ]
-                    )
-
-                    if no_pulmao(ponto_teste, imagem):
-                        pontos_a_adicionar.append(ponto_teste)
-                        encontrou_ponto = True
-                        break
-
-                # Se não encontrou nenhum ponto válido, adiciona o ponto médio
-                # mesmo assim
-                if not encontrou_ponto:
-                    pontos_a_adicionar.append(ponto_medio)
-
-    # # Adiciona os novos pontos à curva, em ordem
-    # pontos_a_adicionar.sort(key=lambda x: x[0])
-    #
-    # # Adiciona os pontos na nova curva
-    # offset = 0
-    # for idx, ponto in pontos_a_adicionar:
-    #     nova_curva = np.insert(nova_curva, idx + offset, ponto, axis=0)
-    #     offset += 1
-
-    if pontos_a_adicionar:
-        nova_curva = np.r_[pontos_a_adicionar, nova_curva]
-        centroid = nova_curva.mean(axis=0)
-        atan2_nova_curva = np.arctan2(
-            nova_curva[:, 1] - centroid[1], nova_curva[:, 0] - centroid[0]
-        )
 
-        return nova_curva[np.argsort(atan2_nova_curva)]
-    else:
-        return nova_curva
+@numba.njit
+def no_pulmao_mascara(x, y, mascara_pulmao):
+    """
+    Equivalente a `no_pulmao` consultando a máscara de tecido pulmonar
+    pré-calculada (`ContextoImagem.mascara_pulmao`) em vez da imagem em UH.
+
+    Args:
+        x (float): Coordenada x do ponto
+        y (float): Coordenada y do ponto
+        mascara_pulmao (np.ndarray): Máscara booleana dos pixels de pulmão
+
+    Returns:
+        bool: True se o ponto está no pulmão, False caso contrário
+    """
+    x, y = round(x), round(y)
+
+    if x < 0 or x >= mascara_pulmao.shape[1] or y < 0 or y >= mascara_pulmao.shape[0]:
+        return False
+
+    return mascara_pulmao[y, x]
+
+
+@numba.njit
+def adicionar_pontos_buffer(curva, n, mascara_pulmao, d_max, auxiliar):
+    """
+    Versão compilada de `adicionar_pontos` que opera sobre buffers
+    pré-alocados: a curva resultante (já ordenada pelo ângulo em relação ao
+    centroide) é escrita no início do próprio `curva`.
+
+    Args:
+        curva (np.ndarray): Buffer float64 de formato (capacidade, 2), com
+            capacidade de pelo menos 2n pontos.
+        n (int): Quantidade de pontos válidos em `curva`.
+        mascara_pulmao (np.ndarray): Máscara booleana dos pixels de pulmão.
+        d_max (float): Distância máxima entre dois pontos.
+        auxiliar (np.ndarray): Buffer de trabalho com a mesma capacidade.
+    Returns:
+        tuple: Quantidade de pontos da nova curva e quantidade de pontos
+        adicionados.
+    """
+    k = 0
+    for i in range(n):
+        x1, y1 = curva[i, 0], curva[i, 1]
+        x2, y2 = curva[(i + 1) % n, 0], curva[(i + 1) % n, 1]
+
+        if np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2) <= d_max:
+            continue
+
+        xm, ym = (x1 + x2) / 2, (y1 + y2) / 2
+        auxiliar[k, 0], auxiliar[k, 1] = xm, ym
+
+        if not no_pulmao_mascara(xm, ym, mascara_pulmao):
+            # Desloca o ponto médio na direção perpendicular que aponta para
+            # dentro da curva até encontrar tecido pulmonar
+            angulo = atan2(y2 - y1, x2 - x1)
+            angulo1 = angulo + pi / 2
+            angulo2 = angulo - pi / 2
+
+            p1 = (xm + 5 * cos(angulo1), ym + 5 * sin(angulo1))
+            angulo_correto = angulo1 if na_curva(p1, curva[:n]) else angulo2
+
+            for dist in range(1, 51):
+                xt = xm + dist * cos(angulo_correto)
+                yt = ym + dist * sin(angulo_correto)
+                if no_pulmao_mascara(xt, yt, mascara_pulmao):
+                    auxiliar[k, 0], auxiliar[k, 1] = xt, yt
+                    break
+        k += 1
+
+    if k == 0:
+        return n, 0
+
+    # Pontos novos antes dos originais, como em `adicionar_pontos`
+    m = k + n
+    auxiliar[k:m] = curva[:n]
+
+    cx, cy = 0.0, 0.0
+    for i in range(m):
+        cx += auxiliar[i, 0]
+        cy += auxiliar[i, 1]
+    cx, cy = cx / m, cy / m
+
+    angulos = np.empty(m)
+    for i in range(m):
+        angulos[i] = atan2(auxiliar[i, 1] - cy, auxiliar[i, 0] - cx)
+
+    ordem = np.argsort(angulos)
+    for i in range(m):
+        curva[i] = auxiliar[ordem[i]]
+    return m, k
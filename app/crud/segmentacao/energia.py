@@ -2,7 +2,13 @@ import numpy as np
 import cv2
 import numba
 
-from crud.segmentacao.forca import forca_adaptativa, forca_continuidade
+from crud.segmentacao.curva import na_curva_exceto
+from crud.segmentacao.forca import (
+    forca_adaptativa,
+    forca_adaptativa_candidato,
+    forca_continuidade,
+    forca_continuidade_candidato,
+)
 
 
 def energia_externa(
@@ -88,55 +94,135 @@ def energia_total(
     )
 
 
-@numba.jit(nopython=True, parallel=True)
-def minimiza_energia(
+@numba.njit
+def comprimentos_segmentos(curva: np.ndarray) -> np.ndarray:
+    """
+    Calcula a distância de cada ponto da curva ao ponto anterior (o primeiro
+    ponto conecta com o último). É calculado uma vez por iteração e reutilizado
+    por todos os pontos em `minimiza_energia_incremental`.
+
+    Args:
+        curva (np.ndarray): Curva de n pontos
+    Return:
+        comprimentos (np.ndarray): comprimentos[i] = |curva[i] - curva[i - 1]|
+    """
+    n = curva.shape[0]
+    comprimentos = np.empty(n)
+    for i in range(n):
+        dx = curva[i, 0] - curva[i - 1, 0]
+        dy = curva[i, 1] - curva[i - 1, 1]
+        comprimentos[i] = np.sqrt(dx * dx + dy * dy)
+    return comprimentos
+
+
+@numba.njit
+def minimiza_energia_incremental(
     curva: np.ndarray,
     indice: int,
     energia_crisp: np.ndarray,
+    comprimentos: np.ndarray,
+    soma_comprimentos: float,
     area_de_busca: int = 9,
     w_cont=0.6,
     w_adapt=0.1,
 ) -> np.ndarray:
     """
-    Minimiza a energia para um ponto de uma dada curva na área de busca
-    especificada e retorna o ponto com energia mínima.
+    Mesmo resultado de `minimiza_energia`, mas sem copiar a curva para cada
+    candidato. A parte da energia que não depende do candidato (soma das
+    distâncias entre pontos e o ray casting contra as arestas que não tocam o
+    ponto) é calculada uma vez, e cada candidato é avaliado em O(1).
 
     Args:
         curva (np.ndarray): Curva de n pontos
         indice (int): Indice do ponto da curva
         energia_crisp (np.ndarray): Matriz de energia externa
+        comprimentos (np.ndarray): Saída de `comprimentos_segmentos(curva)`
+        soma_comprimentos (float): Soma de `comprimentos`
         area_de_busca (int): Tamanho da área de busca
         w_cont (float): Peso da energia de continuidade
         w_adapt (float): Peso da energia interna adaptativa
 
     Return:
         melhor_ponto (np.ndarray): Melhor ponto encontrado na área de busca
-
     """
     assert area_de_busca % 2 == 1 and area_de_busca > 0, "Area de busca deve ser impar"
 
-    amplitude_de_indices = np.arange(-(area_de_busca // 2), area_de_busca // 2 + 1)
-    deslocamentos = np.array(
-        [[dx, dy] for dx in amplitude_de_indices for dy in amplitude_de_indices]
+    n = curva.shape[0]
+    anterior = curva[indice - 1]
+    proximo = curva[(indice + 1) % n]
+
+    # Parte da energia que não depende da posição candidata
+    soma_restante = (
+        soma_comprimentos - comprimentos[indice] - comprimentos[(indice + 1) % n]
     )
-    possiveis_pontos = deslocamentos + curva[indice]
+    ponto_medio = (anterior + proximo) / 2
+    dentro_parcial = na_curva_exceto(ponto_medio, curva, indice)
+
+    # Candidatos com o mesmo tipo da curva (após `adicionar_pontos` a curva
+    # pode ter coordenadas fracionárias)
+    raio = area_de_busca // 2
+    candidato = np.empty_like(curva[indice])
+    melhor_ponto = np.empty_like(curva[indice])
+    melhor_energia = -np.inf
+
+    # Mesma ordem de varredura de `minimiza_energia` (dx externo, dy interno),
+    # mantendo o primeiro máximo em caso de empate, como o np.argmax
+    for dx in range(-raio, raio + 1):
+        for dy in range(-raio, raio + 1):
+            candidato[0] = curva[indice, 0] + dx
+            candidato[1] = curva[indice, 1] + dy
+
+            adaptativa = w_adapt * forca_adaptativa_candidato(
+                candidato, anterior, proximo, dentro_parcial
+            )
+            continuidade = w_cont * forca_continuidade_candidato(
+                candidato, anterior, proximo, soma_restante, n
+            )
+            energia = (adaptativa + continuidade) + energia_crisp[
+                numba.int32(candidato[1]), numba.int32(candidato[0])
+            ]
+
+            if energia > melhor_energia:
+                melhor_energia = energia
+                melhor_ponto[0] = candidato[0]
+                melhor_ponto[1] = candidato[1]
+
+    return melhor_ponto
 
-    energias_calculadas = np.zeros(area_de_busca**2)
 
-    for i in numba.prange(area_de_busca**2):
-        curva_modificada = curva.copy()
-        ponto_candidato = possiveis_pontos[i]
-        curva_modificada[indice] = ponto_candidato
-        energia = energia_total(
-            curva_modificada,
-            numba.int32(indice),
-            energia_crisp,
-            w_adapt=w_adapt,
-            w_cont=w_cont,
-        )
+@numba.njit
+def minimiza_energia(
+    curva: np.ndarray,
+    indice: int,
+    energia_crisp: np.ndarray,
+    area_de_busca: int = 9,
+    w_cont=0.6,
+    w_adapt=0.1,
+) -> np.ndarray:
+    """
+    Minimiza a energia para um ponto de uma dada curva na área de busca
+    especificada e retorna o ponto com energia mínima.
 
-        energias_calculadas[i] = energia
+    Args:
+        curva (np.ndarray): Curva de n pontos
+        indice (int): Indice do ponto da curva
+        energia_crisp (np.ndarray): Matriz de energia externa
+        area_de_busca (int): Tamanho da área de busca
+        w_cont (float): Peso da energia de continuidade
+        w_adapt (float): Peso da energia interna adaptativa
 
-    melhor_energia_indice = np.argmax(energias_calculadas)
+    Return:
+        melhor_ponto (np.ndarray): Melhor ponto encontrado na área de busca
 
-    return possiveis_pontos[melhor_energia_indice]
+    """
+    comprimentos = comprimentos_segmentos(curva)
+    return minimiza_energia_incremental(
+        curva,
+        indice,
+        energia_crisp,
+        comprimentos,
+        comprimentos.sum(),
+        area_de_busca=area_de_busca,
+        w_cont=w_cont,
+        w_adapt=w_adapt,
+    )
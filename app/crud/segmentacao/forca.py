@@ -1,7 +1,7 @@
 import numpy as np
 from numba import jit
 
-from crud.segmentacao.curva import na_curva
+from crud.segmentacao.curva import cruza_aresta, na_curva
 
 
 @jit(nopython=True)
@@ -61,3 +61,71 @@ def forca_adaptativa(pontos: np.ndarray, indice: int) -> float:
     #     return 0.0
 
     return np.sqrt(np.sum((pm + sign * pontos[indice]) ** 2))
+
+
+@jit(nopython=True)
+def forca_continuidade_candidato(
+    candidato: np.ndarray,
+    anterior: np.ndarray,
+    proximo: np.ndarray,
+    soma_restante: float,
+    tam: int,
+) -> float:
+    """
+    Força de continuidade do ponto `candidato` em O(1), equivalente a
+    `forca_continuidade` na curva em que o ponto foi substituído pelo candidato.
+
+    Args:
+        candidato (np.ndarray): Posição candidata do ponto.
+        anterior (np.ndarray): Ponto anterior na curva.
+        proximo (np.ndarray): Próximo ponto na curva.
+        soma_restante (float): Soma das distâncias entre pontos consecutivos,
+            sem as duas arestas que tocam o ponto.
+        tam (int): Quantidade de pontos da curva.
+    Returns:
+        float: Força de continuidade.
+    """
+    dc = np.sqrt((candidato[0] - anterior[0]) ** 2 + (candidato[1] - anterior[1]) ** 2)
+    d_proximo = np.sqrt(
+        (proximo[0] - candidato[0]) ** 2 + (proximo[1] - candidato[1]) ** 2
+    )
+    dm = (soma_restante + dc + d_proximo) / tam
+
+    return abs(dm - dc)
+
+
+@jit(nopython=True)
+def forca_adaptativa_candidato(
+    candidato: np.ndarray,
+    anterior: np.ndarray,
+    proximo: np.ndarray,
+    dentro_parcial: bool,
+) -> float:
+    """
+    Força adaptativa do ponto `candidato` em O(1), equivalente a
+    `forca_adaptativa` na curva em que o ponto foi substituído pelo candidato.
+
+    Args:
+        candidato (np.ndarray): Posição candidata do ponto.
+        anterior (np.ndarray): Ponto anterior na curva.
+        proximo (np.ndarray): Próximo ponto na curva.
+        dentro_parcial (bool): Resultado de `na_curva_exceto` para o ponto
+            médio entre `anterior` e `proximo`.
+    Returns:
+        float: Força adaptativa.
+    """
+    pm_x = (anterior[0] + proximo[0]) / 2
+    pm_y = (anterior[1] + proximo[1]) / 2
+
+    # Completa o ray casting com as duas arestas que tocam o candidato
+    dentro = dentro_parcial
+    if cruza_aresta(pm_x, pm_y, anterior[0], anterior[1], candidato[0], candidato[1]):
+        dentro = not dentro
+    if cruza_aresta(pm_x, pm_y, candidato[0], candidato[1], proximo[0], proximo[1]):
+        dentro = not dentro
+
+    sign = 1 if dentro else -1
+
+    return np.sqrt(
+        (pm_x + sign * candidato[0]) ** 2 + (pm_y + sign * candidato[1]) ** 2
+    )
@@ -1,33 +1,106 @@
 import logging
+from collections import deque
 
-from crud.segmentacao.classificacao import probabilidade_classes, calcula_ocorrencias_classes
 import numpy as np
 import time
 import numba
 from crud.segmentacao.curva import (
     crisp_inicial,
     inicializa_curva,
-    adicionar_pontos,
-    remover_pontos,
+    adicionar_pontos_buffer,
+    remover_pontos_buffer,
+)
+from crud.segmentacao.contexto import ContextoImagem
+from crud.alternativas.to_hu import aplicar_tabelas, tabelas_conversao
+from crud.segmentacao.energia import (
+    comprimentos_segmentos,
+    minimiza_energia_incremental,
 )
-from crud.segmentacao.energia import energia_externa, minimiza_energia
 
 logger = logging.getLogger(__name__)
 
 
-@numba.njit(parallel=True)
-def minimize_curve(curva, energia_crisp, area_de_busca, w_adapt, w_cont):
-    nova_curva = np.copy(curva)
-    for i in numba.prange(len(nova_curva)):
-        nova_curva[i] = minimiza_energia(
-            curva,
+# nogil permite que os dois pulmões evoluam ao mesmo tempo em threads diferentes
+@numba.njit(parallel=True, nogil=True)
+def passo_mca(
+    curva,
+    n,
+    auxiliar,
+    energia_crisp,
+    mascara_pulmao,
+    area_de_busca,
+    w_adapt,
+    w_cont,
+    alpha,
+    d_max,
+):
+    """
+    Uma iteração completa do MCACrisp em um único kernel: minimização de
+    energia, remoção de pontos pelo ângulo, inserção de pontos médios e
+    reordenação pelo ângulo em relação ao centroide. Trabalha sobre buffers
+    pré-alocados com capacidade de pelo menos 2n pontos; a nova curva é escrita
+    no início de `curva`.
+
+    Returns:
+        tuple: Quantidade de pontos da nova curva e quantidade de pontos
+        adicionados na iteração.
+    """
+    comprimentos = comprimentos_segmentos(curva[:n])
+    soma_comprimentos = comprimentos.sum()
+
+    for i in numba.prange(n):
+        auxiliar[i] = minimiza_energia_incremental(
+            curva[:n],
             i,
             energia_crisp,
+            comprimentos,
+            soma_comprimentos,
             area_de_busca=area_de_busca,
             w_adapt=w_adapt,
             w_cont=w_cont,
         )
-    return nova_curva
+    curva[:n] = auxiliar[:n]
+
+    n = remover_pontos_buffer(curva, n, alpha, auxiliar)
+    return adicionar_pontos_buffer(curva, n, mascara_pulmao, d_max, auxiliar)
+
+
+# Se o aviso de pulmões segmentados em série já foi registrado no processo
+_aviso_serial_registrado = False
+
+
+def threading_layer_seguro() -> bool:
+    """
+    Indica se a camada de threads do Numba permite que kernels paralelos sejam
+    disparados por várias threads ao mesmo tempo (a camada "workqueue" não
+    permite e encerra o processo). Sem o pacote `tbb` (ou o OpenMP), os dois
+    pulmões são segmentados um após o outro, o que é avisado uma vez por
+    processo.
+    """
+    global _aviso_serial_registrado
+    try:
+        camada = numba.threading_layer()
+    except ValueError:  # Nenhum kernel paralelo foi executado ainda
+        return False
+
+    if camada in ("tbb", "omp"):
+        return True
+    if not _aviso_serial_registrado:
+        _aviso_serial_registrado = True
+        logger.warning(
+            "Camada de threads do Numba '%s': os pulmões são segmentados em "
+            "série. Instale o pacote tbb para segmentá-los em paralelo.",
+            camada,
+        )
+    return False
+
+
+# Modos de histórico de curvas do MCACrisp.process:
+#   "nenhum"    - nenhuma curva é guardada (apenas `curva`, a atual)
+#   "ultimas"   - as últimas `tamanho_historico` curvas (buffer circular)
+#   "intervalo" - uma curva a cada `tamanho_historico` iterações
+#   "completo"  - todas as curvas
+MODOS_HISTORICO = ("nenhum", "ultimas", "intervalo", "completo")
 
 
 class MCACrisp:
@@ -46,73 +119,257 @@ class MCACrisp:
         area_de_busca=9,
         alpha=20,
         early_stop=0.2,
+        contexto=None,
+        historico="completo",
+        tamanho_historico=10,
+        curva_inicial=None,
+        iteracoes_minimas=50,
     ):
-        self.img = imagem_hu
-        self.centro = crisp_inicial(self.img, y_min, y_max, x_min, x_max)
-        self.curva = inicializa_curva(
-            self.centro, quantidade_pixels=quantidade_pixels, raio=raio
-        )
-        self.ocorrencias = calcula_ocorrencias_classes(self.img)
-        self.probabilidades = probabilidade_classes(self.ocorrencias)
+        if historico not in MODOS_HISTORICO:
+            raise ValueError(
+                f"Modo de histórico inválido: {historico}. Use um de {MODOS_HISTORICO}."
+            )
+        if tamanho_historico < 1:
+            raise ValueError("O tamanho do histórico deve ser maior que 0.")
+
+        # O contexto (probabilidades e energia externa) pode ser compartilhado
+        # entre instâncias que segmentam a mesma imagem
+        self.contexto = contexto if contexto is not None else ContextoImagem(imagem_hu)
+        self.img = self.contexto.imagem_hu
+
+        # Sem curva inicial, parte de um círculo centrado na região de pulmão
+        if curva_inicial is None:
+            self.centro = crisp_inicial(self.img, y_min, y_max, x_min, x_max)
+            self.curva = inicializa_curva(
+                self.centro, quantidade_pixels=quantidade_pixels, raio=raio
+            )
+        else:
+            self.curva = np.asarray(curva_inicial)
+            self.centro = self.curva.mean(axis=0)
+        self.probabilidades = self.contexto.probabilidades
         self.w_cont = w_cont
         self.w_adapt = w_adapt
         self.alpha = alpha
-        self.energia_crisp = energia_externa(self.img, self.probabilidades)
+        self.energia_crisp = self.contexto.energia_crisp
         self.area_de_busca = area_de_busca
         self.d_max = d_max
         self.early_stop = early_stop
-        self.curvas = []
+        self.iteracoes_minimas = iteracoes_minimas
+
+        self.historico = historico
+        self.tamanho_historico = tamanho_historico
+        if historico == "ultimas":
+            self.curvas = deque(maxlen=tamanho_historico)
+        else:
+            self.curvas = []
+
+        # Acompanhamento da evolução sem depender do histórico de curvas
+        self.iteracoes = 0
+        self.perimetro = self.perim(self.curva)
+        self.area = self.area_interna(self.curva)
+
+        # Buffers reutilizados por `passo_mca` (crescem quando a curva cresce)
+        self._buffer_curva = np.empty((4 * len(self.curva), 2))
+        self._buffer_auxiliar = np.empty_like(self._buffer_curva)
 
     @staticmethod
     def perim(points):
         distances = np.linalg.norm(points - np.roll(points, -1, axis=0), axis=1)
         return np.sum(distances)
 
+    @staticmethod
+    def area_interna(points):
+        # Fórmula do laço (shoelace); float para não estourar o int16
+        x, y = points[:, 0].astype(float), points[:, 1].astype(float)
+        return 0.5 * np.abs(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+    def _guardar_curva(self):
+        if self.historico in ("ultimas", "completo") or (
+            self.historico == "intervalo"
+            and self.iteracoes % self.tamanho_historico == 0
+        ):
+            # `step` sempre cria um novo array, então não é preciso copiar
+            self.curvas.append(self.curva)
+
     def step(self):
-        self.curva = minimize_curve(
-            self.curva,
+        n = len(self.curva)
+
+        # A inserção de pontos pode até dobrar a curva
+        if len(self._buffer_curva) < max(2 * n, 4):
+            self._buffer_curva = np.empty((4 * n, 2))
+            self._buffer_auxiliar = np.empty_like(self._buffer_curva)
+
+        self._buffer_curva[:n] = self.curva
+        n, adicionados = passo_mca(
+            self._buffer_curva,
+            n,
+            self._buffer_auxiliar,
             self.energia_crisp,
+            self.contexto.mascara_pulmao,
             self.area_de_busca,
             self.w_adapt,
             self.w_cont,
+            self.alpha,
+            self.d_max,
         )
-        self.curva = remover_pontos(self.curva, alpha=self.alpha)
-        self.curva = adicionar_pontos(self.curva, imagem=self.img, d_max=self.d_max)
+
+        # Mesmo tipo de `adicionar_pontos`: inteiros quando nenhum ponto médio
+        # foi inserido
+        self.curva = self._buffer_curva[:n].copy()
+        if not adicionados:
+            self.curva = self.curva.astype(np.int16)
         return self.curva
 
     def process(self, max_iterations=500):
         logger.info("Starting segmentation process")
         start_time = time.perf_counter()
-        curvas = []
 
         for i in range(max_iterations):
             iter_start = time.perf_counter()
 
-            curva = self.step()
-            self.curvas.append(np.copy(self.curva))
-
-            if len(self.curvas) > 1:
-                current_perim = self.perim(self.curva)
-                last_perim = self.perim(self.curvas[-2])
-
-                if (
-                    len(curvas) > 50
-                    and np.abs(current_perim - last_perim) / last_perim
-                    < self.early_stop
-                ):
-                    if self.area_de_busca > 1:
-                        self.area_de_busca -= 2
-                        self.d_max -= 1
-                        logger.info(f"Adjusted area_de_busca to {self.area_de_busca}")
-                    else:
-                        logger.info("Convergence reached, stopping early")
-                        break
+            last_perim = self.perimetro
+            self.step()
+            self.iteracoes += 1
+            self.perimetro = self.perim(self.curva)
+            self.area = self.area_interna(self.curva)
+            self._guardar_curva()
+
+            if (
+                self.iteracoes > self.iteracoes_minimas
+                and np.abs(self.perimetro - last_perim) / last_perim < self.early_stop
+            ):
+                if self.area_de_busca > 1:
+                    self.area_de_busca -= 2
+                    self.d_max -= 1
+                    logger.info(f"Adjusted area_de_busca to {self.area_de_busca}")
+                else:
+                    logger.info("Convergence reached, stopping early")
+                    break
 
             iter_time = time.perf_counter() - iter_start
             logger.info(f"Iteration {i + 1}/{max_iterations} - Time: {iter_time:.2f}s")
 
             yield self.curva
-            curvas.append(curva)
 
         total_time = time.perf_counter() - start_time
         logger.info(f"Processing completed in {total_time:.2f}s")
+
+
+class MCACrispPiramide:
+    """
+    MCACrisp em múltiplas resoluções (coarse-to-fine). O contorno evolui
+    primeiro sobre o contexto reduzido pelos maiores fatores, onde cada
+    iteração cobre uma área proporcionalmente maior da imagem, e só então é
+    refinado na resolução original com uma janela de busca pequena.
+
+    Recebe os mesmos parâmetros do MCACrisp (repassados a todos os níveis),
+    além de:
+        fatores (tuple): Fatores de redução dos níveis grossos, do maior para
+            o menor.
+        area_de_busca_refino (int): Janela de busca na resolução original.
+        iteracoes_refino (int): Máximo de iterações na resolução original.
+        iteracoes_minimas_refino (int): Iterações antes do early stop na
+            resolução original (os níveis grossos usam `iteracoes_minimas`).
+    """
+
+    def __init__(
+        self,
+        imagem_hu,
+        y_min,
+        y_max,
+        x_min,
+        x_max,
+        fatores=(4, 2),
+        area_de_busca_refino=5,
+        iteracoes_refino=60,
+        iteracoes_minimas_refino=10,
+        contexto=None,
+        **parametros,
+    ):
+        if any(fator < 2 for fator in fatores):
+            raise ValueError("Os fatores da pirâmide devem ser maiores que 1.")
+
+        self.contexto = contexto if contexto is not None else ContextoImagem(imagem_hu)
+        self.regiao = (y_min, y_max, x_min, x_max)
+        self.fatores = tuple(fatores)
+        self.area_de_busca_refino = area_de_busca_refino
+        self.iteracoes_refino = iteracoes_refino
+        self.iteracoes_minimas_refino = iteracoes_minimas_refino
+        self.parametros = parametros
+
+        self.curva = None
+        self.iteracoes = 0
+        self.perimetro = 0.0
+        self.area = 0.0
+
+    def _nivel(self, fator, curva_inicial):
+        y_min, y_max, x_min, x_max = (limite // fator for limite in self.regiao)
+        parametros = dict(self.parametros)
+        if fator == 1:
+            parametros["area_de_busca"] = self.area_de_busca_refino
+            parametros["iteracoes_minimas"] = self.iteracoes_minimas_refino
+        else:
+            parametros["raio"] = max(parametros.get("raio", 30) // fator, 2)
+
+        contexto = self.contexto if fator == 1 else self.contexto.reduzir(fator)
+        return MCACrisp(
+            contexto.imagem_hu,
+            y_min,
+            y_max,
+            x_min,
+            x_max,
+            contexto=contexto,
+            curva_inicial=curva_inicial,
+            **parametros,
+        )
+
+    def process(self, max_iterations=500):
+        """
+        Evolui o contorno nível a nível. `max_iterations` limita cada nível
+        grosso; o refino usa no máximo `iteracoes_refino` iterações. As curvas
+        produzidas são sempre devolvidas na resolução original.
+        """
+        curva, fator_anterior = None, None
+        niveis = [(fator, max_iterations) for fator in self.fatores]
+        niveis.append((1, min(max_iterations, self.iteracoes_refino)))
+
+        for fator, iteracoes in niveis:
+            if curva is not None:
+                curva = curva * (fator_anterior / fator)
+
+            mca = self._nivel(fator, curva)
+            logger.info(f"Pyramid level 1/{fator}")
+            for curva_nivel in mca.process(max_iterations=iteracoes):
+                self.iteracoes += 1
+                self.curva = curva_nivel * fator if fator > 1 else curva_nivel
+                self.perimetro = mca.perimetro * fator
+                self.area = mca.area * fator**2
+                yield self.curva
+
+            curva, fator_anterior = mca.curva, fator
+
+        self.curva = mca.curva
+
+
+def aquecer_jit():
+    """
+    Executa algumas iterações do MCACrisp sobre uma imagem sintética, e a
+    conversão dos pixels do DICOM, para que os kernels do Numba sejam
+    compilados antes da primeira requisição real.
+    """
+    # Disco com densidade de pulmão (-800 HU) sobre tecido mole (40 HU)
+    y, x = np.mgrid[:64, :64]
+    imagem_hu = np.where((x - 32) ** 2 + (y - 32) ** 2 < 20**2, -800.0, 40.0)
+
+    mca = MCACrisp(
+        imagem_hu, 0, 63, 0, 63, quantidade_pixels=12, raio=10, historico="nenhum"
+    )
+    for _ in mca.process(max_iterations=2):
+        pass
+
+    # Conversão para HU e níveis de cinza de um DICOM de 12 bits lido sem
+    # cópia (pixels somente leitura)
+    tabela_hu, tabela_cinza = tabelas_conversao("<u2", 12, 1.0, -1024.0, -1000, 2000)
+    pixels = np.zeros(16, dtype=np.uint16)
+    pixels.setflags(write=False)
+    aplicar_tabelas(pixels, tabela_hu, tabela_cinza)
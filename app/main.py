@@ -1,5 +1,6 @@
 import asyncio
 import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,12 +9,24 @@ from starlette.status import HTTP_504_GATEWAY_TIMEOUT
 
 from api.api import api_router
 from schemas.healthcheck import HealthCheck
+from utils.worker_pool import worker_pool
 
 REQUEST_TIMEOUT_ERROR = 300
 
+
+# Inicia o pool de processos junto com a aplicação para que o aquecimento do JIT
+# aconteça antes da primeira requisição
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    worker_pool.iniciar()
+    yield
+    worker_pool.encerrar()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="API - Projeto de PDI",
+    lifespan=lifespan,
     openapi_url="/api/v1/openapi.json",
     openapi_tags=[
         {"name": "Healthcheck", "description": "Healthcheck endpoint for the API."},
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pydicom
+from pydicom.filebase import DicomBytesIO
+
+from crud.leitura_dicom import aceita_arquivo, ler_cabecalho
+from utils.globals import RESULT_CACHE_DIR, RESULT_CACHE_DISK_MB, RESULT_CACHE_MEMORY_MB
+
+logger = logging.getLogger(__name__)
+
+# Atributos que, junto com os pixels, determinam a imagem em HU
+TAGS_IMAGEM = (
+    "Rows",
+    "Columns",
+    "BitsAllocated",
+    "BitsStored",
+    "PixelRepresentation",
+    "SamplesPerPixel",
+    "PhotometricInterpretation",
+    "RescaleSlope",
+    "RescaleIntercept",
+)
+
+
+@aceita_arquivo
+def chave_resultado(
+    dicom_data: bytes,
+    method: str,
+    params_dict: Dict[str, Any],
+    formato: str = "json",
+) -> str:
+    """
+    Chave do cache de resultados: SHA-256 dos pixels do DICOM (e dos atributos
+    que afetam a conversão para HU), do método e dos parâmetros em forma
+    canônica. Metadados que não alteram a imagem (ex.: dados do paciente) não
+    mudam a chave. Em pixels não comprimidos, apenas os atributos são
+    decodificados e os pixels são lidos diretamente do arquivo.
+
+    args:
+        dicom_data: bytes - Conteúdo do arquivo DICOM (ou o seu caminho).
+        method: str - Nome do método de segmentação.
+        params_dict: Dict[str, Any] - Parâmetros da requisição.
+        formato: str - Formato da resposta serializada ("json" ou "compacto").
+    return:
+        str - Chave hexadecimal.
+    """
+    sha = hashlib.sha256()
+    try:
+        ds, pixels = ler_cabecalho(dicom_data)
+        if pixels is None:
+            ds = pydicom.dcmread(DicomBytesIO(dicom_data))
+        sha.update(str(ds.file_meta.get("TransferSyntaxUID", "")).encode())
+        for tag in TAGS_IMAGEM:
+            sha.update(f"{tag}={ds.get(tag)};".encode())
+        if pixels is None:
+            sha.update(ds.PixelData)
+        else:
+            inicio, tamanho = pixels
+            sha.update(memoryview(dicom_data)[inicio : inicio + tamanho])
+    except Exception:
+        # Arquivo ilegível: usa o conteúdo inteiro (o erro aparece no processamento)
+        sha.update(dicom_data)
+
+    sha.update(method.encode())
+    sha.update(json.dumps(params_dict, sort_keys=True, separators=(",", ":")).encode())
+    if formato != "json":
+        # O JSON mantém as chaves de antes dos demais formatos
+        sha.update(formato.encode())
+    return sha.hexdigest()
+
+
+class CacheResultados:
+    """
+    Cache de resultados serializados (JSON) em dois níveis: LRU em memória e,
+    opcionalmente, arquivos em disco. Os dois níveis são limitados em bytes;
+    ao exceder o limite, as entradas usadas há mais tempo são descartadas.
+    Um resultado encontrado apenas no disco volta para a memória.
+
+    args:
+        max_bytes_memoria: int - Tamanho máximo do nível em memória.
+        diretorio: str - Diretório do nível em disco (None desativa).
+        max_bytes_disco: int - Tamanho máximo do nível em disco.
+    """
+
+    def __init__(
+        self,
+        max_bytes_memoria: int = int(RESULT_CACHE_MEMORY_MB * 2**20),
+        diretorio: Optional[str] = RESULT_CACHE_DIR or None,
+        max_bytes_disco: int = int(RESULT_CACHE_DISK_MB * 2**20),
+    ):
+        self.max_bytes_memoria = max_bytes_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self.diretorio = Path(diretorio) if diretorio else None
+        if self.diretorio is not None:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+
+        self._memoria: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes_memoria = 0
+        self._lock = threading.Lock()
+
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave: str) -> Optional[bytes]:
+        with self._lock:
+            conteudo = self._memoria.get(chave)
+            if conteudo is not None:
+                self._memoria.move_to_end(chave)
+                self.acertos_memoria += 1
+                return conteudo
+
+        conteudo = self._ler_disco(chave)
+        with self._lock:
+            if conteudo is None:
+                self.falhas += 1
+                return None
+            self.acertos_disco += 1
+            self._guardar_memoria(chave, conteudo)
+        return conteudo
+
+    def guardar(self, chave: str, conteudo: bytes) -> None:
+        with self._lock:
+            self._guardar_memoria(chave, conteudo)
+        self._gravar_disco(chave, conteudo)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            acertos = self.acertos_memoria + self.acertos_disco
+            consultas = acertos + self.falhas
+            return {
+                "acertos_memoria": self.acertos_memoria,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "taxa_acerto": acertos / consultas if consultas else 0.0,
+                "descartes": self.descartes,
+                "entradas_memoria": len(self._memoria),
+                "bytes_memoria": self._bytes_memoria,
+                "max_bytes_memoria": self.max_bytes_memoria,
+                "disco": str(self.diretorio) if self.diretorio else None,
+            }
+
+    def _guardar_memoria(self, chave: str, conteudo: bytes) -> None:
+        # Resultados maiores que o próprio cache não são guardados em memória
+        if len(conteudo) > self.max_bytes_memoria:
+            return
+
+        anterior = self._memoria.pop(chave, None)
+        if anterior is not None:
+            self._bytes_memoria -= len(anterior)
+
+        self._memoria[chave] = conteudo
+        self._bytes_memoria += len(conteudo)
+        while self._bytes_memoria > self.max_bytes_memoria:
+            _, descartado = self._memoria.popitem(last=False)
+            self._bytes_memoria -= len(descartado)
+            self.descartes += 1
+
+    def _arquivo(self, chave: str) -> Path:
+        return self.diretorio / f"{chave}.json"
+
+    def _ler_disco(self, chave: str) -> Optional[bytes]:
+        if self.diretorio is None:
+            return None
+        try:
+            arquivo = self._arquivo(chave)
+            conteudo = arquivo.read_bytes()
+            os.utime(arquivo)  # marca como usado recentemente
+            return conteudo
+        except OSError:
+            return None
+
+    def _gravar_disco(self, chave: str, conteudo: bytes) -> None:
+        if self.diretorio is None or len(conteudo) > self.max_bytes_disco:
+            return
+        try:
+            # Escrita atômica: outro processo nunca lê um arquivo pela metade
+            temporario = self._arquivo(chave).with_suffix(f".{os.getpid()}.tmp")
+            temporario.write_bytes(conteudo)
+            os.replace(temporario, self._arquivo(chave))
+            self._limitar_disco()
+        except OSError as e:
+            logger.warning(f"Could not write result cache entry: {e}")
+
+    def _limitar_disco(self) -> None:
+        arquivos = [(a.stat(), a) for a in self.diretorio.glob("*.json")]
+        total = sum(info.st_size for info, _ in arquivos)
+        for info, arquivo in sorted(arquivos, key=lambda item: item[0].st_mtime):
+            if total <= self.max_bytes_disco:
+                break
+            arquivo.unlink(missing_ok=True)
+            total -= info.st_size
+            with self._lock:
+                self.descartes += 1
+
+
+cache_resultados = CacheResultados()
@@ -1 +1,47 @@
 import os
+
+# Quantidade de processos do pool que executa os métodos de segmentação (no
+# mínimo 1)
+SEGMENTATION_WORKERS = max(
+    1, int(os.getenv("SEGMENTATION_WORKERS", os.cpu_count() or 1))
+)
+
+# Quantidade máxima de requisições aguardando um processo livre. Acima disso a
+# API responde 503 para que o cliente tente novamente mais tarde.
+SEGMENTATION_QUEUE_LIMIT = int(os.getenv("SEGMENTATION_QUEUE_LIMIT", 8))
+
+# Tempo máximo (s) que uma fatia do endpoint em lote aguarda uma vaga no pool
+# saturado antes de ser respondida com 503
+SEGMENTATION_BATCH_WAIT = float(os.getenv("SEGMENTATION_BATCH_WAIT", 60))
+
+# Threads do Numba em cada processo do pool, no mínimo 1 (por padrão os núcleos
+# são divididos entre os processos para evitar concorrência entre eles)
+NUMBA_THREADS_PER_WORKER = max(
+    1,
+    int(
+        os.getenv(
+            "NUMBA_THREADS_PER_WORKER",
+            (os.cpu_count() or 1) // SEGMENTATION_WORKERS,
+        )
+    ),
+)
+
+# Compila os kernels do Numba na inicialização de cada processo do pool
+SEGMENTATION_WARMUP = os.getenv("SEGMENTATION_WARMUP", "1") == "1"
+
+# Quantidade máxima de tarefas assíncronas (/jobs) mantidas em memória
+JOBS_MAX_STORED = int(os.getenv("JOBS_MAX_STORED", 100))
+
+# Tempo (s) que o resultado de uma tarefa concluída fica disponível
+JOBS_RESULT_TTL = float(os.getenv("JOBS_RESULT_TTL", 3600))
+
+# Cache de resultados por conteúdo (pixels do DICOM, método e parâmetros):
+# tamanho máximo em memória, diretório do nível em disco (vazio desativa) e
+# tamanho máximo em disco, em MB
+RESULT_CACHE_MEMORY_MB = float(os.getenv("RESULT_CACHE_MEMORY_MB", 256))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+RESULT_CACHE_DISK_MB = float(os.getenv("RESULT_CACHE_DISK_MB", 1024))
+
+# Memória (MB) de cada processo do pool para guardar etapas intermediárias do
+# pipeline (DICOM decodificado, HU, níveis de cinza, filtros e contexto do MCA)
+PIPELINE_CACHE_MB = float(os.getenv("PIPELINE_CACHE_MB", 128))
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from utils.globals import JOBS_MAX_STORED, JOBS_RESULT_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class LimiteTarefasError(Exception):
+    """Todas as vagas do armazenamento estão ocupadas por tarefas em andamento."""
+
+
+class Tarefa:
+    """
+    Estado de uma segmentação executada de forma assíncrona.
+
+    args:
+        metodo: str - Método de segmentação solicitado.
+    """
+
+    def __init__(self, metodo: str):
+        self.id = uuid.uuid4().hex
+        self.metodo = metodo
+        # pendente, executando, concluida, erro ou cancelada
+        self.status = "pendente"
+        self.progresso: Dict[str, Dict[str, Any]] = {}
+        self.resultado: Optional[Dict[str, Any]] = None
+        self.erro: Optional[BaseException] = None
+        self.criada_em = datetime.now(timezone.utc)
+        self.concluida_em: Optional[datetime] = None
+        self._concluida_monotonic: Optional[float] = None
+        self._acompanhamento: Optional[asyncio.Task] = None
+
+    @property
+    def finalizada(self) -> bool:
+        return self.status in ("concluida", "erro", "cancelada")
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "metodo": self.metodo,
+            "status": self.status,
+            "progresso": self.progresso,
+            "erro": str(self.erro) if self.erro is not None else None,
+            "criada_em": self.criada_em.isoformat(),
+            "concluida_em": (
+                self.concluida_em.isoformat() if self.concluida_em else None
+            ),
+        }
+
+
+class ArmazenamentoTarefas:
+    """
+    Armazenamento em memória das tarefas assíncronas (/jobs), limitado em
+    quantidade. Tarefas finalizadas expiram `ttl` segundos após a conclusão e,
+    quando o limite é atingido, as finalizadas mais antigas são descartadas
+    primeiro. Tarefas em andamento nunca são descartadas.
+
+    args:
+        max_tarefas: int - Quantidade máxima de tarefas armazenadas.
+        ttl: float - Tempo (s) que uma tarefa finalizada fica disponível.
+    """
+
+    def __init__(
+        self, max_tarefas: int = JOBS_MAX_STORED, ttl: float = JOBS_RESULT_TTL
+    ):
+        self.max_tarefas = max(1, max_tarefas)
+        self.ttl = ttl
+        self._tarefas: "OrderedDict[str, Tarefa]" = OrderedDict()
+        self._acompanhamentos = set()
+
+    def criar(
+        self,
+        metodo: str,
+        iniciar: Callable[[], AsyncIterator],
+        ao_finalizar: Optional[Callable[[Tarefa], None]] = None,
+    ) -> Tarefa:
+        """
+        Registra uma nova tarefa e começa a acompanhar as mensagens produzidas
+        por `iniciar()` (ver `WorkerPool.transmitir`).
+
+        args:
+            metodo: str - Método de segmentação solicitado.
+            iniciar: Callable - Submete o trabalho e devolve o iterador de
+                                mensagens. Só é chamado se houver vaga.
+            ao_finalizar: Callable - Chamada com a tarefa quando o
+                                     acompanhamento termina, inclusive se a
+                                     tarefa for cancelada.
+        return:
+            Tarefa - Tarefa criada.
+        raises:
+            LimiteTarefasError: Se não houver vaga no armazenamento.
+        """
+        self._expirar()
+        if len(self._tarefas) >= self.max_tarefas and not self._descartar_antiga():
+            raise LimiteTarefasError(
+                f"Limite de {self.max_tarefas} tarefas em andamento atingido"
+            )
+
+        mensagens = iniciar()
+        tarefa = Tarefa(metodo)
+        self._tarefas[tarefa.id] = tarefa
+
+        acompanhamento = asyncio.create_task(self._acompanhar(tarefa, mensagens))
+        self._acompanhamentos.add(acompanhamento)
+        acompanhamento.add_done_callback(self._acompanhamentos.discard)
+        if ao_finalizar is not None:
+            acompanhamento.add_done_callback(lambda _: ao_finalizar(tarefa))
+        tarefa._acompanhamento = acompanhamento
+        return tarefa
+
+    def obter(self, tarefa_id: str) -> Optional[Tarefa]:
+        self._expirar()
+        return self._tarefas.get(tarefa_id)
+
+    async def cancelar(self, tarefa: Tarefa) -> None:
+        """
+        Cancela uma tarefa em andamento: o acompanhamento para e o trabalho no
+        pool é cancelado (ver `WorkerPool.transmitir`). Tarefas finalizadas
+        não são alteradas.
+
+        args:
+            tarefa: Tarefa - Tarefa a cancelar.
+        """
+        if not tarefa.finalizada:
+            tarefa._acompanhamento.cancel()
+            await asyncio.wait({tarefa._acompanhamento})
+
+    async def _acompanhar(self, tarefa: Tarefa, mensagens: AsyncIterator) -> None:
+        try:
+            async for mensagem in mensagens:
+                tarefa.status = "executando"
+                if mensagem["evento"] == "progresso":
+                    tarefa.progresso[mensagem["contorno"]] = {
+                        "iteracao": mensagem["iteracao"],
+                        "perimetro": mensagem["perimetro"],
+                    }
+                elif mensagem["evento"] == "resultado":
+                    tarefa.resultado = mensagem["resultado"]
+            tarefa.status = "concluida"
+        except asyncio.CancelledError:
+            tarefa.status = "cancelada"
+            raise
+        except Exception as e:
+            logger.warning(f"Job {tarefa.id} failed: {e}")
+            tarefa.erro = e
+            tarefa.status = "erro"
+        finally:
+            tarefa.concluida_em = datetime.now(timezone.utc)
+            tarefa._concluida_monotonic = time.monotonic()
+
+    def _expirar(self) -> None:
+        agora = time.monotonic()
+        expiradas = [
+            tarefa_id
+            for tarefa_id, tarefa in self._tarefas.items()
+            if tarefa.finalizada and agora - tarefa._concluida_monotonic > self.ttl
+        ]
+        for tarefa_id in expiradas:
+            del self._tarefas[tarefa_id]
+
+    def _descartar_antiga(self) -> bool:
+        # As tarefas estão em ordem de criação
+        for tarefa_id, tarefa in self._tarefas.items():
+            if tarefa.finalizada:
+                del self._tarefas[tarefa_id]
+                return True
+        return False
+
+
+armazenamento_tarefas = ArmazenamentoTarefas()
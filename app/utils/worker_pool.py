@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.managers import SyncManager
+from typing import Any, AsyncIterator, Callable, Optional
+
+import numba
+
+from utils.globals import (
+    NUMBA_THREADS_PER_WORKER,
+    SEGMENTATION_QUEUE_LIMIT,
+    SEGMENTATION_WARMUP,
+    SEGMENTATION_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturadoError(Exception):
+    """Todos os processos estão ocupados e a fila de espera está cheia."""
+
+
+def _inicializar_worker(numba_threads: int, aquecer: bool) -> None:
+    """
+    Inicializa um processo do pool: limita as threads do Numba e, se
+    solicitado, compila os kernels antes da primeira requisição.
+
+    args:
+        numba_threads: int - Quantidade de threads do Numba no processo.
+        aquecer: bool - Se True, executa o aquecimento do JIT.
+    """
+    numba.set_num_threads(min(numba_threads, numba.config.NUMBA_NUM_THREADS))
+
+    if aquecer:
+        from crud.segmentation import aquecer_jit, threading_layer_seguro
+
+        aquecer_jit()
+        # Com a camada de threads já escolhida, avisa na inicialização se os
+        # pulmões serão segmentados em série
+        threading_layer_seguro()
+
+
+def _nada() -> None:
+    pass
+
+
+class WorkerPool:
+    """
+    Pool de processos que executa os métodos de segmentação fora do event loop.
+
+    Controla quantas tarefas estão em andamento: até `max_workers` executam ao
+    mesmo tempo e até `limite_fila` aguardam um processo livre. Acima disso
+    `executar` lança `PoolSaturadoError`, permitindo responder 503 ao cliente em
+    vez de acumular requisições indefinidamente.
+
+    args:
+        max_workers: int - Quantidade de processos.
+        limite_fila: int - Quantidade máxima de tarefas aguardando um processo.
+        numba_threads: int - Threads do Numba em cada processo.
+        aquecer: bool - Se True, compila os kernels do Numba ao iniciar cada
+                        processo.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = SEGMENTATION_WORKERS,
+        limite_fila: int = SEGMENTATION_QUEUE_LIMIT,
+        numba_threads: int = NUMBA_THREADS_PER_WORKER,
+        aquecer: bool = SEGMENTATION_WARMUP,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.limite_fila = max(0, limite_fila)
+        self.numba_threads = numba_threads
+        self.aquecer = aquecer
+        self.em_andamento = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._gerenciador: Optional[SyncManager] = None
+        self._vaga_livre: Optional[asyncio.Condition] = None
+
+    @property
+    def capacidade(self) -> int:
+        return self.max_workers + self.limite_fila
+
+    def iniciar(self) -> None:
+        if self._executor is not None:
+            return
+
+        # "spawn" evita herdar o estado das threads do Numba/OpenCV do processo pai
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_inicializar_worker,
+            initargs=(self.numba_threads, self.aquecer),
+        )
+        # O executor só cria os processos sob demanda; uma tarefa vazia por
+        # processo força a criação (e o aquecimento) de todos eles agora
+        for _ in range(self.max_workers):
+            self._executor.submit(_nada)
+
+        if self._gerenciador is None:
+            # Fila e evento de `transmitir` precisam ser compartilháveis com
+            # processos "spawn"; o gerenciador também é um processo, então é
+            # criado aqui e não no event loop, na primeira transmissão
+            self._gerenciador = multiprocessing.get_context("spawn").Manager()
+        logger.info(
+            f"Worker pool started with {self.max_workers} workers "
+            f"(queue limit {self.limite_fila})"
+        )
+
+    def encerrar(self) -> None:
+        if self._gerenciador is not None:
+            self._gerenciador.shutdown()
+            self._gerenciador = None
+
+        if self._executor is None:
+            return
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        logger.info("Worker pool stopped")
+
+    async def executar(self, funcao: Callable[..., Any], *args: Any) -> Any:
+        """
+        Executa `funcao(*args)` em um processo do pool sem bloquear o event loop.
+
+        args:
+            funcao: Callable - Função de nível de módulo (serializável).
+            *args: Argumentos serializáveis da função.
+        return:
+            Any - Resultado da função.
+        raises:
+            PoolSaturadoError: Se não houver processo livre nem vaga na fila.
+        """
+        return await asyncio.wrap_future(self._submeter(funcao, *args))
+
+    def transmitir(self, funcao: Callable[..., Any], *args: Any) -> AsyncIterator:
+        """
+        Executa `funcao(fila, cancelar, *args)` em um processo do pool e
+        devolve um iterador assíncrono com as mensagens que a função coloca na
+        `fila`, até que ela coloque `None`. Quando o consumidor para de iterar
+        (ex.: o cliente desconectou), a função é cancelada se ainda aguarda um
+        processo livre; senão, `cancelar` é sinalizado para que ela interrompa
+        o trabalho.
+
+        args:
+            funcao: Callable - Função de nível de módulo (serializável).
+            *args: Argumentos serializáveis da função.
+        return:
+            AsyncIterator - Mensagens produzidas pela função.
+        raises:
+            PoolSaturadoError: Se não houver processo livre nem vaga na fila.
+        """
+        self.iniciar()
+        fila = self._gerenciador.Queue()
+        cancelar = self._gerenciador.Event()
+        future = self._submeter(funcao, fila, cancelar, *args)
+        return self._consumir(future, fila, cancelar)
+
+    async def _consumir(
+        self, future: Future, fila: Any, cancelar: Any
+    ) -> AsyncIterator:
+        try:
+            while True:
+                try:
+                    mensagem = await asyncio.to_thread(fila.get, timeout=1)
+                except queue.Empty:
+                    # O processo pode ter falhado antes de sinalizar o fim
+                    if future.done():
+                        break
+                    continue
+
+                if mensagem is None:
+                    break
+                yield mensagem
+
+            # Propaga a exceção da função, se houver
+            await asyncio.wrap_future(future)
+        finally:
+            # Só tem efeito se a função ainda não foi enviada a um processo;
+            # as já enviadas consultam `cancelar`
+            future.cancel()
+            cancelar.set()
+
+    def _submeter(self, funcao: Callable[..., Any], *args: Any) -> Future:
+        if self.em_andamento >= self.capacidade:
+            raise PoolSaturadoError(
+                f"Servidor ocupado: {self.em_andamento} requisições em andamento"
+            )
+
+        self.iniciar()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(funcao, *args)
+        except BrokenProcessPool:
+            # Um processo morreu (ex.: falta de memória); recria o pool
+            logger.warning("Worker pool is broken, restarting it")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.iniciar()
+            future = self._executor.submit(funcao, *args)
+
+        # A vaga só é liberada quando o processo termina, mesmo que a requisição
+        # seja cancelada antes (ex.: timeout ou cliente desconectado)
+        self.em_andamento += 1
+        future.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._liberar_vaga)
+        )
+        return future
+
+    def _liberar_vaga(self) -> None:
+        self.em_andamento -= 1
+        if self._vaga_livre is not None:
+            asyncio.ensure_future(self._avisar_vaga())
+
+    async def _avisar_vaga(self) -> None:
+        async with self._vaga_livre:
+            self._vaga_livre.notify_all()
+
+    async def aguardar_vaga(self, timeout: float) -> bool:
+        """
+        Aguarda até que uma tarefa termine e libere uma vaga no pool, sem
+        consultar o pool periodicamente. A vaga não é reservada: outra
+        requisição pode ocupá-la antes, e `executar` volta a lançar
+        `PoolSaturadoError`.
+
+        args:
+            timeout: float - Tempo máximo de espera, em segundos.
+        return:
+            bool - True se há vaga livre, False se o tempo acabou antes.
+        """
+        if self._vaga_livre is None:
+            self._vaga_livre = asyncio.Condition()
+
+        async with self._vaga_livre:
+            try:
+                await asyncio.wait_for(
+                    self._vaga_livre.wait_for(
+                        lambda: self.em_andamento < self.capacidade
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+worker_pool = WorkerPool()
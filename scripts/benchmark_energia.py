@@ -0,0 +1,112 @@
+"""
+Compara o tempo de uma iteração do MCACrisp (`passo_mca`: minimização de
+energia de todos os pontos da curva, remoção e inserção de pontos) entre a
+avaliação original da energia, que copia a curva para cada candidato, e a
+avaliação incremental de `minimiza_energia_incremental`.
+
+Uso (a partir da raiz do repositório):
+    python scripts/benchmark_energia.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numba
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from crud.segmentacao.curva import (  # noqa: E402
+    adicionar_pontos_buffer,
+    remover_pontos_buffer,
+)
+from crud.segmentacao.energia import energia_total  # noqa: E402
+from crud.segmentation import passo_mca  # noqa: E402
+
+
+@numba.njit
+def minimiza_energia_copiando(
+    curva, indice, energia_crisp, area_de_busca, w_adapt, w_cont
+):
+    # Avaliação original: uma cópia da curva e um ray casting O(n) por candidato
+    amplitude = np.arange(-(area_de_busca // 2), area_de_busca // 2 + 1)
+    deslocamentos = np.array([[dx, dy] for dx in amplitude for dy in amplitude])
+    possiveis_pontos = deslocamentos + curva[indice]
+
+    energias = np.zeros(area_de_busca**2)
+    for i in range(area_de_busca**2):
+        curva_modificada = curva.copy()
+        curva_modificada[indice] = possiveis_pontos[i]
+        energias[i] = energia_total(
+            curva_modificada, indice, energia_crisp, w_adapt=w_adapt, w_cont=w_cont
+        )
+    return possiveis_pontos[np.argmax(energias)]
+
+
+@numba.njit(parallel=True)
+def passo_mca_copiando(
+    curva,
+    n,
+    auxiliar,
+    energia_crisp,
+    mascara_pulmao,
+    area_de_busca,
+    w_adapt,
+    w_cont,
+    alpha,
+    d_max,
+):
+    # Mesma iteração de `passo_mca`, com a minimização original
+    for i in numba.prange(n):
+        auxiliar[i] = minimiza_energia_copiando(
+            curva[:n], i, energia_crisp, area_de_busca, w_adapt, w_cont
+        )
+    curva[:n] = auxiliar[:n]
+
+    n = remover_pontos_buffer(curva, n, alpha, auxiliar)
+    return adicionar_pontos_buffer(curva, n, mascara_pulmao, d_max, auxiliar)
+
+
+def iteracao(passo, curva, *args):
+    # Os buffers são sobrescritos por `passo`: uma cópia da curva por chamada
+    buffer = np.empty((2 * len(curva), 2))
+    buffer[: len(curva)] = curva
+    n, _ = passo(buffer, len(curva), np.empty_like(buffer), *args)
+    return buffer[:n]
+
+
+def curva_circular(n, raio=150, centro=256):
+    angulos = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return (centro + np.c_[np.cos(angulos), np.sin(angulos)] * raio).astype(np.int16)
+
+
+def medir(funcao, *args, repeticoes=5):
+    funcao(*args)  # compilação
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(*args)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+if __name__ == "__main__":
+    energia_crisp = np.random.default_rng(0).random((512, 512))
+    mascara_pulmao = np.ones((512, 512), dtype=bool)
+    area_de_busca, w_adapt, w_cont, alpha, d_max = 9, 0.1, 0.6, 10, 20
+
+    print(f"{'pontos':>8} {'copiando (ms)':>15} {'incremental (ms)':>17} {'ganho':>8}")
+    for n in (30, 60, 120, 240, 480):
+        curva = curva_circular(n)
+        args = (curva, energia_crisp, mascara_pulmao, area_de_busca, w_adapt)
+        args += (w_cont, alpha, d_max)
+
+        assert np.array_equal(
+            iteracao(passo_mca_copiando, *args), iteracao(passo_mca, *args)
+        )
+
+        t_copia = medir(iteracao, passo_mca_copiando, *args)
+        t_incremental = medir(iteracao, passo_mca, *args)
+        print(
+            f"{n:>8} {t_copia * 1e3:>15.3f} {t_incremental * 1e3:>17.3f} "
+            f"{t_copia / t_incremental:>7.1f}x"
+        )
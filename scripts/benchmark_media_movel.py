@@ -0,0 +1,70 @@
+"""
+Compara o tempo da média móvel da limiarização `lim_media_mov` entre o laço
+original, ponto a ponto em cada linha, e a versão vetorizada por somas
+acumuladas de `media_movel` (linhas independentes e varredura em zigue-zague).
+
+Uso (a partir da raiz do repositório):
+    python scripts/benchmark_media_movel.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from crud.alternativas.lim_media_mov import media_movel  # noqa: E402
+
+
+def media_movel_laco(linhas, n):
+    # Laço original de `aplicar_limiarizacao_media_movel`
+    media = np.zeros_like(linhas)
+    for y in range(linhas.shape[0]):
+        linha = linhas[y]
+        media[y, 0] = linha[0] / n
+        soma = linha[0]
+        for x in range(1, linhas.shape[1]):
+            if x < n:
+                soma += linha[x]
+                media[y, x] = soma / (x + 1)
+            else:
+                soma += linha[x] - linha[x - n]
+                media[y, x] = soma / n
+    return media
+
+
+def zigzag(imagem):
+    sequencia = imagem.copy()
+    sequencia[1::2] = sequencia[1::2, ::-1]
+    return sequencia.reshape(1, -1)
+
+
+def medir(funcao, *args, repeticoes=3):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(*args)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n = 171
+
+    print(
+        f"{'imagem':>10} {'laço (ms)':>11} {'linhas (ms)':>12} "
+        f"{'zigue-zague (ms)':>17} {'ganho':>8}"
+    )
+    for lado in (128, 256, 512, 1024):
+        imagem = rng.integers(0, 256, (lado, lado)).astype(np.float32)
+
+        assert np.array_equal(media_movel_laco(imagem, n), media_movel(imagem, n))
+
+        t_laco = medir(media_movel_laco, imagem, n)
+        t_linhas = medir(media_movel, imagem, n)
+        t_zigzag = medir(lambda: media_movel(zigzag(imagem), n))
+        print(
+            f"{f'{lado}x{lado}':>10} {t_laco * 1e3:>11.3f} {t_linhas * 1e3:>12.3f} "
+            f"{t_zigzag * 1e3:>17.3f} {t_laco / t_linhas:>7.1f}x"
+        )
@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.div_e_fus_regioes import (
+    aplicar_divisao_e_fusao,
+    dividir_regioes,
+    imagem_integral,
+)
+
+
+def divisao_recursiva(imagem, limite_var=40, limite_media=40, referencia_media=5):
+    # Versão recursiva original (somente divisão)
+    altura, largura = imagem.shape
+    segmentos = np.zeros_like(imagem, dtype=np.uint8)
+
+    def dividir(x, y, tamanho):
+        if tamanho < 1:
+            return
+        subregiao = imagem[y : y + tamanho, x : x + tamanho]
+        if (
+            np.var(subregiao) < limite_var
+            and abs(np.mean(subregiao) - referencia_media) < limite_media
+        ):
+            segmentos[y : y + tamanho, x : x + tamanho] = 255
+        else:
+            metade = tamanho // 2
+            dividir(x, y, metade)
+            dividir(x + metade, y, metade)
+            dividir(x, y + metade, metade)
+            dividir(x + metade, y + metade, metade)
+
+    dividir(0, 0, min(altura, largura))
+
+    kernel = np.ones((5, 5), np.uint8)
+    segmentos = cv2.morphologyEx(segmentos, cv2.MORPH_CLOSE, kernel, iterations=2)
+    return cv2.morphologyEx(segmentos, cv2.MORPH_OPEN, kernel, iterations=2)
+
+
+def imagem_pulmao(altura, largura, semente=0):
+    # Fundo claro com duas regiões escuras e ruído
+    rng = np.random.default_rng(semente)
+    imagem = np.full((altura, largura), 120.0)
+    imagem[altura // 4 : 3 * altura // 4, largura // 8 : 3 * largura // 8] = 10
+    imagem[altura // 4 : 3 * altura // 4, 5 * largura // 8 : 7 * largura // 8] = 0
+    imagem += rng.normal(0, 4, imagem.shape)
+    return np.clip(imagem, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("altura, largura", [(64, 64), (128, 128)])
+def test_divisao_igual_recursiva(altura, largura):
+    # Em imagens quadradas com lado potência de 2 as duas divisões coincidem
+    imagem = imagem_pulmao(altura, largura)
+    assert_array_equal(aplicar_divisao_e_fusao(imagem), divisao_recursiva(imagem))
+
+
+@pytest.mark.parametrize(
+    "altura, largura, criterios",
+    [
+        (100, 100, (20, 30, 10)),  # Divisões com metades ímpares
+        (96, 128, (40, 40, 5)),  # Retangular: só o quadrado inicial é dividido
+    ],
+)
+def test_divisao_quadrada_igual_recursiva(altura, largura, criterios):
+    imagem = imagem_pulmao(altura, largura)
+    assert_array_equal(
+        aplicar_divisao_e_fusao(imagem, *criterios, divisao_quadrada=True),
+        divisao_recursiva(imagem, *criterios),
+    )
+
+
+@pytest.mark.parametrize("altura, largura", [(300, 512), (512, 300), (101, 77)])
+def test_divisao_cobre_todos_os_pixels(altura, largura):
+    imagem = imagem_pulmao(altura, largura)
+    valores = imagem.astype(np.int64)
+    regioes, _ = dividir_regioes(
+        imagem_integral(valores), imagem_integral(valores * valores), 40, 5, 40
+    )
+
+    cobertura = np.zeros((altura, largura), dtype=int)
+    for x, y, w, h in regioes:
+        cobertura[y : y + h, x : x + w] += 1
+    assert_array_equal(cobertura, 1)
+
+
+def test_divisao_retangular_segmenta_alem_do_menor_lado():
+    # Região homogênea (pulmão) só nas colunas além das 300 primeiras
+    imagem = np.full((300, 512), 120, dtype=np.uint8)
+    imagem[50:250, 350:480] = 5
+
+    mascara = aplicar_divisao_e_fusao(imagem)
+    assert np.all(mascara[60:240, 360:470] == 255)
+    assert not np.any(aplicar_divisao_e_fusao(imagem, divisao_quadrada=True))
+
+
+def test_fusao_mantem_regioes_homogeneas():
+    imagem = imagem_pulmao(128, 128)
+    divisao = aplicar_divisao_e_fusao(imagem)
+    fusao = aplicar_divisao_e_fusao(imagem, aplicar_fusao=True)
+    assert fusao.shape == divisao.shape and fusao.dtype == np.uint8
+    assert np.count_nonzero(fusao) > 0
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.hu_para_cinza import quantizar_hu
+
+
+@pytest.mark.parametrize(
+    "largura_bin, janela_hu, quantidade_esperada",
+    [
+        (1, (-1000, 2000), 3001),
+        (10, (-1000, 2000), 301),
+        (12, (-1000, 2000), 251),
+        (2.5, (-1200, 600), 721),
+        (7, (-1000, -745), 37),
+    ],
+)
+def test_quantizar_hu_bins(largura_bin, janela_hu, quantidade_esperada):
+    hu_min, hu_max = janela_hu
+    imagem_hu = np.random.default_rng(0).integers(-2000, 3000, (64, 64))
+    imagem_hu = imagem_hu.astype(np.int16)
+
+    indices, quantidade_bins = quantizar_hu(imagem_hu, largura_bin, hu_min, hu_max)
+
+    recortada = np.clip(imagem_hu.astype(np.float64), hu_min, hu_max)
+    assert quantidade_bins == quantidade_esperada
+    assert indices.dtype == np.uint16
+    assert_array_equal(indices, np.floor((recortada - hu_min) / largura_bin))
+    assert indices.max() < quantidade_bins
+
+
+def test_quantizar_hu_imagem_float():
+    imagem_hu = np.array([[-1500.0, -1000.0, -999.5], [-0.5, 0.0, 2500.0]])
+    indices, quantidade_bins = quantizar_hu(imagem_hu)
+
+    assert quantidade_bins == 3001
+    assert_array_equal(indices, [[0, 0, 0], [999, 1000, 3000]])
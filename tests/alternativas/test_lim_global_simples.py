@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import numpy as np
+import pydicom
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.lim_global_simples import (
+    ajustar_limiar,
+    aplicar_lim_global_simples,
+    aplicar_lim_global_simples_hu,
+)
+from crud.alternativas.to_hu import converte_para_hu_e_cinza
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+
+def ajuste_pixel_a_pixel(imagem, limiar, delta_limiar):
+    """Laço original, que separa os pixels da imagem a cada iteração."""
+    mod_limiar_dif = float("inf")
+    limiar_n = limiar
+    iteracoes = 0
+    while mod_limiar_dif > delta_limiar:
+        grupo_maior = imagem[imagem > limiar_n]
+        grupo_menor = imagem[imagem <= limiar_n]
+        media_maior = np.mean(grupo_maior) if grupo_maior.size > 0 else 0
+        media_menor_igual = np.mean(grupo_menor) if grupo_menor.size > 0 else 0
+        limiar_n_anterior = limiar_n
+        limiar_n = (media_maior + media_menor_igual) / 2
+        iteracoes += 1
+        mod_limiar_dif = abs(limiar_n_anterior - limiar_n)
+    return limiar_n, iteracoes
+
+
+def imagens_dicom():
+    ds = pydicom.dcmread(DICOM)
+    return converte_para_hu_e_cinza(ds.pixel_array, ds)
+
+
+def imagens_cinza():
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        medias = rng.integers(0, 256, 2)
+        desvios = rng.integers(2, 40, 2)
+        escolha = rng.random((64, 64)) < rng.uniform(0.1, 0.9)
+        valores = np.where(
+            escolha,
+            rng.normal(medias[0], desvios[0], (64, 64)),
+            rng.normal(medias[1], desvios[1], (64, 64)),
+        )
+        yield np.clip(valores, 0, 255).astype(np.uint8)
+    yield imagens_dicom()[1]
+
+
+@pytest.mark.parametrize("imagem", list(imagens_cinza()))
+@pytest.mark.parametrize("limiar, delta_limiar", [(50, 5), (200, 0.5), (0, 1)])
+def test_ajustar_limiar_igual_laco_original(imagem, limiar, delta_limiar):
+    histograma = np.bincount(imagem.ravel(), minlength=256)
+    limiar_n, iteracoes = ajustar_limiar(histograma, limiar, delta_limiar)
+
+    esperado, iteracoes_esperadas = ajuste_pixel_a_pixel(imagem, limiar, delta_limiar)
+    assert limiar_n == pytest.approx(esperado, rel=1e-9)
+    assert iteracoes == iteracoes_esperadas
+
+
+def test_aplicar_lim_global_simples_retorna_mascara_limiar_e_iteracoes():
+    imagem = imagens_dicom()[1]
+    mascara, limiar_n, iteracoes = aplicar_lim_global_simples(imagem, 50, 5)
+
+    esperado, iteracoes_esperadas = ajuste_pixel_a_pixel(imagem, 50, 5)
+    assert isinstance(limiar_n, float)
+    assert limiar_n == pytest.approx(esperado, rel=1e-9)
+    assert iteracoes == iteracoes_esperadas
+    assert mascara.dtype == np.uint8
+    assert_array_equal(mascara, np.where(imagem > limiar_n, 0, 255))
+
+
+def test_aplicar_lim_global_simples_hu_igual_laco_em_hu():
+    imagem_hu = imagens_dicom()[0]
+    mascara, limiar_n, iteracoes = aplicar_lim_global_simples_hu(imagem_hu, -400, 5)
+
+    # Com bins de 1 HU, o ajuste sobre o histograma é o laço sobre os pixels
+    # da janela [-1000, 2000]
+    recortada = np.clip(imagem_hu, -1000, 2000).astype(np.float64)
+    esperado, iteracoes_esperadas = ajuste_pixel_a_pixel(recortada, -400, 5)
+    assert limiar_n == pytest.approx(esperado, rel=1e-9)
+    assert iteracoes == iteracoes_esperadas
+    assert_array_equal(mascara, np.where(recortada <= limiar_n, 255, 0))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.lim_media_mov import media_movel
+
+
+def media_movel_laco(linha, n):
+    # Laço original de `aplicar_limiarizacao_media_movel`
+    media = np.zeros_like(linha)
+    media[0] = linha[0] / n
+    soma = linha[0]
+    for x in range(1, len(linha)):
+        if x < n:
+            soma += linha[x]
+            media[x] = soma / (x + 1)
+        else:
+            soma += linha[x] - linha[x - n]
+            media[x] = soma / n
+    return media
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 171, 600])
+def test_media_movel_igual_laco(n):
+    imagem = np.random.default_rng(n).integers(0, 256, (16, 512))
+    linhas = imagem.astype(np.float32)
+
+    esperado = np.array([media_movel_laco(linha, n) for linha in linhas])
+    resultado = media_movel(linhas, n)
+
+    assert resultado.dtype == np.float32
+    assert_array_equal(resultado, esperado)
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.lim_multipla import (
+    classificar_pixel,
+    limiarizacao_multipla,
+    limiarizacao_multipla_hu,
+    tabela_classes,
+    tabela_mascara,
+)
+
+LIMITES = {
+    "padrao": ((0, 8), (8, 42), (42, 76), (76, 93), (136, 255)),
+    # Intervalos sobrepostos: a classe é a do primeiro, a máscara é a união
+    "sobrepostos": ((0, 50), (30, 80), (60, 120), (100, 200), (150, 255)),
+    # Lacunas sem classe (5) e um intervalo vazio
+    "lacunas": ((10, 20), (40, 30), (60, 70), (90, 100), (200, 220)),
+}
+
+ATIVACOES = [
+    (True, True, True, False, False, False),
+    (False, True, False, True, True, False),
+    (True, False, True, False, False, True),
+]
+
+
+def referencia(imagem, limites, ativacoes):
+    """Classificação e máscara pixel a pixel, como antes das tabelas."""
+    classes = np.zeros(imagem.shape, dtype=np.uint8)
+    mascara = np.zeros(imagem.shape, dtype=np.uint8)
+    for i, j in np.ndindex(imagem.shape):
+        valor = imagem[i, j]
+        classes[i, j] = classificar_pixel(valor, *limites)
+        for k, (inicio, fim) in enumerate(limites):
+            dentro = inicio <= valor <= fim if k == 4 else inicio <= valor < fim
+            if ativacoes[k] and dentro:
+                mascara[i, j] = 255
+    if ativacoes[5]:
+        mascara[mascara == 0] = 255
+    return mascara, classes
+
+
+@pytest.mark.parametrize("nome", LIMITES)
+def test_tabelas_iguais_classificar_pixel(nome):
+    limites = LIMITES[nome]
+    niveis = np.arange(256).reshape(16, 16)
+    for ativacoes in ATIVACOES:
+        mascara, classes = referencia(niveis, limites, ativacoes)
+        assert_array_equal(tabela_classes(*limites), classes.ravel())
+        assert_array_equal(tabela_mascara(*limites, *ativacoes), mascara.ravel())
+
+
+@pytest.mark.parametrize("nome", LIMITES)
+@pytest.mark.parametrize("ativacoes", ATIVACOES)
+def test_limiarizacao_multipla_igual_pixel_a_pixel(nome, ativacoes):
+    imagem = np.random.default_rng(0).integers(0, 256, (40, 40), dtype=np.uint8)
+    mascara, classes = limiarizacao_multipla(imagem, *LIMITES[nome], *ativacoes)
+
+    mascara_esperada, classes_esperadas = referencia(imagem, LIMITES[nome], ativacoes)
+    assert mascara.dtype == classes.dtype == np.uint8
+    assert_array_equal(mascara, mascara_esperada)
+    assert_array_equal(classes, classes_esperadas)
+
+
+def test_limiarizacao_multipla_sem_classes():
+    imagem = np.random.default_rng(1).integers(0, 256, (40, 40), dtype=np.uint8)
+    com_classes = limiarizacao_multipla(imagem)
+    sem_classes = limiarizacao_multipla(imagem, calcular_classes=False)
+
+    assert isinstance(sem_classes, tuple) and len(sem_classes) == 2
+    assert sem_classes[1] is None
+    assert_array_equal(sem_classes[0], com_classes[0])
+
+
+@pytest.mark.parametrize("largura_bin", [1, 10, 2.5])
+def test_limiarizacao_multipla_hu_classifica_o_inicio_do_bin(largura_bin):
+    limites = ((-1000, -900), (-900, -500), (-500, -100), (-100, 100), (300, 2000))
+    ativacoes = (True, True, False, False, True, False)
+    imagem_hu = np.random.default_rng(2).integers(-1500, 2500, (40, 40))
+    imagem_hu = imagem_hu.astype(np.int16)
+
+    mascara, classes = limiarizacao_multipla_hu(
+        imagem_hu, *limites, *ativacoes, largura_bin=largura_bin
+    )
+
+    # Cada pixel vale o início do seu bin na janela [-1000, 2000]
+    recortada = np.clip(imagem_hu, -1000, 2000).astype(np.float64)
+    inicio_bin = -1000 + np.floor((recortada + 1000) / largura_bin) * largura_bin
+    mascara_esperada, classes_esperadas = referencia(inicio_bin, limites, ativacoes)
+    assert_array_equal(mascara, mascara_esperada)
+    assert_array_equal(classes, classes_esperadas)
+
+    sem_classes = limiarizacao_multipla_hu(
+        imagem_hu, *limites, *ativacoes, calcular_classes=False
+    )
+    assert sem_classes[1] is None
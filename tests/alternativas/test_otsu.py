@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pydicom
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.hu_para_cinza import quantizar_hu
+from crud.alternativas.otsu import aplicar_otsu_hu
+from crud.alternativas.to_hu import converte_para_hu_e_cinza
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+
+def imagem_hu():
+    ds = pydicom.dcmread(DICOM)
+    return converte_para_hu_e_cinza(ds.pixel_array, ds)[0]
+
+
+@pytest.mark.parametrize(
+    "largura_bin, hu_min, hu_max",
+    [
+        (12, -1000, 2000),  # 251 bins na janela padrão
+        (1, -1000, -745),  # 256 bins de 1 HU
+        (4, -1100, -80),
+    ],
+)
+def test_aplicar_otsu_hu_igual_otsu_da_imagem_quantizada(largura_bin, hu_min, hu_max):
+    imagem = imagem_hu()
+    mascara, limiar = aplicar_otsu_hu(imagem, largura_bin, hu_min, hu_max)
+
+    # Com até 256 bins, os índices são uma imagem de 8 bits para o cv2
+    indices, _ = quantizar_hu(imagem, largura_bin, hu_min, hu_max)
+    limiar_cv2, mascara_cv2 = cv2.threshold(
+        indices.astype(np.uint8), 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU
+    )
+    assert limiar == hu_min + limiar_cv2 * largura_bin
+    assert_array_equal(mascara, mascara_cv2)
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pydicom
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.particiona_otsu import (
+    dividir_imagem,
+    histogramas_blocos,
+    limiares_otsu,
+    segmentar_imagem,
+)
+from crud.alternativas.to_hu import converte_para_hu_e_cinza
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+
+def imagens():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        # Duas populações com médias, desvios e proporções aleatórias
+        medias = rng.integers(0, 256, 2)
+        desvios = rng.integers(2, 40, 2)
+        proporcao = rng.uniform(0.1, 0.9)
+        escolha = rng.random((64, 64)) < proporcao
+        valores = np.where(
+            escolha,
+            rng.normal(medias[0], desvios[0], (64, 64)),
+            rng.normal(medias[1], desvios[1], (64, 64)),
+        )
+        yield np.clip(valores, 0, 255).astype(np.uint8)
+
+    ds = pydicom.dcmread(DICOM)
+    _, cinza = converte_para_hu_e_cinza(ds.pixel_array, ds)
+    yield cinza
+
+
+@pytest.mark.parametrize("imagem", list(imagens()))
+def test_limiares_otsu_igual_cv2(imagem):
+    limiar_cv2, mascara_cv2 = cv2.threshold(
+        imagem, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU
+    )
+    histograma = np.bincount(imagem.ravel(), minlength=256)[None]
+    assert limiares_otsu(histograma)[0] == limiar_cv2
+
+    # Grade 1x1: um único limiar, sem interpolação
+    assert_array_equal(segmentar_imagem(imagem, (1, 1), 0), mascara_cv2)
+
+
+def test_limiares_otsu_varios_histogramas():
+    lista = list(imagens())
+    histogramas = np.stack([np.bincount(i.ravel(), minlength=256) for i in lista])
+    esperado = [limiares_otsu(h[None])[0] for h in histogramas]
+    assert_array_equal(limiares_otsu(histogramas), esperado)
+
+
+@pytest.mark.parametrize(
+    "forma, grid_size, overlap",
+    [
+        ((64, 64), (2, 3), 20),
+        ((512, 512), (2, 3), 20),
+        ((101, 77), (4, 5), 3),
+        ((30, 40), (3, 3), 50),
+        ((50, 50), (1, 1), 0),
+    ],
+)
+def test_histogramas_blocos_igual_por_bloco(forma, grid_size, overlap):
+    imagem = np.random.default_rng(1).integers(0, 256, forma, dtype=np.uint8)
+    esperado = np.stack(
+        [
+            np.bincount(sub_imagem.ravel(), minlength=256)
+            for _, sub_imagem in dividir_imagem(imagem, grid_size, overlap)
+        ]
+    )
+    assert_array_equal(histogramas_blocos(imagem, grid_size, overlap), esperado)
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import numpy as np
+import pydicom
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.hu_para_cinza import converter_hu_para_cinza
+from crud.alternativas.to_hu import (
+    converte_para_hu,
+    converte_para_hu_e_cinza,
+    intervalo_armazenado,
+)
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+
+def dataset(bits, slope, intercept):
+    ds = pydicom.Dataset()
+    ds.BitsStored = bits
+    ds.RescaleSlope = slope
+    ds.RescaleIntercept = intercept
+    return ds
+
+
+def conferir(pixel_array, ds, hu_min=-1000, hu_max=2000):
+    esperado_hu = converte_para_hu(pixel_array, ds)
+    esperado_cinza = converter_hu_para_cinza(esperado_hu, hu_min, hu_max)
+    imagem_hu, imagem_cinza = converte_para_hu_e_cinza(pixel_array, ds, hu_min, hu_max)
+
+    assert_array_equal(imagem_hu, esperado_hu)
+    assert_array_equal(imagem_cinza, esperado_cinza)
+    assert imagem_cinza.dtype == np.uint8
+    return imagem_hu
+
+
+@pytest.mark.parametrize(
+    "tipo, bits, slope, intercept, hu_inteiro",
+    [
+        (np.uint16, 12, 1, -1024, True),
+        (np.int16, 16, 1, 0, True),
+        (np.int16, 12, 1, -1024, True),
+        (np.uint8, 8, 2, -1000, True),
+        (np.uint16, 12, 0.5, -1024.3, False),  # HU não inteiro: float64
+        (np.uint16, 16, 1, -1024, False),  # Fora do int16: float64
+        (">u2", 12, 1, -1024, None),  # Big-endian: conversão direta
+        (np.float32, 0, 1, -1024, None),  # Não inteiro: conversão direta
+    ],
+)
+def test_hu_e_cinza_igual_conversoes_separadas(
+    tipo, bits, slope, intercept, hu_inteiro
+):
+    rng = np.random.default_rng(0)
+    dtype = np.dtype(tipo)
+    menor, maior = intervalo_armazenado(dtype, bits or 12)
+    pixel_array = rng.integers(menor, maior, (64, 64), endpoint=True).astype(dtype)
+    pixel_array[0, :2] = menor, maior
+
+    imagem_hu = conferir(pixel_array, dataset(bits, slope, intercept))
+    if hu_inteiro is not None:
+        assert (imagem_hu.dtype == np.int16) == hu_inteiro
+
+
+def test_hu_e_cinza_bits_alem_de_bits_stored():
+    # Valores acima de BitsStored: tabela de todo o tipo
+    pixel_array = np.array([[0, 4095, 4096, 65535]], dtype=np.uint16)
+    conferir(pixel_array, dataset(12, 1, -1024))
+
+
+def test_hu_e_cinza_janela():
+    ds = pydicom.dcmread(DICOM)
+    conferir(ds.pixel_array, ds)
+    conferir(ds.pixel_array, ds, hu_min=-1000, hu_max=400)
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+from crud.processamento import (
+    JANELA_HU,
+    METODOS,
+    METODOS_DOMINIO_HU,
+    ParametrosInvalidosError,
+    parametros_dominio,
+    processar_segmentacao,
+)
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+METODOS_SOMENTE_CINZA = [m for m in METODOS if m not in METODOS_DOMINIO_HU]
+
+
+@pytest.mark.parametrize("method", METODOS_DOMINIO_HU)
+def test_parametros_dominio_hu(method):
+    assert parametros_dominio(method, {}) == ("cinza", 1.0, JANELA_HU)
+    assert parametros_dominio(
+        method, {"dominio": "hu", "largura_bin": "2.5", "janela_hu": "-1200,600"}
+    ) == ("hu", 2.5, (-1200, 600))
+
+
+@pytest.mark.parametrize("method", METODOS_SOMENTE_CINZA)
+def test_parametros_dominio_hu_rejeita_metodo(method):
+    assert parametros_dominio(method, {})[0] == "cinza"
+    with pytest.raises(ParametrosInvalidosError, match="não aceita o domínio"):
+        parametros_dominio(method, {"dominio": "hu"})
+
+
+@pytest.mark.parametrize(
+    "segmentation_params",
+    [
+        {"dominio": "rgb"},
+        {"dominio": "hu", "largura_bin": "0"},
+        {"dominio": "hu", "largura_bin": "abc"},
+        {"dominio": "hu", "janela_hu": "2000,-1000"},
+        {"dominio": "hu", "janela_hu": "-1000"},
+        {"dominio": "hu", "largura_bin": "0.01"},
+    ],
+)
+def test_parametros_dominio_invalidos(segmentation_params):
+    with pytest.raises(ParametrosInvalidosError):
+        parametros_dominio("otsu", segmentation_params)
+
+
+@pytest.mark.parametrize("method", ["watershed", "sauvola", "particiona_otsu"])
+def test_processar_segmentacao_rejeita_dominio_hu(method):
+    # ParametrosInvalidosError é respondido com 400 pelos endpoints
+    params = {"segmentation_params": {"dominio": "hu"}}
+    with pytest.raises(ParametrosInvalidosError, match="não aceita o domínio"):
+        processar_segmentacao(DICOM.read_bytes(), method, params)
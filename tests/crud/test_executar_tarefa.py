@@ -0,0 +1,18 @@
+import queue
+import threading
+
+import pytest
+from crud.processamento import TarefaCanceladaError, executar_tarefa
+
+
+def test_executar_tarefa_cancelada_antes_de_iniciar():
+    fila = queue.Queue()
+    cancelar = threading.Event()
+    cancelar.set()
+
+    with pytest.raises(TarefaCanceladaError):
+        executar_tarefa(fila, cancelar, b"", "otsu", {})
+
+    # Nenhuma mensagem além do fim
+    assert fila.get_nowait() is None
+    assert fila.empty()
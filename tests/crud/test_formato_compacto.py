@@ -0,0 +1,128 @@
+import base64
+import copy
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+from numpy.testing import assert_array_equal
+from crud.formato_compacto import ASSINATURA, codificar_compacto
+from crud.processamento import processar_segmentacao
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+PARAMS = {
+    "segmentation_params": {},
+    "preprocessing_params": {
+        "aplicar_desfoque_media": False,
+        "aplicar_desfoque_gaussiano": False,
+        "aplicar_desfoque_mediana": False,
+        "tamanho_kernel": "5",
+        "sigma": "0",
+    },
+    "postprocessing_params": {"area_minima": 100},
+}
+
+LIM_MULTIPLA = {
+    "lim_hiperaeradas": "0,8",
+    "lim_normalmente_aeradas": "8,42",
+    "lim_pouco_aeradas": "42,76",
+    "lim_nao_aeradas": "76,93",
+    "lim_osso": "136,255",
+    "ativacao_hiperaeradas": True,
+    "ativacao_normalmente_aeradas": True,
+    "ativacao_pouco_aeradas": True,
+    "ativacao_nao_aeradas": False,
+    "ativacao_osso": False,
+    "ativacao_nao_classificado": False,
+}
+
+
+def decodificar_compacto(dados):
+    # Leitura do formato descrito em `codificar_compacto`
+    assert dados[:4] == ASSINATURA
+    (tamanho,) = struct.unpack("<I", dados[4:8])
+    cabecalho = json.loads(dados[8 : 8 + tamanho])
+    posicao = 8 + tamanho
+    assert posicao % 4 == 0
+
+    resultado = {}
+    for grupo in ("contornos_validos", "todos_os_contornos"):
+        if grupo not in cabecalho:
+            continue
+        chaves = cabecalho[grupo]["chaves"]
+        deslocamentos = np.frombuffer(dados, "<u4", len(chaves) + 1, posicao)
+        posicao += deslocamentos.nbytes
+        dtype = "<i2" if cabecalho[grupo]["tipo"] == "int16" else "<f4"
+        pontos = np.frombuffer(dados, dtype, 2 * int(deslocamentos[-1]), posicao)
+        posicao += pontos.nbytes
+        pontos = pontos.reshape(-1, 2)
+        resultado[grupo] = {
+            chave: pontos[inicio:fim]
+            for chave, inicio, fim in zip(chaves, deslocamentos[:-1], deslocamentos[1:])
+        }
+
+    png = dados[posicao : posicao + cabecalho["imagem_png_bytes"]]
+    posicao += len(png)
+    if png:
+        resultado["imagem_pre_processada"] = base64.b64encode(png).decode()
+    if "diagnostico" in cabecalho:
+        resultado["diagnostico"] = cabecalho["diagnostico"]
+    if "mapa_classes_png_bytes" in cabecalho:
+        mapa = dados[posicao : posicao + cabecalho["mapa_classes_png_bytes"]]
+        posicao += len(mapa)
+        resultado["mapa_classes"] = base64.b64encode(mapa).decode()
+
+    assert posicao == len(dados)
+    return resultado
+
+
+def comparar(decodificado, resultado):
+    assert decodificado.keys() == resultado.keys()
+    for chave, valor in resultado.items():
+        if chave in ("contornos_validos", "todos_os_contornos"):
+            assert list(decodificado[chave]) == list(valor)
+            for nome, contorno in valor.items():
+                esperado = np.asarray(contorno).reshape(-1, 2)
+                pontos = decodificado[chave][nome]
+                assert_array_equal(pontos, esperado.astype(pontos.dtype))
+        else:
+            assert decodificado[chave] == valor
+
+
+def test_compacto_igual_json():
+    dados = DICOM.read_bytes()
+    incluir = {"include": ["contornos_validos", "mapa_classes", "diagnostico"]}
+    extras = set()
+    for metodo, segmentation_params, output_params in (
+        ("otsu", {}, {}),
+        ("otsu", {"dominio": "hu"}, incluir),
+        ("lim_global_simples", {"limiar": "50", "delta_limiar": "5"}, {}),
+        ("lim_multipla", LIM_MULTIPLA, incluir),
+    ):
+        params = dict(
+            PARAMS,
+            segmentation_params=segmentation_params,
+            output_params=output_params,
+        )
+        resultado = processar_segmentacao(dados, metodo, copy.deepcopy(params))
+        resultado = json.loads(json.dumps(resultado))
+        assert resultado["contornos_validos"]
+        comparar(decodificar_compacto(codificar_compacto(resultado)), resultado)
+        extras.update(resultado.keys() & {"diagnostico", "mapa_classes"})
+
+    assert extras == {"diagnostico", "mapa_classes"}
+
+
+def test_compacto_pontos_float_e_contorno_unico():
+    resultado = {
+        "contornos_validos": {
+            "contorno_0": [[10.25, 20.5], [11.75, 21.0], [12.0, 22.5]],
+            "contorno_1": [5, 6],  # Um único ponto, sem o `squeeze`
+        },
+        "todos_os_contornos": {},
+        "imagem_pre_processada": base64.b64encode(b"png").decode(),
+    }
+    decodificado = decodificar_compacto(codificar_compacto(resultado))
+    assert decodificado["contornos_validos"]["contorno_0"].dtype == np.float32
+    comparar(decodificado, resultado)
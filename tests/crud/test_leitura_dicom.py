@@ -0,0 +1,70 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pydicom
+import pytest
+from numpy.testing import assert_array_equal
+from pydicom.uid import ImplicitVRLittleEndian, RLELossless
+from crud.leitura_dicom import ler_dicom, mapear_arquivo
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+
+def salvar(ds):
+    saida = io.BytesIO()
+    ds.save_as(saida, enforce_file_format=True)
+    return saida.getvalue()
+
+
+@pytest.fixture
+def dataset():
+    return pydicom.dcmread(DICOM)
+
+
+def test_ler_dicom_nativo(dataset):
+    dados = DICOM.read_bytes()
+    ds, pixels = ler_dicom(dados)
+
+    assert_array_equal(pixels, dataset.pixel_array)
+    assert pixels.dtype == dataset.pixel_array.dtype
+    # Visão sobre os próprios dados, sem cópia
+    assert not pixels.flags.writeable
+    assert ds.RescaleIntercept == dataset.RescaleIntercept
+    assert "PatientName" not in ds
+
+
+def test_ler_dicom_implicito(dataset):
+    dataset.file_meta.TransferSyntaxUID = ImplicitVRLittleEndian
+    ds, pixels = ler_dicom(salvar(dataset))
+    assert_array_equal(pixels, dataset.pixel_array)
+    assert not pixels.flags.writeable
+
+
+def test_ler_dicom_mmap(dataset, tmp_path):
+    caminho = tmp_path / "fatia.dcm"
+    caminho.write_bytes(DICOM.read_bytes())
+    with mapear_arquivo(caminho) as dados:
+        _, pixels = ler_dicom(dados)
+        assert_array_equal(pixels, dataset.pixel_array)
+        del pixels
+
+
+def test_ler_dicom_encapsulado(dataset):
+    original = dataset.pixel_array.copy()
+    dataset.compress(RLELossless)
+    ds, pixels = ler_dicom(salvar(dataset))
+
+    assert ds.file_meta.TransferSyntaxUID == RLELossless
+    assert_array_equal(pixels, original)
+
+
+def test_ler_dicom_sinal_estendido(dataset):
+    # Com sinal e BitsStored < BitsAllocated o pydicom estende o sinal
+    valores = dataset.pixel_array.astype(np.int16) - 2048
+    dataset.PixelRepresentation = 1
+    dataset.PixelData = (valores & 0x0FFF).astype("<u2").tobytes()
+    _, pixels = ler_dicom(salvar(dataset))
+
+    assert pixels.dtype == np.int16
+    assert_array_equal(pixels, valores)
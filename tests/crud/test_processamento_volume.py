@@ -0,0 +1,87 @@
+import io
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pydicom
+import pytest
+from numpy.testing import assert_array_equal
+from crud.alternativas.crescimento_regioes_fora_3d import crescimento_regioes_fora_3d
+from crud.alternativas.to_hu import converte_para_hu_e_cinza
+from crud.processamento import ParametrosInvalidosError
+from crud.processamento_volume import carregar_volume, processar_volume
+
+SERIE = Path(__file__).resolve().parents[2] / "data" / "pulmao2"
+
+# Fora da ordem; ImagePositionPatient diminui com o número da fatia
+NUMEROS = (80, 78, 82, 79, 81)
+
+
+def ler_fatias(numeros=NUMEROS):
+    return [(f"{n}.dcm", (SERIE / f"{n}.dcm").read_bytes()) for n in numeros]
+
+
+def test_carregar_volume_ordena_pela_posicao():
+    serie = carregar_volume(ler_fatias())
+
+    assert serie["arquivos"] == [f"{n}.dcm" for n in (82, 81, 80, 79, 78)]
+    assert serie["posicoes"] == sorted(serie["posicoes"])
+    assert serie["volume_hu"].shape == (5, 512, 512)
+    for z, arquivo in enumerate(serie["arquivos"]):
+        ds = pydicom.dcmread(SERIE / arquivo)
+        imagem_hu, imagem_cinza = converte_para_hu_e_cinza(ds.pixel_array, ds)
+        assert_array_equal(serie["volume_hu"][z], imagem_hu)
+        assert_array_equal(serie["volume_cinza"][z], imagem_cinza)
+
+    dz, dy, dx = serie["espacamento"]
+    assert dz == pytest.approx(1.0)
+    assert (dy, dx) == pytest.approx((0.693359375, 0.693359375))
+
+
+def test_carregar_volume_rejeita_dimensoes_diferentes():
+    ds = pydicom.dcmread(SERIE / "80.dcm")
+    recorte = np.ascontiguousarray(ds.pixel_array[:256, :256])
+    ds.PixelData = recorte.tobytes()
+    ds.Rows, ds.Columns = recorte.shape
+    arquivo = io.BytesIO()
+    ds.save_as(arquivo)
+
+    fatias = ler_fatias((79,)) + [("80.dcm", arquivo.getvalue())]
+    with pytest.raises(ParametrosInvalidosError):
+        carregar_volume(fatias)
+
+
+def test_processar_volume_rejeita_metodo_invalido():
+    with pytest.raises(ParametrosInvalidosError):
+        processar_volume(ler_fatias(), "watershed", {})
+
+
+def test_processar_volume_soma_o_volume_das_fatias():
+    # Sem parâmetros: area_minima usa o padrão
+    resultado = processar_volume(ler_fatias(), "crescimento_regioes_fora", {})
+
+    fatias = resultado["fatias"]
+    assert [f["arquivo"] for f in fatias] == [f"{n}.dcm" for n in (82, 81, 80, 79, 78)]
+    assert all(f["contornos_validos"] for f in fatias)
+
+    dz, dy, dx = resultado["espacamento_mm"]
+    area = sum(
+        cv2.contourArea(np.array(contorno, dtype=np.float32))
+        for fatia in fatias
+        for contorno in fatia["contornos_validos"].values()
+    )
+    assert resultado["volume_pulmonar_ml"] == pytest.approx(area * dy * dx * dz / 1000)
+    assert resultado["volume_pulmonar_ml"] > 0
+
+
+def test_crescimento_regioes_fora_3d_descarta_fora_e_bolsoes():
+    volume = np.full((6, 40, 40), -1000, dtype=np.int16)
+    volume[:, 5:35, 5:35] = 0  # corpo
+    volume[:, 10:25, 10:20] = -900  # pulmão, em todas as fatias
+    volume[2, 28:30, 28:30] = -800  # bolsão pequeno em uma fatia
+
+    saida = crescimento_regioes_fora_3d(volume)
+
+    esperado = np.zeros(volume.shape, dtype=np.uint8)
+    esperado[:, 10:25, 10:20] = 255 - np.uint8(100 / 800 * 255)
+    assert_array_equal(saida, esperado)
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from backend.segmentacao.classificacao import (
+from crud.segmentacao.classificacao import (
     calcula_ocorrencias_classes,
     probabilidade_classes,
 )
@@ -1,10 +1,15 @@
 import pytest
 import numpy as np
 from numpy.testing import assert_array_equal
-from backend.segmentacao.curva import inicializa_curva
-from backend.segmentacao.curva import no_pulmao
-from backend.segmentacao.curva import na_curva
-from backend.segmentacao.curva import adicionar_pontos
+from crud.segmentacao.curva import inicializa_curva
+from crud.segmentacao.curva import no_pulmao
+from crud.segmentacao.curva import na_curva
+from crud.segmentacao.curva import adicionar_pontos
+from crud.segmentacao.curva import calcular_angulo
+from crud.segmentacao.curva import remover_pontos
+from crud.segmentacao.energia import comprimentos_segmentos
+from crud.segmentacao.energia import minimiza_energia_incremental
+from crud.segmentation import passo_mca
 
 
 def test_inicializa_curva_padrao():
@@ -164,5 +169,76 @@ def test_adicionar_pontos_sem_espaco():
     assert_array_equal(nova_curva, esperado)  # Adiciona o ponto médio mesmo assim
 
 
+
+def test_adicionar_pontos_segmentos_longos():
+    curva = np.array([[10, 10], [300, 10], [155, 300]], dtype=np.int16)
+    imagem = np.full((400, 400), -700)
+    d_max = 200  # Segmentos com mais de 181 pixels (quadrado acima do int16)
+    nova_curva = adicionar_pontos(curva, imagem, d_max)
+    assert len(nova_curva) == 6
+    assert [155, 10] in nova_curva.tolist()
+
+
+def test_remover_pontos_igual_calcular_angulo():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        curva = rng.integers(0, 512, size=(int(rng.integers(3, 40)), 2))
+        curva = curva.astype(np.int16)
+        alpha = float(rng.integers(5, 60))
+
+        esperado = [curva[0]]
+        for i in range(1, len(curva) - 1):
+            p1, p2, p3 = curva[i - 1 : i + 2].astype(float)
+            if calcular_angulo(p1, p2, p3) > alpha:
+                esperado.append(curva[i])
+        esperado.append(curva[-1])
+
+        assert_array_equal(remover_pontos(curva, alpha), np.array(esperado))
+
+
+def test_passo_mca_igual_funcoes_separadas():
+    rng = np.random.default_rng(0)
+    energia_crisp = rng.random((100, 100))
+    mascara_pulmao = rng.random((100, 100)) > 0.3
+    imagem = np.where(mascara_pulmao, -700, 0)
+    curva = inicializa_curva(np.array([50, 50]), raio=30, quantidade_pixels=40)
+    area_de_busca, w_adapt, w_cont, alpha, d_max = 5, 0.1, 0.6, 10, 6
+
+    # Minimização de energia, remoção e inserção de pontos, uma de cada vez
+    comprimentos = comprimentos_segmentos(curva.astype(float))
+    minimizada = np.array(
+        [
+            minimiza_energia_incremental(
+                curva.astype(float),
+                i,
+                energia_crisp,
+                comprimentos,
+                comprimentos.sum(),
+                area_de_busca=area_de_busca,
+                w_adapt=w_adapt,
+                w_cont=w_cont,
+            )
+            for i in range(len(curva))
+        ]
+    )
+    esperado = adicionar_pontos(remover_pontos(minimizada, alpha), imagem, d_max)
+
+    buffer = np.empty((2 * len(curva), 2))
+    buffer[: len(curva)] = curva
+    n, _ = passo_mca(
+        buffer,
+        len(curva),
+        np.empty_like(buffer),
+        energia_crisp,
+        mascara_pulmao,
+        area_de_busca,
+        w_adapt,
+        w_cont,
+        alpha,
+        d_max,
+    )
+    assert_array_equal(buffer[:n], esperado)
+
+
 if __name__ == "__main__":
     pytest.main(["backend/tests/segmentacao/test_curva.py"])
@@ -1,6 +1,6 @@
 import pytest
 import numpy as np
-from backend.segmentacao.forca import forca_continuidade
+from crud.segmentacao.forca import forca_continuidade
 
 def test_zero_distancia():
     pontos = np.array([[0, 0], [0, 0], [0, 0]])
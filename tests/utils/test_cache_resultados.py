@@ -0,0 +1,79 @@
+import io
+from pathlib import Path
+
+import pydicom
+from utils.cache_resultados import CacheResultados, chave_resultado
+
+DICOM = Path(__file__).resolve().parents[2] / "data" / "pulmao2" / "80.dcm"
+
+
+def test_cache_miss_e_hit():
+    cache = CacheResultados(max_bytes_memoria=100, diretorio=None)
+    assert cache.obter("a") is None
+    cache.guardar("a", b"resultado")
+    assert cache.obter("a") == b"resultado"
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas["falhas"] == 1
+    assert estatisticas["acertos_memoria"] == 1
+    assert estatisticas["taxa_acerto"] == 0.5
+
+
+def test_cache_descarta_menos_usado():
+    cache = CacheResultados(max_bytes_memoria=10, diretorio=None)
+    cache.guardar("a", b"aaaa")
+    cache.guardar("b", b"bbbb")
+    cache.obter("a")  # "b" passa a ser a entrada usada há mais tempo
+    cache.guardar("c", b"cccc")
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == b"aaaa"
+    assert cache.obter("c") == b"cccc"
+    assert cache.estatisticas()["descartes"] == 1
+    assert cache.estatisticas()["bytes_memoria"] == 8
+
+
+def test_cache_maior_que_memoria_nao_guardado():
+    cache = CacheResultados(max_bytes_memoria=4, diretorio=None)
+    cache.guardar("a", b"grande demais")
+    assert cache.obter("a") is None
+
+
+def test_cache_disco(tmp_path):
+    cache = CacheResultados(
+        max_bytes_memoria=4, diretorio=str(tmp_path), max_bytes_disco=100
+    )
+    cache.guardar("a", b"aaaa")
+    cache.guardar("b", b"bbbb")  # Descarta "a" da memória, mas não do disco
+
+    assert cache.obter("a") == b"aaaa"
+    assert cache.estatisticas()["acertos_disco"] == 1
+
+    # Outro processo (mesmo diretório) encontra o resultado
+    outro = CacheResultados(max_bytes_memoria=100, diretorio=str(tmp_path))
+    assert outro.obter("b") == b"bbbb"
+
+
+def test_cache_disco_limitado(tmp_path):
+    cache = CacheResultados(
+        max_bytes_memoria=0, diretorio=str(tmp_path), max_bytes_disco=10
+    )
+    for chave in "abc":
+        cache.guardar(chave, chave.encode() * 4)
+    assert sum(a.stat().st_size for a in tmp_path.glob("*.json")) <= 10
+    assert cache.estatisticas()["descartes"] == 1
+
+
+def test_chave_ignora_metadados():
+    dados = DICOM.read_bytes()
+    ds = pydicom.dcmread(io.BytesIO(dados))
+    ds.PatientName = "Outro^Paciente"
+    saida = io.BytesIO()
+    ds.save_as(saida)
+
+    params = {"segmentation_params": {"limiar": 100}}
+    chave = chave_resultado(dados, "otsu", params)
+    assert chave_resultado(saida.getvalue(), "otsu", params) == chave
+    assert chave_resultado(dados, "lim_global_simples", params) != chave
+    assert chave_resultado(dados, "otsu", {"segmentation_params": {}}) != chave
+    assert chave_resultado(dados, "otsu", params, formato="compacto") != chave
@@ -0,0 +1,29 @@
+import importlib
+
+import pytest
+from utils import globals as configuracao
+
+
+@pytest.fixture
+def recarregar(monkeypatch):
+    def definir(**variaveis):
+        for nome, valor in variaveis.items():
+            monkeypatch.setenv(nome, valor)
+        return importlib.reload(configuracao)
+
+    yield definir
+    monkeypatch.undo()
+    importlib.reload(configuracao)
+
+
+@pytest.mark.parametrize("workers", ["0", "-2"])
+def test_workers_nao_positivos_usam_um_processo(recarregar, workers):
+    valores = recarregar(SEGMENTATION_WORKERS=workers)
+    assert valores.SEGMENTATION_WORKERS == 1
+    assert valores.NUMBA_THREADS_PER_WORKER >= 1
+
+
+def test_threads_por_worker_no_minimo_uma(recarregar):
+    valores = recarregar(SEGMENTATION_WORKERS="2", NUMBA_THREADS_PER_WORKER="0")
+    assert valores.SEGMENTATION_WORKERS == 2
+    assert valores.NUMBA_THREADS_PER_WORKER == 1
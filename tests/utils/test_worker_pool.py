@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+from crud.processamento import executar_tarefa
+from utils.worker_pool import PoolSaturadoError, WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(max_workers=1, limite_fila=0, numba_threads=1, aquecer=False)
+    pool.iniciar()
+    yield pool
+    pool.encerrar()
+
+
+def test_executar_devolve_resultado(pool):
+    assert asyncio.run(pool.executar(pow, 2, 10)) == 1024
+    assert pool.em_andamento == 0
+
+
+def test_pool_saturado(pool):
+    async def cenario():
+        ocupado = pool.executar(time.sleep, 0.5)
+        tarefa = asyncio.ensure_future(ocupado)
+        await asyncio.sleep(0)
+        assert pool.em_andamento == pool.capacidade == 1
+
+        with pytest.raises(PoolSaturadoError):
+            await pool.executar(pow, 2, 10)
+
+        # Sem vaga até o fim da tarefa em andamento
+        assert not await pool.aguardar_vaga(0.05)
+        assert await pool.aguardar_vaga(30)
+        await tarefa
+
+        assert await pool.executar(pow, 2, 10) == 1024
+
+    asyncio.run(cenario())
+
+
+def test_transmitir_cancela_tarefa_aguardando_processo():
+    pool = WorkerPool(max_workers=1, limite_fila=3, numba_threads=1, aquecer=False)
+    pool.iniciar()
+
+    async def cenario():
+        # Uma tarefa no processo e duas já enviadas à fila do executor
+        ocupados = [
+            asyncio.ensure_future(pool.executar(time.sleep, 1)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.2)
+
+        mensagens = pool.transmitir(executar_tarefa, b"", "otsu", {})
+        consumo = asyncio.ensure_future(mensagens.__anext__())
+        await asyncio.sleep(0.2)
+        assert pool.em_andamento == 4
+
+        consumo.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumo
+        await asyncio.sleep(0.1)
+        assert pool.em_andamento == 3
+
+        await asyncio.gather(*ocupados)
+
+    try:
+        asyncio.run(cenario())
+    finally:
+        pool.encerrar()